@@ -0,0 +1,130 @@
+import numpy as np
+from autodiff import lazy
+from autodiff.autodiff import AutoDiff, get_default_dtype
+
+
+class ADVector(AutoDiff):
+    """
+    Vector of AutoDiff values stored as a struct of arrays. All values live in one
+    contiguous array and all derivatives in one matrix, so arithmetic and elementary
+    functions act on the whole vector with single numpy calls.
+
+    Attributes:
+
+    val: np.ndarray of shape (n,), values of the components
+    der: np.ndarray of shape (n, m), row i is the derivative of component i
+
+    """
+
+    def __init__(self, values, der=None, dtype=None):
+        """
+        Initializes ADVector object w/ inputs val and der. Der set to the n x n
+        identity when not given, i.e. every component is seeded as its own input.
+        val and der are cast to dtype, or to get_default_dtype() if dtype is None,
+        and to float64 when both are None.
+
+        """
+        if dtype is None:
+            dtype = get_default_dtype()
+        if dtype is None:
+            dtype = np.float64
+        if der is None:
+            der = np.eye(len(values), dtype=dtype)
+        super().__init__(values, der, dtype)
+
+        if self.val.ndim != 1:
+            raise ValueError("ADVector values must be one dimensional")
+        if np.ndim(self.der) != 2 or self.der.shape[0] != len(self.val):
+            raise ValueError("ADVector derivative must have shape (n, m)")
+
+    @classmethod
+    def from_autodiff(cls, nums):
+        """
+        inputs: nums: list or np.ndarray of scalar AutoDiff objects, or an ADVector
+        returns ADVector object holding the values and derivatives of nums
+
+        """
+        if isinstance(nums, ADVector):
+            return cls(np.copy(nums.val), np.copy(nums.der), nums.val.dtype)
+        return cls([n.val for n in nums], [n.der for n in nums])
+
+    def to_autodiff(self):
+        """
+        returns np.ndarray of scalar AutoDiff objects, one per component
+
+        """
+        nums = np.empty(len(self), dtype=object)
+        for i in range(len(self)):
+            nums[i] = self[i]
+        return nums
+
+    def __str__(self):
+        """
+        returns string value of the vector
+
+        """
+        return "ADVector({},{})".format(self.val, self.der)
+
+    def __repr__(self):
+        """
+        returns string value of the vector
+
+        """
+        return "ADVector({},{})".format(self.val, self.der)
+
+    def __len__(self):
+        """
+        returns number of components
+
+        """
+        return len(self.val)
+
+    def __getitem__(self, index):
+        """
+        inputs: index: int, slice or index array
+        returns AutoDiff object for an int index, ADVector object otherwise
+
+        """
+        dtype = self.val.dtype
+        if lazy._active:
+            cls = AutoDiff if isinstance(index, (int, np.integer)) else ADVector
+            obj = cls.__new__(cls)
+            obj.val = np.array(self.val[index])
+            return lazy.defer(obj, ADVector.__getitem__, self, index)
+        if isinstance(index, (int, np.integer)):
+            return AutoDiff(self.val[index], self.der[index], dtype)
+        return ADVector(self.val[index], self.der[index], dtype)
+
+    def __iter__(self):
+        """
+        returns iterator over the components as AutoDiff objects
+
+        """
+        return (self[i] for i in range(len(self)))
+
+
+def _vectorize(name):
+    '''
+        Internal function wrapping an AutoDiff method so that it returns an ADVector
+    '''
+    method = getattr(AutoDiff, name)
+
+    def vectorized(self, *args):
+        # Looked up on each call, lazy mode replaces the AutoDiff methods
+        out = getattr(AutoDiff, name)(self, *args)
+        if isinstance(out, ADVector): # deferred in lazy mode
+            return out
+        if np.ndim(out.val) == 1 and np.ndim(out.der) == 2:
+            return ADVector._new(out.val, out.der)
+        return ADVector(out.val, out.der, out.val.dtype)
+
+    vectorized.__name__ = name
+    vectorized.__doc__ = method.__doc__
+    return vectorized
+
+
+for _name in ['__add__', '__radd__', '__sub__', '__rsub__', '__mul__', '__rmul__',
+              '__truediv__', '__rtruediv__', '__pow__', '__rpow__', '__neg__',
+              'sin', 'cos', 'tan', 'arcsine', 'arccosine', 'arctangent', 'sinh', 'cosh',
+              'tanh', 'ln', 'log', 'exp', 'expm', 'logistic', 'sqrt']:
+    setattr(ADVector, _name, _vectorize(_name))
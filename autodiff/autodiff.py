@@ -1,4 +1,239 @@
+import operator
 import numpy as np 
+from autodiff import workspace, lazy
+from autodiff.sparse import SparseDer, PatternDer
+
+# Operators used in place of numpy ufuncs when the result is not written to a buffer,
+# so that SparseDer and PatternDer derivatives keep dispatching to their own methods
+_OPERATORS = {np.add: operator.add, np.subtract: operator.sub, np.multiply: operator.mul,
+              np.true_divide: operator.truediv, np.power: operator.pow,
+              np.negative: operator.neg}
+
+
+# Derivative types other than np.ndarray, kept as is instead of converted to arrays
+_DERIVATIVES = (SparseDer, PatternDer)
+
+# Floating point type given to new AutoDiff objects when none is passed. None infers
+# the type from the values, as np.array does.
+_default_dtype = None
+
+
+def _float_dtype(dtype):
+    '''
+        Internal function returning dtype as an np.dtype, raising ValueError if it is
+        not a floating point type
+    '''
+    dtype = np.dtype(dtype)
+    if dtype.kind != 'f':
+        raise ValueError("dtype must be a floating point type, got {}".format(dtype))
+    return dtype
+
+
+def set_default_dtype(dtype):
+    '''
+        Sets the floating point type of the val and der of new AutoDiff objects, e.g.
+        np.float32 to halve derivative memory or np.longdouble for extra precision.
+        None restores inferring the type from the values.
+    '''
+    global _default_dtype
+    _default_dtype = None if dtype is None else _float_dtype(dtype)
+
+
+def get_default_dtype():
+    '''
+        Returns the floating point type of new AutoDiff objects as an np.dtype, or None
+        if it is inferred from the values
+    '''
+    return _default_dtype
+
+
+def _constant(value, ad):
+    '''
+        Internal function casting a constant operand to the floating point type of ad,
+        so that numpy scalars and float64 arrays do not upcast e.g. float32 objects.
+        Python ints and floats never upcast and are returned as is.
+    '''
+    if not isinstance(value, (np.ndarray, np.generic, list, tuple)):
+        return value
+    dtype = getattr(ad.val, 'dtype', None)
+    if dtype is None or dtype.kind != 'f' or dtype == np.float64:
+        return value
+    try:
+        return np.asarray(value, dtype=dtype)
+    except (TypeError, ValueError):
+        return value
+
+
+def _expand(factor, *ads):
+    '''
+        Internal function reshaping factor so that it scales the derivative of each
+        element of val. When der carries a trailing axis of derivative directions
+        (der.shape == val.shape + (m,)), array factors get a matching length-1 axis.
+    '''
+    # reads the ndim attribute of numpy operands, np.ndim dominates the cost of scalars
+    try:
+        ndim = factor.ndim
+    except AttributeError:
+        ndim = np.ndim(factor)
+    if ndim == 0:
+        return factor
+    k = max(np.ndim(a.der) - np.ndim(a.val) for a in ads)
+    if k <= 0:
+        return factor
+    return np.reshape(factor, np.shape(factor) + (1,) * k)
+
+
+def _broadcast_der(ad, new_val):
+    '''
+        Internal function broadcasting the derivative of ad when adding a constant
+        array gave new_val more elements than ad.val, e.g. a batch axis
+    '''
+    der, shape = ad.der, getattr(new_val, 'shape', ())
+    if shape == ad.val.shape or not isinstance(der, np.ndarray):
+        return der
+    k = der.ndim - ad.val.ndim
+    if k <= 0:
+        return der
+    return np.broadcast_to(der, shape + der.shape[-k:])
+
+
+def _shifted_der(ad, new_val):
+    '''
+        Internal function returning the derivative of ad plus or minus a constant, a copy
+        of ad.der broadcast to the shape of new_val (see _broadcast_der and _copy)
+    '''
+    der = ad.der
+    if workspace._active or getattr(new_val, 'shape', ()) != ad.val.shape:
+        return _copy(_broadcast_der(ad, new_val))
+    # Shortcut for eager code, where these helper calls dominate scalar additions
+    return der if isinstance(der, _DERIVATIVES) else np.array(der)
+
+
+def _pooled(ufunc):
+    '''
+        Internal function returning ufunc writing its result into a buffer recycled by
+        the active Workspace, where the operands allow it
+    '''
+    fallback = _OPERATORS.get(ufunc, ufunc)
+
+    def pooled(*operands):
+        out = workspace.buffer(*operands)
+        if out is None:
+            return fallback(*operands)
+        return ufunc(*operands, out=out)
+    return pooled
+
+
+# Ufuncs applied to val and der by the operators and elementary functions, by the
+# name they are looked up under in _ufuncs
+_UFUNCS = {'add': np.add, 'subtract': np.subtract, 'multiply': np.multiply,
+           'divide': np.true_divide, 'power': np.power, 'negative': np.negative,
+           'sin': np.sin, 'cos': np.cos, 'tan': np.tan, 'arcsin': np.arcsin,
+           'arccos': np.arccos, 'arctan': np.arctan, 'sinh': np.sinh, 'cosh': np.cosh,
+           'tanh': np.tanh, 'log': np.log, 'exp': np.exp}
+
+
+class _Ufuncs():
+    """
+    Namespace of the functions in _UFUNCS. Outside workspaces they are the operators,
+    or the ufuncs themselves, so eager code calls them directly. While a Workspace is
+    active they are replaced by pooled versions, see _use_workspace.
+
+    """
+
+
+_ufuncs = _Ufuncs()
+
+
+def _copy(der):
+    '''
+        Internal function copying a dense derivative, so results never share a buffer
+        with their inputs and can be updated in place. SparseDer and PatternDer objects
+        are never updated in place and are returned as is.
+    '''
+    if isinstance(der, _DERIVATIVES):
+        return der
+    out = workspace.buffer(der)
+    if out is None:
+        return np.array(der)
+    np.copyto(out, der)
+    return out
+
+
+# Ufuncs dispatched by AutoDiff.__array_ufunc__. Binary ufuncs name the operator of an
+# AutoDiff left operand and the reflected one of an AutoDiff right operand.
+_UFUNC_OPERATORS = {np.add: ('__add__', '__radd__'), np.subtract: ('__sub__', '__rsub__'),
+                    np.multiply: ('__mul__', '__rmul__'),
+                    np.true_divide: ('__truediv__', '__rtruediv__'),
+                    np.power: ('__pow__', '__rpow__')}
+
+_UFUNC_METHODS = {np.negative: lambda x: x.__neg__(), np.positive: lambda x: x + 0,
+                  np.sin: lambda x: x.sin(), np.cos: lambda x: x.cos(),
+                  np.tan: lambda x: x.tan(), np.arcsin: lambda x: x.arcsine(),
+                  np.arccos: lambda x: x.arccosine(), np.arctan: lambda x: x.arctangent(),
+                  np.sinh: lambda x: x.sinh(), np.cosh: lambda x: x.cosh(),
+                  np.tanh: lambda x: x.tanh(), np.log: lambda x: x.ln(),
+                  np.log2: lambda x: x.log(2), np.log10: lambda x: x.log(10),
+                  np.exp: lambda x: x.exp(), np.exp2: lambda x: x.expm(2),
+                  np.sqrt: lambda x: x.sqrt(), np.square: lambda x: x ** 2,
+                  np.reciprocal: lambda x: 1 / x,
+                  np.absolute: lambda x: x * np.sign(x.val)}
+
+# Ufuncs selecting one of their operands elementwise: (picks the larger operand,
+# propagates a nan of the first operand rather than the other one)
+_UFUNC_SELECTIONS = {np.maximum: (True, True), np.minimum: (False, True),
+                     np.fmax: (True, False), np.fmin: (False, False)}
+
+# Ufuncs whose result does not depend smoothly on the values, applied to the values
+_UFUNC_VALUES = {np.equal, np.not_equal, np.less, np.less_equal, np.greater,
+                 np.greater_equal, np.isfinite, np.isinf, np.isnan, np.sign}
+
+
+def _select(ufunc, a, b):
+    '''
+        Internal function applying a ufunc of _UFUNC_SELECTIONS to a and b, at least one
+        an AutoDiff object. The value and derivative of each element come from the
+        operand the ufunc selects, constants having derivative 0.
+    '''
+    larger, nan_first = _UFUNC_SELECTIONS[ufunc]
+    ads = [x for x in (a, b) if isinstance(x, AutoDiff)]
+    a, b = [x if isinstance(x, AutoDiff) else _constant(x, ads[0]) for x in (a, b)]
+    a_val, b_val = getattr(a, 'val', a), getattr(b, 'val', b)
+    new_val = np.asarray(ufunc(a_val, b_val))
+    with np.errstate(invalid='ignore'):
+        pick_a = (a_val >= b_val) if larger else (a_val <= b_val)
+    pick_a = pick_a | np.isnan(a_val if nan_first else b_val)
+
+    ref = ads[0]
+    directions = np.shape(ref.der)[np.ndim(ref.val):]
+    ders = []
+    for x in (a, b):
+        if isinstance(x, AutoDiff):
+            der = x.der.toarray() if hasattr(x.der, 'toarray') else x.der
+            ders.append(_broadcast_der(AutoDiff._new(x.val, der), new_val))
+        else:
+            ders.append(np.zeros(np.shape(x) + directions, ref.val.dtype))
+    new_der = np.where(_expand(pick_a, *ads), ders[0], ders[1])
+    return AutoDiff._new(new_val, new_der)
+
+
+def _object_ufunc(ufunc, inputs, kwargs):
+    '''
+        Internal function applying ufunc to inputs w/ AutoDiff objects as elements of
+        object arrays, so numpy calls their operators elementwise as it does w/o
+        __array_ufunc__
+    '''
+    wrapped = []
+    for x in inputs:
+        if isinstance(x, AutoDiff):
+            x, obj = np.empty((), dtype=object), x
+            x[()] = obj
+        wrapped.append(x)
+    result = ufunc(*wrapped, **kwargs)
+    if isinstance(result, np.ndarray) and result.ndim == 0:
+        return result[()]
+    return result
+
 
 class AutoDiff():
     """
@@ -7,13 +242,25 @@ class AutoDiff():
     Attributes:
 
     val: value of custom function evaluated at x
-    der: derivative of custom function evaluated at x
+    der: derivative of custom function evaluated at x, either an np.ndarray or
+         a SparseDer object holding only the nonzero entries, or a PatternDer
+         object recording only which inputs the value depends on
+
+    val and der keep the floating point type they were created w/ (see
+    set_default_dtype) through every operator and elementary function.
+
+    When der has one more axis than val (der.shape == val.shape + (m,)) the last axis
+    holds the m derivative directions. This covers gradients of scalar functions
+    (val shape (), der shape (m,)), vectors (val (n,), der (n, m)) and batches of
+    points evaluated together (val (batch,), der (batch, m)).
 
     """
 
-    def __init__(self, values, der = [1]): 
+    def __init__(self, values, der = [1], dtype = None): 
         """ 
         Initializes AutoDiff object w/ inputs val and der. Der set to 1 initially.
+        val and dense der are cast to dtype, or to get_default_dtype() if dtype is
+        None. When both are None the type is inferred from the inputs.
 
         """
         if isinstance(values, str):
@@ -25,9 +272,60 @@ class AutoDiff():
         elif isinstance(der, list) and any(type(item)==str for item in der):
             raise TypeError("Cannot accept string values")
 
-        self.val = np.array(values) # set to np array
-        self.der = np.array(der) # set to np array
-        
+        dtype = _default_dtype if dtype is None else _float_dtype(dtype)
+        self.val = np.array(values, dtype=dtype) # set to np array
+        if isinstance(der, _DERIVATIVES): # sparse derivatives propagate as is
+            self.der = der
+        else:
+            self.der = np.array(der, dtype=dtype) # set to np array
+
+    @classmethod
+    def _new(cls, values, der):
+        """
+        Internal constructor skipping the validation and copies of __init__. values
+        and der must be newly computed arrays that no other object refers to.
+
+        """
+        obj = object.__new__(cls)
+        obj.val = np.asarray(values)
+        obj.der = der if isinstance(der, _DERIVATIVES) else np.asarray(der)
+        return obj
+
+    def _updatable(self, val, *ders):
+        """
+        inputs: val: operand combined w/ self.val, ders: operands combined w/ self.der
+        returns True if val and der are float arrays of the same dtype that an in-place
+        update w/ these operands leaves w/ the same shape and dtype
+
+        """
+        if not (isinstance(self.val, np.ndarray) and isinstance(self.der, np.ndarray)):
+            return False
+        dtype = self.val.dtype
+        if dtype.kind != 'f' or self.der.dtype != dtype or \
+           not (self.val.flags.writeable and self.der.flags.writeable):
+            return False
+        try:
+            if np.broadcast(self.val, val).shape != self.val.shape or \
+               np.result_type(self.val, val) != dtype:
+                return False
+            for der in ders:
+                if not isinstance(der, (np.ndarray, float, int, np.generic)) or \
+                   np.broadcast(self.der, der).shape != self.der.shape or \
+                   np.result_type(self.der, der) != dtype:
+                    return False
+        except (ValueError, TypeError):
+            return False
+        return True
+
+    def _assign(self, result):
+        """
+        inputs: result: AD object
+        sets val and der of self to those of result and returns self
+
+        """
+        self.val = result.val
+        self.der = result.der
+        return self
 
     def __str__(self):
         """ 
@@ -44,6 +342,65 @@ class AutoDiff():
         return "AutoDiff({},{})".format(self.val, self.der)
 
 
+    """ numpy protocols """
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        """
+        inputs: ufunc: np.ufunc, method: str, inputs: AD objects or constants
+        returns AD object of the ufunc applied to the inputs w/ the derivative rule of
+        the matching operator or elementary function, e.g. np.sin(x) is x.sin(). Also
+        makes numpy scalars and arrays on the left of an operator defer to the AD
+        object instead of looping over it as an object array. np.maximum, np.minimum,
+        np.fmax and np.fmin take the value and derivative of the selected operand. The
+        add and multiply reductions and matmul use the vectorized rules of
+        autodiff.linalg. Other ufuncs loop over the AD objects as elements of object
+        arrays.
+
+        """
+        # linalg builds on this module, so it is imported on first use
+        from autodiff import linalg
+        if 'out' in kwargs:
+            return NotImplemented
+        if method == 'reduce' and ufunc in (np.add, np.multiply) and \
+           set(kwargs) <= {'axis'} and len(inputs) == 1:
+            reduction = linalg.sum if ufunc is np.add else linalg.prod
+            return reduction(inputs[0], kwargs.get('axis', 0))
+        if method != '__call__':
+            return NotImplemented
+        if ufunc in _UFUNC_VALUES:
+            return ufunc(*[getattr(x, 'val', x) for x in inputs], **kwargs)
+        if kwargs:
+            return _object_ufunc(ufunc, inputs, kwargs)
+        if ufunc in _UFUNC_OPERATORS:
+            left, right = _UFUNC_OPERATORS[ufunc]
+            a, b = inputs
+            return getattr(a, left)(b) if isinstance(a, AutoDiff) else getattr(b, right)(a)
+        if ufunc in _UFUNC_METHODS:
+            return _UFUNC_METHODS[ufunc](inputs[0])
+        if ufunc in _UFUNC_SELECTIONS:
+            return _select(ufunc, *inputs)
+        if ufunc is np.matmul:
+            return linalg.matmul(*inputs)
+        # Other ufuncs, e.g. np.logical_and, loop over the objects as before
+        return _object_ufunc(ufunc, inputs, kwargs)
+
+    def __array_function__(self, func, types, args, kwargs):
+        """
+        inputs: func: numpy function, types: types implementing the protocol, args and
+        kwargs: arguments of the call
+        returns result of the vectorized rule of autodiff.linalg for np.sum, np.mean,
+        np.prod, np.dot and np.linalg.norm, or of numpy's own implementation for other
+        functions and arguments the rules do not cover
+
+        """
+        from autodiff import linalg
+        handler = linalg._ARRAY_FUNCTIONS.get(func)
+        result = NotImplemented if handler is None else handler(*args, **kwargs)
+        if result is NotImplemented:
+            implementation = getattr(func, '_implementation', None) or func.__wrapped__
+            return implementation(*args, **kwargs)
+        return result
+
+
     """ Comparison operators """
     def __eq__(self, other):
         '''
@@ -116,12 +473,13 @@ class AutoDiff():
 
         """
         try: # assumes two AutoDiff objects
-            new_val = self.val + other.val
-            new_der = self.der + other.der
+            new_val = _ufuncs.add(self.val, other.val)
+            new_der = _ufuncs.add(self.der, other.der)
         except AttributeError: # assumes other is scalar
-            new_val = self.val + other
-            new_der = self.der
-        return AutoDiff(new_val, new_der)
+            other = _constant(other, self)
+            new_val = _ufuncs.add(self.val, other)
+            new_der = _shifted_der(self, new_val)
+        return AutoDiff._new(new_val, new_der)
 
     def __radd__(self, other):
         """
@@ -138,12 +496,13 @@ class AutoDiff():
 
         """
         try: # assumes two AutoDiff objects
-            new_val = self.val - other.val
-            new_der = self.der - other.der
+            new_val = _ufuncs.subtract(self.val, other.val)
+            new_der = _ufuncs.subtract(self.der, other.der)
         except AttributeError: # assumes other is scalar
-            new_val = self.val - other
-            new_der = self.der
-        return AutoDiff(new_val, new_der)
+            other = _constant(other, self)
+            new_val = _ufuncs.subtract(self.val, other)
+            new_der = _shifted_der(self, new_val)
+        return AutoDiff._new(new_val, new_der)
 
     def __rsub__(self, other):
         """
@@ -160,12 +519,14 @@ class AutoDiff():
 
         """
         try: # assumes two AutoDiff objects
-            new_val = self.val * other.val
-            new_der = self.der * other.val + other.der * self.val
+            new_val = _ufuncs.multiply(self.val, other.val)
+            new_der = _ufuncs.add(self.der * _expand(other.val, self),
+                              other.der * _expand(self.val, other))
         except AttributeError: # assumes other is scalar
-            new_val = self.val * other
-            new_der = self.der * other
-        return AutoDiff(new_val, new_der)
+            other = _constant(other, self)
+            new_val = _ufuncs.multiply(self.val, other)
+            new_der = _ufuncs.multiply(self.der, _expand(other, self))
+        return AutoDiff._new(new_val, new_der)
 
     def __rmul__(self, other):
         """
@@ -182,12 +543,15 @@ class AutoDiff():
 
         """
         try: # assumes self & other are autodiff objects
-            new_val = self.val / other.val
-            new_der = (self.der * other.val - other.der * self.val) / (other.val ** 2)
+            new_val = _ufuncs.divide(self.val, other.val)
+            new_der = _ufuncs.divide(
+                              self.der * _expand(other.val, self) - other.der * _expand(self.val, other),
+                              _expand(other.val ** 2, self, other))
         except AttributeError: # assumes self is autodiff object and other is scalar
-            new_val = self.val / other
-            new_der = self.der / other
-        return AutoDiff(new_val, new_der)
+            other = _constant(other, self)
+            new_val = _ufuncs.divide(self.val, other)
+            new_der = _ufuncs.divide(self.der, _expand(other, self))
+        return AutoDiff._new(new_val, new_der)
 
 
     def __rtruediv__(self, other):
@@ -197,12 +561,16 @@ class AutoDiff():
 
         """
         try: # assumes self & other are autodiff objects
-            new_val = other.val / self.val
-            new_der = (other.der * self.val - self.der * other.val) / (self.val ** 2)
+            new_val = _ufuncs.divide(other.val, self.val)
+            new_der = _ufuncs.divide(
+                              other.der * _expand(self.val, other) - self.der * _expand(other.val, self),
+                              _expand(self.val ** 2, self, other))
         except AttributeError: # assumes self is autodiff object and other is scalar
-            new_val = other / self.val
-            new_der = other * ( - self.der / (self.val ** 2))
-        return AutoDiff(new_val, new_der)
+            other = _constant(other, self)
+            new_val = _ufuncs.divide(other, self.val)
+            new_der = _ufuncs.multiply(_expand(other, self),
+                              - self.der / _expand(self.val ** 2, self))
+        return AutoDiff._new(new_val, new_der)
 
     def __pow__(self, other):
         """
@@ -211,12 +579,14 @@ class AutoDiff():
 
         """
         try: # assumes two AutoDiff objects
-            new_val = self.val ** other.val
-            new_der = other.val * (self.val ** (other.val - 1)) * self.der
+            new_val = _ufuncs.power(self.val, other.val)
+            new_der = _ufuncs.multiply(
+                              _expand(other.val * (self.val ** (other.val - 1)), self, other), self.der)
         except AttributeError: # assumes other is scalar
-            new_val = self.val ** other
-            new_der = other * (self.val ** (other - 1)) * self.der
-        return AutoDiff(new_val, new_der)
+            other = _constant(other, self)
+            new_val = _ufuncs.power(self.val, other)
+            new_der = _ufuncs.multiply(_expand(other * (self.val ** (other - 1)), self), self.der)
+        return AutoDiff._new(new_val, new_der)
 
     def __rpow__(self, other):
         """
@@ -225,12 +595,117 @@ class AutoDiff():
 
         """
         try: # assumes self & other are autodiff objects
-            new_val = other.val ** self.val
-            new_der = self.val * (other.val ** (self.val - 1)) * other.der
+            new_val = _ufuncs.power(other.val, self.val)
+            new_der = _ufuncs.multiply(
+                              _expand(self.val * (other.val ** (self.val - 1)), self, other), other.der)
         except AttributeError: # assumes self is autodiff object and other is scalar
-            new_val = other ** self.val
-            new_der = self.der * ( other ** self.val ) * np.log(other)
-        return AutoDiff(new_val, new_der)
+            other = _constant(other, self)
+            new_val = _ufuncs.power(other, self.val)
+            new_der = _ufuncs.multiply(self.der * _expand(new_val, self),
+                              _expand(_constant(np.log(other), self), self))
+        return AutoDiff._new(new_val, new_der)
+
+    """ in-place operators """
+    def __iadd__(self, other):
+        """
+        inputs: self: AD object, other: AD object or scalar
+        updates self to self + other, writing into the val and der arrays of self when
+        their shape and dtype allow it, and returns self
+
+        """
+        try: # assumes two AutoDiff objects
+            val, der = other.val, other.der
+        except AttributeError: # assumes other is scalar
+            val, der = _constant(other, self), 0.
+        if not self._updatable(val, der):
+            return self._assign(self.__add__(other))
+        self.val += val
+        self.der += der
+        return self
+
+    def __isub__(self, other):
+        """
+        inputs: self: AD object, other: AD object or scalar
+        updates self to self - other, writing into the val and der arrays of self when
+        their shape and dtype allow it, and returns self
+
+        """
+        try: # assumes two AutoDiff objects
+            val, der = other.val, other.der
+        except AttributeError: # assumes other is scalar
+            val, der = _constant(other, self), 0.
+        if not self._updatable(val, der):
+            return self._assign(self.__sub__(other))
+        self.val -= val
+        self.der -= der
+        return self
+
+    def __imul__(self, other):
+        """
+        inputs: self: AD object, other: AD object or scalar
+        updates self to self * other, writing into the val and der arrays of self when
+        their shape and dtype allow it, and returns self
+
+        """
+        try: # assumes two AutoDiff objects
+            factor = _expand(other.val, self)
+            term = other.der * _expand(self.val, other)
+            val = other.val
+        except AttributeError: # assumes other is scalar
+            val = _constant(other, self)
+            factor = _expand(val, self)
+            term = None
+        if not self._updatable(val, factor, 0. if term is None else term):
+            return self._assign(self.__mul__(other))
+        self.der *= factor
+        if term is not None:
+            self.der += term
+        self.val *= val
+        return self
+
+    def __itruediv__(self, other):
+        """
+        inputs: self: AD object, other: AD object or scalar
+        updates self to self / other, writing into the val and der arrays of self when
+        their shape and dtype allow it, and returns self
+
+        """
+        try: # assumes self & other are autodiff objects
+            factor = _expand(other.val, self)
+            term = other.der * _expand(self.val, other)
+            square = _expand(other.val ** 2, self, other)
+            val = other.val
+        except AttributeError: # assumes self is autodiff object and other is scalar
+            val = _constant(other, self)
+            factor = None
+            term = None
+            square = _expand(val, self)
+        if not self._updatable(val, square, 1. if factor is None else factor,
+                               0. if term is None else term):
+            return self._assign(self.__truediv__(other))
+        if term is not None:
+            self.der *= factor
+            self.der -= term
+        self.der /= square
+        self.val /= val
+        return self
+
+    def __ipow__(self, other):
+        """
+        inputs: self: AD object, other: AD object or scalar
+        updates self to self ** other, writing into the val and der arrays of self when
+        their shape and dtype allow it, and returns self
+
+        """
+        if isinstance(other, AutoDiff):
+            return self._assign(self.__pow__(other))
+        other = _constant(other, self)
+        factor = _expand(other * (self.val ** (other - 1)), self)
+        if not self._updatable(other, factor):
+            return self._assign(self.__pow__(other))
+        self.der *= factor
+        self.val **= other
+        return self
 
     """ unary operators """
     def __neg__(self): 
@@ -239,9 +714,9 @@ class AutoDiff():
         returns AD object of negative function of the form - self 
 
         """
-        new_val = - self.val
-        new_der = - self.der
-        return AutoDiff(new_val, new_der)
+        new_val = _ufuncs.negative(self.val)
+        new_der = _ufuncs.negative(self.der)
+        return AutoDiff._new(new_val, new_der)
 
     """ elementary functions """
     def sin(self):
@@ -250,9 +725,9 @@ class AutoDiff():
         returns AD object of sine function of the form sine(self)
 
         """
-        new_val = np.sin(self.val)
-        new_der = self.der * np.cos(self.val)
-        return AutoDiff(new_val, new_der)
+        new_val = _ufuncs.sin(self.val)
+        new_der = _ufuncs.multiply(self.der, _expand(np.cos(self.val), self))
+        return AutoDiff._new(new_val, new_der)
 
     def cos(self):
         """
@@ -260,9 +735,9 @@ class AutoDiff():
         returns AD object of cosine function of the form cosine(self)
 
         """
-        new_val = np.cos(self.val)
-        new_der = self.der * ( - np.sin(self.val))
-        return AutoDiff(new_val, new_der)
+        new_val = _ufuncs.cos(self.val)
+        new_der = _ufuncs.multiply(self.der, _expand( - np.sin(self.val), self))
+        return AutoDiff._new(new_val, new_der)
 
     def tan(self):
         """
@@ -270,9 +745,9 @@ class AutoDiff():
         returns AD object of tangent function of the form tangent(self)
 
         """
-        new_val = np.tan(self.val)
-        new_der = self.der / ( np.cos(self.val) ** 2 )
-        return AutoDiff(new_val, new_der)
+        new_val = _ufuncs.tan(self.val)
+        new_der = _ufuncs.divide(self.der, _expand( np.cos(self.val) ** 2, self))
+        return AutoDiff._new(new_val, new_der)
 
     """ inverse trig functions """
     def arcsine(self):
@@ -281,9 +756,9 @@ class AutoDiff():
         returns AD object of arcsine function of the form arcsine(self)
 
         """
-        new_val = np.arcsin(self.val)
-        new_der = self.der / ((1 - self.val ** 2) ** (1/2))
-        return AutoDiff(new_val, new_der)
+        new_val = _ufuncs.arcsin(self.val)
+        new_der = _ufuncs.divide(self.der, _expand((1 - self.val ** 2) ** (1/2), self))
+        return AutoDiff._new(new_val, new_der)
 
     def arccosine(self):
         """
@@ -291,9 +766,9 @@ class AutoDiff():
         returns AD object of arccosine function of the form arccosine(self)
 
         """
-        new_val = np.arccos(self.val)
-        new_der = - self.der / ((1 - self.val ** 2) ** (1/2))
-        return AutoDiff(new_val, new_der)
+        new_val = _ufuncs.arccos(self.val)
+        new_der = _ufuncs.divide(- self.der, _expand((1 - self.val ** 2) ** (1/2), self))
+        return AutoDiff._new(new_val, new_der)
 
     def arctangent(self):
         """
@@ -301,9 +776,9 @@ class AutoDiff():
         returns AD object of arctangent function of the form arctangent(self)
 
         """
-        new_val = np.arctan(self.val)
-        new_der = self.der / (1 + self.val ** 2)
-        return AutoDiff(new_val, new_der)
+        new_val = _ufuncs.arctan(self.val)
+        new_der = _ufuncs.divide(self.der, _expand(1 + self.val ** 2, self))
+        return AutoDiff._new(new_val, new_der)
 
     """ hyperbolic functions """
     def sinh(self):
@@ -312,9 +787,9 @@ class AutoDiff():
         returns AD object of sinh function of the form sinh(self)
 
         """
-        new_val = np.sinh(self.val)
-        new_der = self.der * np.cosh(self.val)
-        return AutoDiff(new_val, new_der)
+        new_val = _ufuncs.sinh(self.val)
+        new_der = _ufuncs.multiply(self.der, _expand(np.cosh(self.val), self))
+        return AutoDiff._new(new_val, new_der)
 
     def cosh(self):
         """
@@ -322,9 +797,9 @@ class AutoDiff():
         returns AD object of cosh function of the form cosh(self)
 
         """
-        new_val = np.cosh(self.val)
-        new_der = self.der * np.sinh(self.val)
-        return AutoDiff(new_val, new_der)
+        new_val = _ufuncs.cosh(self.val)
+        new_der = _ufuncs.multiply(self.der, _expand(np.sinh(self.val), self))
+        return AutoDiff._new(new_val, new_der)
 
     def tanh(self):
         """
@@ -332,9 +807,9 @@ class AutoDiff():
         returns AD object of tanh function of the form tanh(self)
 
         """
-        new_val = np.tanh(self.val)
-        new_der = self.der * 1 / (np.cosh(self.val) ** 2)
-        return AutoDiff(new_val, new_der)
+        new_val = _ufuncs.tanh(self.val)
+        new_der = _ufuncs.divide(self.der * 1, _expand(np.cosh(self.val) ** 2, self))
+        return AutoDiff._new(new_val, new_der)
 
     def ln(self):
         """
@@ -342,9 +817,9 @@ class AutoDiff():
         returns AD object of natural log (ln) function of the form ln(self)
 
         """
-        new_val = np.log(self.val)
-        new_der = self.der * (1 / self.val)
-        return AutoDiff(new_val, new_der)
+        new_val = _ufuncs.log(self.val)
+        new_der = _ufuncs.multiply(self.der, _expand(1 / self.val, self))
+        return AutoDiff._new(new_val, new_der)
 
     def log(self, base):
         """
@@ -352,9 +827,10 @@ class AutoDiff():
         returns AD object of log function with base = base of the form log(self, base)
 
         """
-        new_val = np.log(self.val) / np.log(base)
-        new_der = self.der * (1 / (self.val * np.log(base)))
-        return AutoDiff(new_val, new_der)
+        log_base = _constant(np.log(base), self)
+        new_val = _ufuncs.divide(np.log(self.val), log_base)
+        new_der = _ufuncs.multiply(self.der, _expand(1 / (self.val * log_base), self))
+        return AutoDiff._new(new_val, new_der)
     
     def exp(self):
         """
@@ -362,9 +838,9 @@ class AutoDiff():
         returns AD object of exponential function of the form exp(self)
 
         """
-        new_val = np.exp(self.val)
-        new_der = self.der * np.exp(self.val)
-        return AutoDiff(new_val, new_der)
+        new_val = _ufuncs.exp(self.val)
+        new_der = _ufuncs.multiply(self.der, _expand(new_val, self))
+        return AutoDiff._new(new_val, new_der)
 
     def expm(self, base):
         """
@@ -372,9 +848,11 @@ class AutoDiff():
         returns AD object of exponential function of the form exp(self)
 
         """
-        new_val = base ** self.val
-        new_der = self.der * ( base ** self.val ) * np.log(base)
-        return AutoDiff(new_val, new_der)
+        base = _constant(base, self)
+        new_val = _ufuncs.power(base, self.val)
+        new_der = _ufuncs.multiply(self.der * _expand(new_val, self),
+                          _expand(_constant(np.log(base), self), self))
+        return AutoDiff._new(new_val, new_der)
 
     def logistic(self):
         """
@@ -382,9 +860,10 @@ class AutoDiff():
         returns AD object of logistic function of the form logistic(self)
 
         """
-        new_val = 1 / ( 1 + np.exp(- self.val))
-        new_der = self.der * np.exp(self.val) / ((1 + np.exp(self.val)) ** 2)
-        return AutoDiff(new_val, new_der)
+        new_val = _ufuncs.divide(1, 1 + np.exp(- self.val))
+        exp = np.exp(self.val)
+        new_der = _ufuncs.divide(self.der * _expand(exp, self), _expand((1 + exp) ** 2, self))
+        return AutoDiff._new(new_val, new_der)
 
 
     def sqrt(self):
@@ -393,9 +872,136 @@ class AutoDiff():
         returns AD object of sqrt function of the form sqrt(self)
 
         """ 
-        new_val = self.val ** (1/2)
-        new_der = self.der * ((1/2) * (self.val ** (- 1/2)))
-        return AutoDiff(new_val, new_der)
+        new_val = _ufuncs.power(self.val, 1/2)
+        new_der = _ufuncs.multiply(self.der, _expand((1/2) * (self.val ** (- 1/2)), self))
+        return AutoDiff._new(new_val, new_der)
+
+# Value of each operator and elementary function given the values of its operands, all
+# that is computed in lazy mode until der is read
+_VALUES = {'__add__': np.add, '__radd__': lambda a, b: np.add(b, a),
+           '__sub__': np.subtract, '__rsub__': lambda a, b: np.subtract(b, a),
+           '__mul__': np.multiply, '__rmul__': lambda a, b: np.multiply(b, a),
+           '__truediv__': np.true_divide, '__rtruediv__': lambda a, b: np.true_divide(b, a),
+           '__pow__': np.power, '__rpow__': lambda a, b: np.power(b, a),
+           '__neg__': np.negative, 'sin': np.sin, 'cos': np.cos, 'tan': np.tan,
+           'arcsine': np.arcsin, 'arccosine': np.arccos, 'arctangent': np.arctan,
+           'sinh': np.sinh, 'cosh': np.cosh, 'tanh': np.tanh, 'ln': np.log,
+           'log': lambda a, base: np.log(a) / np.log(base), 'exp': np.exp,
+           'expm': lambda a, base: np.power(base, a),
+           'logistic': lambda a: 1 / (1 + np.exp(- a)), 'sqrt': lambda a: np.power(a, 1/2)}
+
+# In-place operators and the operators they defer as in lazy mode
+_INPLACE = {'__iadd__': '__add__', '__isub__': '__sub__', '__imul__': '__mul__',
+            '__itruediv__': '__truediv__', '__ipow__': '__pow__'}
+
+
+def _deferrable(name):
+    '''
+        Internal function wrapping the operator or elementary function name of AutoDiff
+        so that in lazy mode it only computes the value of its result, and the
+        derivative is computed by the operator itself on the first read of der. The
+        wrapper runs the operator directly while resolve suspends lazy mode.
+    '''
+    method = getattr(AutoDiff, name)
+    value = _VALUES[name]
+
+    def deferrable(self, *args):
+        if not lazy._active:
+            return method(self, *args)
+        operands = [a.val if isinstance(a, AutoDiff) else _constant(a, self) for a in args]
+        new_val = np.asarray(value(self.val, *operands))
+        # Keep the floating point type the operator would give
+        dtype = np.result_type(*[a.val for a in (self,) + args if isinstance(a, AutoDiff)])
+        if dtype.kind == 'f' and new_val.dtype != dtype:
+            new_val = new_val.astype(dtype)
+        cls = type(self) if new_val.ndim == np.ndim(self.val) else AutoDiff
+        obj = cls.__new__(cls)
+        obj.val = new_val
+        return lazy.defer(obj, method, self, *args)
+
+    deferrable.__name__ = name
+    deferrable.__doc__ = method.__doc__
+    return deferrable
+
+
+def _deferrable_inplace(name):
+    '''
+        Internal function wrapping the in-place operator name of AutoDiff so that in lazy
+        mode it defers like the matching operator, the operands being self as it was
+        before the update and other
+    '''
+    method = getattr(AutoDiff, name)
+    operator_name = _INPLACE[name]
+
+    def deferrable(self, other):
+        if not lazy._active:
+            return method(self, other)
+        before = type(self).__new__(type(self))
+        before.__dict__.update(self.__dict__)
+        result = getattr(before, operator_name)(other)
+        self.__dict__.clear()
+        self.__dict__.update(result.__dict__)
+        lazy.track(self)
+        return self
+
+    deferrable.__name__ = name
+    deferrable.__doc__ = method.__doc__
+    return deferrable
+
+
+def _use_workspace(active):
+    '''
+        Internal function installing the pooled ufuncs and the recycling of deleted
+        objects while a Workspace is active, and removing them after, see
+        workspace._hooks
+    '''
+    for name, ufunc in _UFUNCS.items():
+        setattr(_ufuncs, name, _pooled(ufunc) if active else _OPERATORS.get(ufunc, ufunc))
+    if active:
+        # Returns the val and der buffers of deleted objects to the active workspace
+        AutoDiff.__del__ = workspace.recycle
+    elif '__del__' in AutoDiff.__dict__:
+        del AutoDiff.__del__
+
+
+_use_workspace(bool(workspace._active))
+workspace._hooks.append(_use_workspace)
+
+# Eager operators, and the wrappers that replace them while a lazy block is active
+_EAGER = {_name: AutoDiff.__dict__[_name] for _name in list(_VALUES) + list(_INPLACE)}
+_DEFERRABLE = dict([(_name, _deferrable(_name)) for _name in _VALUES] +
+                   [(_name, _deferrable_inplace(_name)) for _name in _INPLACE])
+
+
+def _deferred_der(self, name):
+    """
+    returns der of an object created in lazy mode (see autodiff.lazy), computed on
+    first access, raises AttributeError for other missing attributes
+
+    """
+    if name == 'der' and '_thunk' in self.__dict__:
+        lazy.resolve(self)
+        return self.der
+    raise AttributeError("'{}' object has no attribute '{}'".format(type(self).__name__, name))
+
+
+def _use_lazy(active):
+    '''
+        Internal function installing the deferring wrappers of the operators and
+        elementary functions while a LazyDerivatives block is active, and the eager
+        operators after. AutoDiff.__getattr__, which computes deferred derivatives,
+        stays until none is left, as it slows down every attribute read. See lazy._hooks
+    '''
+    for name, method in (_DEFERRABLE if active else _EAGER).items():
+        setattr(AutoDiff, name, method)
+    if active or lazy._pending:
+        AutoDiff.__getattr__ = _deferred_der
+    elif '__getattr__' in AutoDiff.__dict__:
+        del AutoDiff.__getattr__
+
+
+_use_lazy(bool(lazy._active))
+lazy._hooks.append(_use_lazy)
 
 # if __name__ == "__main__":
     #Demo
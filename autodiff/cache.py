@@ -0,0 +1,201 @@
+import numpy as np
+from collections import OrderedDict, namedtuple
+from autodiff.autodiff import AutoDiff
+from autodiff.reverse import gradient as reverse_gradient
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+def _array_key(value):
+    '''
+        Internal function returning a hashable key for the exact contents of an array
+        or scalar, or None if it is not numeric
+    '''
+    try:
+        array = np.asarray(value)
+    except (TypeError, ValueError):
+        return None
+    if(array.dtype.kind not in 'biuf'):
+        return None
+    return (array.dtype.str, array.shape, array.tobytes())
+
+
+class _SeedKey():
+    """
+    Key for the derivative seeds of an input, holding the seed array itself. It hashes
+    only the dtype and shape, and compares equal to the key of the same array at once
+    or of another array w/ the same contents, so the solvers, which pass the same
+    seeds at every point, pay O(1) for them instead of hashing an n x n matrix.
+
+    """
+
+    def __init__(self, der):
+        self.der = der
+        self._hash = hash((der.dtype.str, der.shape))
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        return self.der is other.der or (
+            self.der.dtype == other.der.dtype and np.array_equal(self.der, other.der))
+
+
+def _seed_key(der):
+    '''
+        Internal function returning a _SeedKey for a dense numeric derivative, or None
+        if it cannot be keyed, e.g. sparse derivatives
+    '''
+    if(not isinstance(der, np.ndarray) or der.dtype.kind not in 'biuf'):
+        return None
+    return _SeedKey(der)
+
+
+def _input_key(x):
+    '''
+        Internal function returning a hashable key for an input, an AutoDiff object, an
+        ADVector or a list of either, covering its type, values and derivative seeds.
+        Returns None for inputs that cannot be keyed, e.g. sparse derivatives.
+    '''
+    if(isinstance(x, AutoDiff)):
+        parts = [(x.val, x.der)]
+    elif(isinstance(x, (list, tuple, np.ndarray))):
+        parts = [(v.val, v.der) if isinstance(v, AutoDiff) else (v, None) for v in x]
+    else:
+        parts = [(x, None)]
+
+    # Values first, so that keys of other points differ before seeds are compared
+    key = [type(x)]
+    for value, _ in parts:
+        value_key = _array_key(value)
+        if(value_key is None):
+            return None
+        key.append(value_key)
+    for _, der in parts:
+        if(der is None):
+            continue
+        der_key = _seed_key(der)
+        if(der_key is None):
+            return None
+        key.append(der_key)
+    return tuple(key)
+
+
+class CachedFunction():
+    """
+    Wrapper memoizing the outputs of a function at the points it is evaluated at, w/
+    least recently used eviction. Solvers evaluate the same point more than once, e.g.
+    BFGS at the end of one iteration and the start of the next, and only the first
+    evaluation reaches the function.
+
+    Attributes:
+
+    func: wrapped function
+    maxsize: maximum number of outputs kept
+    hits: number of calls answered from the cache
+    misses: number of calls that evaluated func
+
+    NOTE:
+      Inputs are keyed on the exact bytes of their values and the contents of their
+      derivative seeds, so a point that differs in the last bit is a miss. Seeds are
+      kept by reference and must not be modified in place while cached, nor must
+      cached outputs, which are shared between hits.
+
+    """
+
+    def __init__(self, func, maxsize=128):
+        """
+        Initializes CachedFunction object wrapping func, keeping at most maxsize outputs
+
+        """
+        if(maxsize < 1):
+            raise ValueError("maxsize must be at least 1")
+        self.func = func
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._outputs = OrderedDict()
+        self.__doc__ = getattr(func, '__doc__', None)
+
+    def _lookup(self, key, compute):
+        '''
+            Internal function returning the cached value for key, or computing and
+            storing it w/ compute. Keys of None are never cached.
+        '''
+        if(key is None):
+            return compute()
+        if(key in self._outputs):
+            self.hits += 1
+            self._outputs.move_to_end(key)
+            return self._outputs[key]
+        self.misses += 1
+        value = compute()
+        self._outputs[key] = value
+        if(len(self._outputs) > self.maxsize):
+            self._outputs.popitem(last=False)
+        return value
+
+    def __call__(self, x):
+        """
+        inputs: x: ADVector, list of AutoDiff objects or AutoDiff object
+        returns output of the wrapped function at x, cached for later calls at the same
+        values and seeds
+
+        """
+        return self._lookup(_input_key(x), lambda: self.func(x))
+
+    def gradient(self, values):
+        """
+        inputs: values: list or np.ndarray of shape (n,)
+        returns gradient of the scalar wrapped function at values in reverse mode,
+        cached for later calls at the same values
+
+        """
+        values = np.asarray(values, dtype=float)
+
+        def compute():
+            if(hasattr(self.func, 'gradient')):
+                return self.func.gradient(values)
+            return reverse_gradient(self.func, values)[1]
+        return self._lookup(('gradient', _array_key(values)), compute)
+
+    def cache_info(self):
+        """
+        returns CacheInfo named tuple of the hits, misses, maxsize and current size
+
+        """
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._outputs))
+
+    def cache_clear(self):
+        """
+        drops every cached output and resets the statistics
+
+        """
+        self._outputs.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+def cached_function(func, maxsize=128):
+    '''
+        Wraps func so that repeated evaluations at the same point are answered from a
+        bounded least recently used cache. Can be used as a decorator. A func that is
+        already a CachedFunction is returned as is, so its statistics cover every
+        solver it is passed to.
+
+        INPUTS:
+          func: callable
+                function taking an ADVector (or list of AutoDiff objects) and returning
+                an AutoDiff object or a list of AutoDiff objects
+
+          maxsize: int, optional (default = 128)
+                   maximum number of outputs kept
+
+        OUTPUTS:
+          cached: CachedFunction
+                  callable accepted by the solvers in place of func, whose cache_info()
+                  reports hits and misses
+    '''
+    if(isinstance(func, CachedFunction)):
+        return func
+    return CachedFunction(func, maxsize)
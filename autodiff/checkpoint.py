@@ -0,0 +1,183 @@
+import numpy as np
+from math import factorial
+from autodiff.reverse import Tape, ReverseAutoDiff
+
+
+def _beta(snaps, reps):
+    '''
+        Internal function returning the longest chain of steps that binomial
+        checkpointing reverses w/ snaps stored states and at most reps recomputations
+        of any step
+    '''
+    return factorial(snaps + reps) // (factorial(snaps) * factorial(reps))
+
+
+def _split(length, snaps):
+    '''
+        Internal function returning the distance from the start of a chain of length
+        steps at which binomial checkpointing stores the next state, so that the
+        number of recomputed steps is minimal for snaps stored states
+    '''
+    reps = 0
+    while(_beta(snaps, reps) < length):
+        reps += 1
+    distance = max(1, length - _beta(snaps - 1, reps))
+    return min(distance, _beta(snaps, reps - 1), length - 1)
+
+
+def _call(func, state, params):
+    '''
+        Internal function evaluating func on new tape variables. Returns the tape, the
+        state and parameter variables and the output of func.
+    '''
+    tape = Tape()
+    x = [tape.variable(v) for v in state]
+    if(params is None):
+        return tape, x, None, func(x)
+    p = [tape.variable(v) for v in params]
+    return tape, x, p, func(x, p)
+
+
+def _values(output):
+    '''
+        Internal function returning the values of a step output as a float array
+    '''
+    return np.array([getattr(o, 'val', o) for o in output], dtype=float)
+
+
+def _adjoints(variables):
+    '''
+        Internal function returning the adjoints of tape variables, 0 for variables the
+        output does not depend on
+    '''
+    return np.array([0. if v.adjoint is None else v.adjoint for v in variables],
+                    dtype=float)
+
+
+def checkpointed_gradient(step, loss, x0, n_steps, params=None, checkpoints=None,
+                          memory=None):
+    '''
+        Computes the gradient of loss(step(...step(x0)...)), w/ step applied n_steps
+        times, in reverse mode w/ binomial checkpointing. Only a bounded number of
+        intermediate states is stored, the states in between are recomputed during the
+        backward sweep, and only one step is recorded on a tape at a time, so memory
+        does not grow w/ n_steps.
+
+        INPUTS:
+          step: callable
+                function taking the state, a list of ReverseAutoDiff objects, (and the
+                list of parameters if params is given) and returning the next state as a
+                list of the same length, e.g. lambda x: [x[0] + 0.1 * x[1], x[1] - 0.1 * x[0]]
+
+          loss: callable
+                function taking the final state (and the parameters if params is
+                given) and returning a scalar ReverseAutoDiff object
+
+          x0: list or np.ndarray of shape (n,)
+              initial state
+
+          n_steps: int
+                   number of times step is applied
+
+          params: list or np.ndarray of shape (p,), optional (default = None)
+                  parameters shared by every step and the loss
+
+          checkpoints: int, optional (default = None)
+                       number of intermediate states stored at any time. If None, it is
+                       set from memory, or to about sqrt(n_steps) if memory is None too
+
+          memory: int, optional (default = None)
+                  memory budget in bytes for the stored states, used when checkpoints
+                  is None
+
+        OUTPUTS:
+          val: scalar
+               value of the loss
+
+          grad: np.ndarray of shape (n,)
+                gradient of the loss w/ respect to x0
+
+          param_grad: np.ndarray of shape (p,)
+                      gradient of the loss w/ respect to params, only returned when
+                      params is given
+
+        NOTE:
+          With c checkpoints every step is recomputed at most r times, for the smallest
+          r such that binomial(c + r, c) >= n_steps. step must not depend on anything
+          but its arguments, since it is evaluated several times per step.
+    '''
+    x0 = np.array(getattr(x0, 'val', x0), dtype=float)
+    if(params is not None):
+        params = np.array(params, dtype=float)
+    if(n_steps < 0):
+        raise ValueError("n_steps must be non-negative")
+
+    if(checkpoints is None):
+        if(memory is None):
+            checkpoints = int(np.sqrt(n_steps))
+        else:
+            checkpoints = int(memory // max(x0.nbytes, 1))
+    if(checkpoints < 0):
+        raise ValueError("checkpoints must be non-negative")
+
+    param_grad = np.zeros(0 if params is None else len(params))
+
+    def advance(state, steps):
+        for _ in range(steps):
+            state = _values(_call(step, state, params)[3])
+        return state
+
+    def step_vjp(state, adjoint):
+        tape, x, p, output = _call(step, state, params)
+        total = 0.
+        for a, o in zip(adjoint, output):
+            if(a != 0 and isinstance(o, ReverseAutoDiff) and o.tape is tape):
+                total = total + a * o
+        if(not isinstance(total, ReverseAutoDiff)):
+            return np.zeros(len(state))
+        tape.backward(total)
+        if(p is not None):
+            param_grad[:] += _adjoints(p)
+        return _adjoints(x)
+
+    def reverse_segment(state, length, adjoint, snaps):
+        # Reverses a segment short enough to store every state, or w/ no snaps left,
+        # in which case each state is recomputed from the start of the segment
+        if(snaps >= length - 1):
+            states = [state]
+            for _ in range(length - 1):
+                states.append(advance(states[-1], 1))
+            for s in reversed(states):
+                adjoint = step_vjp(s, adjoint)
+        else:
+            for i in range(length - 1, -1, -1):
+                adjoint = step_vjp(advance(state, i), adjoint)
+        return adjoint
+
+    # Forward sweep to the final state, then seed the backward sweep w/ the loss
+    tape, x, p, output = _call(loss, advance(x0, n_steps), params)
+    if(not isinstance(output, ReverseAutoDiff) or output.tape is not tape):
+        val, adjoint = getattr(output, 'val', output), np.zeros(len(x0))
+    else:
+        tape.backward(output)
+        val, adjoint = output.val, _adjoints(x)
+        if(p is not None):
+            param_grad += _adjoints(p)
+
+    # Segments (start state, length, snaps) still to reverse. The segment on top ends
+    # where the adjoint currently is, and splitting it stores the state at the split
+    segments = [(x0, n_steps, checkpoints)]
+    while(segments):
+        state, length, snaps = segments.pop()
+        if(length == 0):
+            continue
+        if(snaps == 0 or snaps >= length - 1):
+            adjoint = reverse_segment(state, length, adjoint, snaps)
+            continue
+        distance = _split(length, snaps)
+        segments.append((state, distance, snaps))
+        segments.append((advance(state, distance), length - distance, snaps - 1))
+    grad = adjoint
+    if(params is None):
+        return val, grad
+    return val, grad, param_grad
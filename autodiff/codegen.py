@@ -0,0 +1,353 @@
+import os
+import sys
+import types
+import hashlib
+import numpy as np
+from autodiff.tracing import CompiledFunction
+from autodiff.primitives import Primitive, _REGISTRY
+
+# Bumped whenever the generated source changes, so that stale cache files are ignored
+_CODEGEN_VERSION = 2
+
+# Environment variable overriding the default cache directory
+CACHE_ENV = 'AUTODIFF_CACHE_DIR'
+
+# Source template for the value of each operation, {0}, {1} are the arguments
+_VALUES = {'add': '{0} + {1}', 'sub': '{0} - {1}', 'mul': '{0} * {1}', 'div': '{0} / {1}',
+           'pow': '{0} ** {1}', 'log': 'np.log({0}) / np.log({1})', 'neg': '- {0}',
+           'sin': 'np.sin({0})', 'cos': 'np.cos({0})', 'tan': 'np.tan({0})',
+           'arcsine': 'np.arcsin({0})', 'arccosine': 'np.arccos({0})',
+           'arctangent': 'np.arctan({0})', 'sinh': 'np.sinh({0})', 'cosh': 'np.cosh({0})',
+           'tanh': 'np.tanh({0})', 'ln': 'np.log({0})', 'exp': 'np.exp({0})',
+           'logistic': '1 / (1 + np.exp(- {0}))', 'sqrt': 'np.sqrt({0})',
+           'affine': '{0} * {scale} + {shift}'}
+
+# Source template for the derivative of each operation w/ respect to each argument,
+# {f} is the result
+_PARTIALS = {'add': ('1', '1'), 'sub': ('1', '-1'), 'mul': ('{1}', '{0}'),
+             'div': ('1 / {1}', '- {f} / {1}'),
+             'pow': ('{1} * {0} ** ({1} - 1)', '{f} * np.log({0})'),
+             'log': ('1 / ({0} * np.log({1}))', '- {f} / ({1} * np.log({1}))'),
+             'neg': ('-1',), 'sin': ('np.cos({0})',), 'cos': ('- np.sin({0})',),
+             'tan': ('1 / np.cos({0}) ** 2',), 'arcsine': ('1 / np.sqrt(1 - {0} ** 2)',),
+             'arccosine': ('- 1 / np.sqrt(1 - {0} ** 2)',),
+             'arctangent': ('1 / (1 + {0} ** 2)',), 'sinh': ('np.cosh({0})',),
+             'cosh': ('np.sinh({0})',), 'tanh': ('1 - {f} ** 2',), 'ln': ('1 / {0}',),
+             'exp': ('{f}',), 'logistic': ('{f} * (1 - {f})',), 'sqrt': ('1 / (2 * {f})',),
+             'affine': ('{scale}',)}
+
+
+def _templates(op, n_args):
+    '''
+        Internal function returning the value template and partial templates of an
+        operation. Registered primitives are called through their registry entry.
+    '''
+    if(op in _VALUES):
+        return _VALUES[op], _PARTIALS[op]
+    args = ', '.join('{{{}}}'.format(k) for k in range(n_args))
+    value = '_primitive({!r}).func({})'.format(op, args)
+    partials = tuple('_primitive({!r}).partials({})[{}]'.format(op, args, k)
+                     for k in range(n_args))
+    return value, partials
+
+
+def _literal(value):
+    '''
+        Internal function returning source for a float constant that evaluates to the
+        same np.float64, including infinities and nan
+    '''
+    if(np.isfinite(value)):
+        return 'np.float64({!r})'.format(float(value))
+    return "np.float64('{}')".format(float(value))
+
+
+def generate_source(trace, name='value_and_jacobian'):
+    '''
+        Generates straight-line Python source computing the value and Jacobian of the
+        outputs of a trace, w/ one statement per operation and per adjoint update.
+
+        INPUTS:
+          trace: Trace object
+                 trace recorded by autodiff.tracing.trace_function
+
+          name: str, optional (default = 'value_and_jacobian')
+                name of the generated function
+
+        OUTPUTS:
+          source: str
+                  source of a module defining SCALAR_OUTPUT and the function name(x),
+                  which returns the same (val, jac) pair as trace.evaluate(x)
+    '''
+    nodes = trace.nodes
+    active, needed = trace.dependencies()
+
+    def params(i):
+        op, args, value = nodes[i]
+        names = ['v{}'.format(a) for a in args]
+        extra = {'f': 'v{}'.format(i)}
+        if(op == 'affine'):
+            extra.update(scale=_literal(value[0]), shift=_literal(value[1]))
+        return names, extra
+
+    lines = ['# Generated by autodiff.codegen, do not edit',
+             'import numpy as np']
+    primitives = sorted({op for op, _, _ in nodes if op not in _VALUES and
+                         op not in ('input', 'const')})
+    if(primitives):
+        lines.append('from autodiff.primitives import get_primitive as _primitive')
+    lines += ['',
+             'SCALAR_OUTPUT = {}'.format(trace.scalar_output),
+             'PRIMITIVES = {!r}'.format(tuple(primitives)), '', '',
+             'def {}(x):'.format(name)]
+
+    # Forward sweep
+    for i, (op, args, value) in enumerate(nodes):
+        if(op == 'input'):
+            lines.append('    v{} = x[{}]'.format(i, i))
+        elif(op == 'const' and needed[i]):
+            lines.append('    v{} = {}'.format(i, _literal(value)))
+        elif(needed[i]):
+            names, extra = params(i)
+            template = _templates(op, len(args))[0]
+            lines.append('    v{} = {}'.format(i, template.format(*names, **extra)))
+
+    lines.append('    val = np.array([{}], dtype=float)'.format(
+        ', '.join('v{}'.format(o) for o in trace.outputs)))
+    lines.append('    jac = np.zeros(({}, {}))'.format(len(trace.outputs), trace.n_inputs))
+
+    # One reverse sweep per output
+    for k, o in enumerate(trace.outputs):
+        if(not active[o]):
+            continue
+        _, reaches = trace.dependencies([o])
+        assigned = {o}
+        lines.append('    g{} = 1.'.format(o))
+        for i in range(o, -1, -1):
+            op, args, value = nodes[i]
+            if(not (active[i] and reaches[i]) or op == 'input' or i not in assigned):
+                continue
+            names, extra = params(i)
+            for template, a in zip(_templates(op, len(args))[1], args):
+                if(not active[a]):
+                    continue
+                partial = template.format(*names, **extra)
+                sign = '-' if partial == '-1' else '+'
+                if(partial in ('1', '-1')):
+                    term = 'g{}'.format(i)
+                else:
+                    term = '({}) * g{}'.format(partial, i)
+                if(a in assigned):
+                    lines.append('    g{} = g{} {} {}'.format(a, a, sign, term))
+                else:
+                    lines.append('    g{} = {}{}'.format(a, '- ' if sign == '-' else '', term))
+                    assigned.add(a)
+        for i in range(trace.n_inputs):
+            if(i in assigned):
+                lines.append('    jac[{}, {}] = g{}'.format(k, i, i))
+
+    lines.append('    return val, jac')
+    return '\n'.join(lines) + '\n'
+
+
+class GeneratedCode():
+    """
+    Generated value and Jacobian function, used in place of a compiled Trace
+
+    Attributes:
+
+    source: str, generated module source
+    scalar_output: True if the traced function returned a single value
+    function: callable computing (val, jac) from an np.ndarray of input values
+
+    """
+
+    def __init__(self, source, name='value_and_jacobian'):
+        """
+        Initializes GeneratedCode object by executing the generated source, raises
+        ValueError if it calls primitives that are not registered
+
+        """
+        namespace = {}
+        exec(compile(source, '<autodiff.codegen>', 'exec'), namespace)
+        # Primitives are looked up by name on each call, e.g. code loaded from the cache
+        # by a process that has not registered them yet
+        missing = [p for p in namespace['PRIMITIVES'] if p not in _REGISTRY]
+        if(missing):
+            raise ValueError("Generated code calls primitives that are not registered: "
+                             "{}. Register them before using it".format(', '.join(missing)))
+        self.source = source
+        self.scalar_output = namespace['SCALAR_OUTPUT']
+        self.function = namespace[name]
+
+    def evaluate(self, values):
+        """
+        inputs: values: np.ndarray of shape (n_inputs,)
+        returns the values of the outputs, np.ndarray of shape (m,), and their
+        Jacobian, np.ndarray of shape (m, n_inputs)
+
+        """
+        return self.function(np.asarray(values, dtype=float))
+
+
+def cache_dir():
+    '''
+        Returns the directory holding generated source, $AUTODIFF_CACHE_DIR if set,
+        else ~/.cache/autodiff
+    '''
+    default = os.path.join(os.path.expanduser('~'), '.cache', 'autodiff')
+    return os.environ.get(CACHE_ENV, default)
+
+
+def _describe(value, seen):
+    '''
+        Internal function returning a string that changes whenever the behaviour of a
+        function could change: its bytecode, constants, defaults, closure values and
+        the values of the globals it reads. Objects without a stable description fall
+        back to their repr, which at worst makes the cache miss.
+    '''
+    if(isinstance(value, types.CodeType)):
+        return '|'.join([value.co_code.hex(), repr(value.co_names),
+                         ','.join(_describe(c, seen) for c in value.co_consts)])
+    if(isinstance(value, types.FunctionType)):
+        if(id(value) in seen):
+            return value.__qualname__
+        seen.add(id(value))
+        closure = [c.cell_contents for c in (value.__closure__ or ())]
+        referenced = [value.__globals__.get(n) for n in value.__code__.co_names
+                      if n in value.__globals__]
+        return '|'.join([value.__qualname__, _describe(value.__code__, seen),
+                         _describe(value.__defaults__, seen), _describe(closure, seen),
+                         _describe(referenced, seen)])
+    if(isinstance(value, np.ndarray)):
+        return '{}{}{}'.format(value.dtype, value.shape, value.tobytes().hex())
+    if(isinstance(value, (list, tuple))):
+        return '({})'.format(','.join(_describe(v, seen) for v in value))
+    if(isinstance(value, Primitive)):
+        return _describe([value.name, value.func, value.derivative, value.jvp, value.vjp],
+                         seen)
+    if(isinstance(value, types.ModuleType)):
+        return value.__name__
+    if(isinstance(value, type)):
+        return '{}.{}'.format(value.__module__, value.__qualname__)
+    return repr(value)
+
+
+def function_key(func, signature, optimize=True):
+    '''
+        Returns the hex digest identifying generated code for func at an input signature
+
+        INPUTS:
+          func: callable
+          signature: input signature, ('vector', n) or ('scalar', 1)
+          optimize: boolean, True if the graph passes are run before generating code
+    '''
+    parts = [_describe(func, set()), repr(signature), repr(optimize),
+             repr(_CODEGEN_VERSION), sys.version]
+    return hashlib.sha256('\n'.join(parts).encode()).hexdigest()
+
+
+class GeneratedFunction(CompiledFunction):
+    """
+    CompiledFunction that replays generated straight-line source instead of the trace.
+    Source is cached on disk keyed by a hash of the function's bytecode and input
+    signature, so later processes load it without tracing the function.
+
+    Attributes:
+
+    cache: str or None, directory of the on-disk cache, or None to keep the generated
+           code in memory only
+
+    """
+
+    def __init__(self, func, optimize=True, cache=True):
+        """
+        Initializes GeneratedFunction object wrapping func. If cache is True the
+        directory given by cache_dir() is used, if a str it is the directory itself
+
+        """
+        super().__init__(func, optimize)
+        self.cache = cache_dir() if cache is True else (cache or None)
+
+    def _path(self, key):
+        '''
+            Internal function returning the cache file for an input signature
+        '''
+        return os.path.join(self.cache, function_key(self.func, key, self.optimize) + '.py')
+
+    def _load(self, key):
+        '''
+            Internal function returning cached generated code for key, or None on a miss
+        '''
+        if(self.cache is None):
+            return None
+        try:
+            with open(self._path(key)) as f:
+                return GeneratedCode(f.read())
+        except (OSError, SyntaxError, KeyError):
+            return None
+
+    def _store(self, key, code):
+        '''
+            Internal function writing generated code to the cache. The file is written
+            under a temporary name and renamed, so concurrent workers never read a
+            partial file. Failures to write only cost a later cache miss.
+        '''
+        if(self.cache is None):
+            return
+        path = self._path(key)
+        tmp = '{}.{}.tmp'.format(path, os.getpid())
+        try:
+            os.makedirs(self.cache, exist_ok=True)
+            with open(tmp, 'w') as f:
+                f.write(code.source)
+            os.replace(tmp, path)
+        except OSError:
+            pass
+
+    def trace_for(self, key):
+        """
+        inputs: key: input signature, ('vector', n) or ('scalar', 1)
+        returns GeneratedCode for key, loaded from the cache or generated from a new
+        trace, or None if the function must be evaluated eagerly
+
+        """
+        if(key not in self.traces):
+            code = self._load(key)
+            if(code is None):
+                trace = super().trace_for(key)
+                if(trace is not None):
+                    code = GeneratedCode(generate_source(trace))
+                    self._store(key, code)
+            self.traces[key] = code
+        return self.traces[key]
+
+
+def generate_function(func, optimize=True, cache=True):
+    '''
+        Wraps func so that its value and gradient are computed by generated
+        straight-line source, cached on disk between processes. Can be used as a
+        decorator. See GeneratedFunction and autodiff.tracing.compile_function.
+
+        INPUTS:
+          func: callable
+                function taking an ADVector (or list of AutoDiff objects) and returning
+                an AutoDiff object or a list of AutoDiff objects
+
+          optimize: boolean, optional (default = True)
+                    If True, the graph passes run on the trace before generating code
+
+          cache: boolean or str, optional (default = True)
+                 If True, generated source is cached in cache_dir(), which can be set
+                 w/ the AUTODIFF_CACHE_DIR environment variable. A str is used as the
+                 cache directory, False disables the on-disk cache
+
+        OUTPUTS:
+          generated: GeneratedFunction
+                     callable accepted by the solvers in place of func
+
+        NOTE:
+          The cache key covers the bytecode of func and of the functions it calls,
+          and the values of its defaults, closure variables and the globals it reads.
+          State reached any other way, e.g. attributes of objects, is not part of the key.
+    '''
+    return GeneratedFunction(func, optimize, cache)
@@ -0,0 +1,387 @@
+import numpy as np
+from autodiff.autodiff import AutoDiff, get_default_dtype
+from autodiff.advector import ADVector
+from autodiff.hyperdual import HyperDual
+from autodiff.reverse import Tape
+from autodiff.taylor import Taylor
+
+# Memory budget in bytes for one chunk of seed directions
+_CHUNK_BYTES = 2**22
+
+
+def _default_chunk_size(n, itemsize=8):
+    '''
+        Internal function choosing the number of seed directions per pass so that the
+        (n, k) seed block of the inputs stays within _CHUNK_BYTES
+    '''
+    return int(min(n, max(1, _CHUNK_BYTES // (itemsize * n))))
+
+
+def _seed_dtype(dtype):
+    '''
+        Internal function returning the floating point type of seeded inputs, dtype if
+        given, else the default AutoDiff dtype, else float64
+    '''
+    if(dtype is None):
+        dtype = get_default_dtype()
+    return np.dtype(np.float64 if dtype is None else dtype)
+
+
+def _value_and_der(output, k, dtype=float):
+    '''
+        Internal function returning the value and derivative block of a function
+        output, which is an AutoDiff object, an ADVector or a list of either
+    '''
+    if(isinstance(output, AutoDiff)):
+        return output.val, output.der
+    if(isinstance(output, (list, tuple, np.ndarray))):
+        vals = [getattr(o, 'val', o) for o in output]
+        ders = [o.der if isinstance(o, AutoDiff) else np.zeros(k, dtype) for o in output]
+        return np.array(vals, dtype=dtype), np.array(ders, dtype=dtype)
+    return output, np.zeros(np.shape(output) + (k,), dtype)
+
+
+def batch_variables(points, dtype=None):
+    '''
+        Seeds AutoDiff inputs that evaluate a function at many points at once.
+
+        INPUTS:
+          points: np.ndarray of shape (batch, n)
+                  one row per point, one column per input
+
+          dtype: floating point type, optional (default = None)
+                 type of the values and derivatives, the default AutoDiff dtype or
+                 float64 if None
+
+        OUTPUTS:
+          inputs: list of n AutoDiff objects
+                  input j has val of shape (batch,) holding column j of points and
+                  der of shape (batch, n) holding the j-th unit vector in every row
+    '''
+    dtype = _seed_dtype(dtype)
+    points = np.asarray(points, dtype=dtype)
+    if(points.ndim != 2):
+        raise ValueError("points must have shape (batch, n)")
+
+    batch, n = points.shape
+    inputs = []
+    for j in range(n):
+        der = np.zeros((batch, n), dtype)
+        der[:, j] = 1.
+        inputs.append(AutoDiff(points[:, j], der, dtype))
+    return inputs
+
+
+def batch_gradient(func, points, dtype=None):
+    '''
+        Evaluates a scalar function and its gradient at many points with a single
+        trace of func, every operation acting on the whole batch at once.
+
+        INPUTS:
+          func: callable
+                function taking a list of AutoDiff objects and returning an AutoDiff
+                object, e.g. lambda x: x[0]**2 + x[1].sin()
+
+          points: np.ndarray of shape (batch, n)
+                  one row per point, one column per input
+
+          dtype: floating point type, optional (default = None)
+                 type of the computation and results, the default AutoDiff dtype or
+                 float64 if None
+
+        OUTPUTS:
+          val: np.ndarray of shape (batch,)
+               value of func at each point
+
+          grad: np.ndarray of shape (batch, n)
+                gradient of func at each point
+
+        NOTE:
+          func must not branch on the value of its inputs, since comparisons return
+          one boolean per point.
+    '''
+    dtype = _seed_dtype(dtype)
+    points = np.asarray(points, dtype=dtype)
+    output = func(batch_variables(points, dtype))
+
+    # Function does not depend on its inputs
+    if(not isinstance(output, AutoDiff)):
+        return np.broadcast_to(output, points.shape[:1]).astype(dtype), \
+            np.zeros(points.shape, dtype)
+
+    val = np.broadcast_to(output.val, points.shape[:1])
+    grad = np.broadcast_to(output.der, points.shape)
+    return np.array(val, dtype=dtype), np.array(grad, dtype=dtype)
+
+
+def value_and_jacobian(func, x, chunk_size=None, dtype=None):
+    '''
+        Computes the value and Jacobian of a function in forward mode, seeding the
+        inputs with chunk_size directions per pass. Peak memory is proportional to
+        chunk_size instead of the number of inputs.
+
+        INPUTS:
+          func: callable
+                function taking an ADVector and returning an AutoDiff object, an
+                ADVector or a list of AutoDiff objects
+
+          x: list, np.ndarray or ADVector
+             point at which to evaluate the function
+
+          chunk_size: int, optional (default = None)
+                      number of seed directions per pass. If None, it is chosen so
+                      that the seed block of the inputs stays within a fixed memory
+                      budget
+
+          dtype: floating point type, optional (default = None)
+                 type of the seeds and the Jacobian, e.g. np.float32 to halve memory.
+                 The default AutoDiff dtype or float64 if None
+
+        OUTPUTS:
+          val: scalar or np.ndarray of shape (m,)
+               value of func at x
+
+          jac: np.ndarray of shape (n,) for scalar functions, (m, n) otherwise
+               derivative of each output with respect to each input
+    '''
+    dtype = _seed_dtype(dtype)
+    x = np.array(getattr(x, 'val', x), dtype=dtype)
+    n = len(x)
+    k = _default_chunk_size(n, dtype.itemsize) if chunk_size is None else int(chunk_size)
+    if(k < 1):
+        raise ValueError("chunk_size must be at least 1")
+
+    jac = None
+    for start in range(0, n, k):
+        stop = min(start + k, n)
+
+        # Seed inputs start..stop-1 with the unit directions of this chunk
+        seed = np.zeros((n, stop - start), dtype)
+        seed[start:stop] = np.eye(stop - start)
+        val, block = _value_and_der(func(ADVector(x, seed, dtype)), stop - start, dtype)
+
+        if(jac is None):
+            jac = np.zeros(np.shape(val) + (n,), dtype)
+        jac[..., start:stop] = block
+
+    return val, jac
+
+
+def jacobian(func, x, chunk_size=None, dtype=None):
+    '''
+        Computes the Jacobian of a function in forward mode, chunk_size seed
+        directions per pass. See value_and_jacobian.
+
+        INPUTS:
+          func: callable
+                function taking an ADVector and returning an AutoDiff object, an
+                ADVector or a list of AutoDiff objects
+
+          x: list, np.ndarray or ADVector
+             point at which to evaluate the Jacobian
+
+          chunk_size: int, optional (default = None)
+                      number of seed directions per pass, chosen automatically if None
+
+          dtype: floating point type, optional (default = None)
+                 type of the seeds and the Jacobian, float64 unless set
+
+        OUTPUTS:
+          jac: np.ndarray of shape (n,) for scalar functions, (m, n) otherwise
+    '''
+    return value_and_jacobian(func, x, chunk_size, dtype)[1]
+
+
+def _hyperdual_parts(output, size):
+    '''
+        Internal function returning the value, e1 and e1e2 parts of a function output,
+        broadcast to size pairs. Outputs that are not HyperDual objects are constants.
+    '''
+    if(not isinstance(output, HyperDual)):
+        return output, np.zeros(size), np.zeros(size)
+    return output.val, np.broadcast_to(output.eps1, size), np.broadcast_to(output.eps12, size)
+
+
+def value_gradient_hessian(func, x, vectorized=True):
+    '''
+        Computes the value, gradient and exact Hessian of a scalar function with
+        hyper-dual numbers. Input i is seeded along e1 and input j along e2 for every
+        pair i <= j of the upper triangle.
+
+        INPUTS:
+          func: callable
+                function taking a list of HyperDual objects and returning a HyperDual
+                object
+
+          x: list, np.ndarray or ADVector
+             point at which to evaluate the function
+
+          vectorized: boolean, optional (default = True)
+                      If True, all n(n+1)/2 pairs are carried as arrays through a single
+                      evaluation of func. If False, func is evaluated once per pair with
+                      scalar parts, which needs less memory for large n
+
+        OUTPUTS:
+          val: scalar
+               value of func at x
+
+          grad: np.ndarray of shape (n,)
+                gradient of func at x
+
+          hess: np.ndarray of shape (n, n)
+                Hessian of func at x
+    '''
+    x = np.array(getattr(x, 'val', x), dtype=float)
+    n = len(x)
+    rows, cols = np.triu_indices(n)
+
+    if(vectorized):
+        inputs = [HyperDual(x[k], (rows == k).astype(float), (cols == k).astype(float))
+                  for k in range(n)]
+        val, eps1, eps12 = _hyperdual_parts(func(inputs), len(rows))
+    else:
+        eps1 = np.zeros(len(rows))
+        eps12 = np.zeros(len(rows))
+        for p in range(len(rows)):
+            inputs = [HyperDual(x[k], float(rows[p] == k), float(cols[p] == k))
+                      for k in range(n)]
+            val, e1, e12 = _hyperdual_parts(func(inputs), 1)
+            eps1[p] = e1[0]
+            eps12[p] = e12[0]
+
+    hess = np.zeros((n, n))
+    hess[rows, cols] = eps12
+    hess[cols, rows] = eps12
+
+    # Pairs (i, i) carry the first derivative with respect to input i
+    diag = rows == cols
+    grad = np.zeros(n)
+    grad[rows[diag]] = eps1[diag]
+    return val, grad, hess
+
+
+def hessian(func, x, vectorized=True):
+    '''
+        Computes the exact Hessian of a scalar function with hyper-dual numbers.
+        See value_gradient_hessian.
+
+        INPUTS:
+          func: callable
+                function taking a list of HyperDual objects and returning a HyperDual
+                object
+
+          x: list, np.ndarray or ADVector
+             point at which to evaluate the Hessian
+
+          vectorized: boolean, optional (default = True)
+                      If True, the whole upper triangle is filled in one evaluation
+
+        OUTPUTS:
+          hess: np.ndarray of shape (n, n)
+    '''
+    return value_gradient_hessian(func, x, vectorized)[2]
+
+
+def gradient_and_hvp(func, x, v):
+    '''
+        Computes the value, gradient and Hessian-vector product H v of a scalar function
+        in forward-over-reverse mode, without forming the Hessian. The tape records
+        values that are dual numbers x + v e1, so one reverse sweep returns the gradient
+        in the value parts of the adjoints and H v in their e1 parts. The cost is a small
+        constant multiple of one reverse-mode gradient and memory is O(n).
+
+        INPUTS:
+          func: callable
+                function taking a list of ReverseAutoDiff objects and returning a
+                ReverseAutoDiff object
+
+          x: list, np.ndarray or ADVector
+             point at which to evaluate the function
+
+          v: list or np.ndarray
+             direction multiplied by the Hessian
+
+        OUTPUTS:
+          val: scalar
+               value of func at x
+
+          grad: np.ndarray of shape (n,)
+                gradient of func at x
+
+          hv: np.ndarray of shape (n,)
+              product of the Hessian of func at x with v
+    '''
+    x = np.array(getattr(x, 'val', x), dtype=float)
+    v = np.asarray(v, dtype=float)
+    if(v.shape != x.shape):
+        raise ValueError("v must have the same shape as x")
+
+    tape = Tape()
+    inputs = [tape.variable(HyperDual(x[k], v[k])) for k in range(len(x))]
+    output = func(inputs)
+
+    # Function does not depend on its inputs
+    if(getattr(output, 'tape', None) is not tape):
+        return getattr(output, 'val', output), np.zeros(len(x)), np.zeros(len(x))
+
+    tape.backward(output)
+    adjoints = [0. if i.adjoint is None else i.adjoint for i in inputs]
+    grad = np.array([getattr(a, 'val', a) for a in adjoints], dtype=float)
+    hv = np.array([getattr(a, 'eps1', 0.) for a in adjoints], dtype=float)
+    return getattr(output.val, 'val', output.val), grad, hv
+
+
+def hvp(func, x, v):
+    '''
+        Computes the Hessian-vector product H v of a scalar function without forming the
+        Hessian. See gradient_and_hvp.
+
+        INPUTS:
+          func: callable
+                function taking a list of ReverseAutoDiff objects and returning a
+                ReverseAutoDiff object
+
+          x: list, np.ndarray or ADVector
+             point at which to evaluate the Hessian
+
+          v: list or np.ndarray
+             direction multiplied by the Hessian
+
+        OUTPUTS:
+          hv: np.ndarray of shape (n,)
+    '''
+    return gradient_and_hvp(func, x, v)[2]
+
+
+def taylor_derivatives(func, x, order):
+    '''
+        Computes the derivatives of a scalar univariate function up to a given order in
+        one pass of truncated Taylor arithmetic.
+
+        INPUTS:
+          func: callable
+                function taking a Taylor object and returning a Taylor object,
+                e.g. lambda x: x.sin() * x.exp()
+
+          x: scalar
+             point at which to evaluate the derivatives
+
+          order: int
+                 highest derivative order K
+
+        OUTPUTS:
+          ders: np.ndarray of shape (K + 1,)
+                f(x), f'(x), ..., f^(K)(x)
+    '''
+    if(order < 0):
+        raise ValueError("order must be non-negative")
+
+    output = func(Taylor.variable(x, order))
+
+    # Function does not depend on its input
+    if(not isinstance(output, Taylor)):
+        ders = np.zeros(order + 1)
+        ders[0] = output
+        return ders
+
+    return output.derivatives()
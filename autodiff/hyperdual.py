@@ -0,0 +1,382 @@
+import numpy as np
+
+
+class HyperDual():
+    """
+    Implementation of hyper-dual numbers, a + b e1 + c e2 + d e1e2 with
+    e1**2 = e2**2 = 0, for exact second derivatives. Seeding input i along e1 and
+    input j along e2 makes the e1e2 part of any function equal to the (i, j)
+    entry of its Hessian. Components may be arrays to evaluate many (i, j) pairs
+    in one pass.
+
+    Attributes:
+
+    val: value of custom function evaluated at x
+    eps1: first derivative along the e1 seed direction
+    eps2: first derivative along the e2 seed direction
+    eps12: second derivative along the e1 and e2 seed directions
+
+    """
+
+    def __init__(self, values, eps1=0., eps2=0., eps12=0.):
+        """
+        Initializes HyperDual object w/ value and derivative parts. Derivative parts
+        set to 0 initially.
+
+        """
+        if isinstance(values, str) or any(isinstance(e, str) for e in (eps1, eps2, eps12)):
+            raise TypeError("Cannot accept string values")
+
+        self.val = values
+        self.eps1 = eps1
+        self.eps2 = eps2
+        self.eps12 = eps12
+
+    def _chain(self, f, df, d2f):
+        """
+        inputs: f, df, d2f: value, first and second derivative of a scalar function at self.val
+        returns HyperDual object of the function applied to self
+
+        """
+        return HyperDual(f, df * self.eps1, df * self.eps2,
+                         df * self.eps12 + d2f * self.eps1 * self.eps2)
+
+    def __str__(self):
+        """
+        returns string value of the function
+
+        """
+        return "HyperDual({},{},{},{})".format(self.val, self.eps1, self.eps2, self.eps12)
+
+    def __repr__(self):
+        """
+        returns string value of the function
+
+        """
+        return "HyperDual({},{},{},{})".format(self.val, self.eps1, self.eps2, self.eps12)
+
+    """ Comparison operators """
+    def __eq__(self, other):
+        '''
+        inputs: self: HyperDual object, other: HyperDual object or scalar
+        returns boolean, True if value of self is equal to other else False
+        '''
+        try:
+            return self.val == other.val
+        except AttributeError:
+            return self.val == other
+
+    def __ne__(self, other):
+        '''
+        inputs: self: HyperDual object, other: HyperDual object or scalar
+        returns boolean, True if value of self is not equal to other else False
+        '''
+        try:
+            return self.val != other.val
+        except AttributeError:
+            return self.val != other
+
+    def __gt__(self, other):
+        '''
+        inputs: self: HyperDual object, other: HyperDual object or scalar
+        returns boolean, True if value of self is greater than other else False
+        '''
+        try:
+            return self.val > other.val
+        except AttributeError:
+            return self.val > other
+
+    def __ge__(self, other):
+        '''
+        inputs: self: HyperDual object, other: HyperDual object or scalar
+        returns boolean, True if value of self is greater than or equal to other else False
+        '''
+        try:
+            return self.val >= other.val
+        except AttributeError:
+            return self.val >= other
+
+    def __lt__(self, other):
+        '''
+        inputs: self: HyperDual object, other: HyperDual object or scalar
+        returns boolean, True if value of self is less than other else False
+        '''
+        try:
+            return self.val < other.val
+        except AttributeError:
+            return self.val < other
+
+    def __le__(self, other):
+        '''
+        inputs: self: HyperDual object, other: HyperDual object or scalar
+        returns boolean, True if value of self is less than or equal to other else False
+        '''
+        try:
+            return self.val <= other.val
+        except AttributeError:
+            return self.val <= other
+
+    """binary operators"""
+    def __add__(self, other):
+        """
+        inputs: self: HyperDual object, other: HyperDual object or scalar
+        returns HyperDual object of addition of two inputs in the form self + other
+
+        """
+        try:
+            return HyperDual(self.val + other.val, self.eps1 + other.eps1,
+                             self.eps2 + other.eps2, self.eps12 + other.eps12)
+        except AttributeError:
+            return HyperDual(self.val + other, self.eps1, self.eps2, self.eps12)
+
+    def __radd__(self, other):
+        """
+        inputs: self: HyperDual object, other: scalar
+        returns HyperDual object of addition of two inputs in the form other + self
+
+        """
+        return self.__add__(other)
+
+    def __sub__(self, other):
+        """
+        inputs: self: HyperDual object, other: HyperDual object or scalar
+        returns HyperDual object of subtraction of two inputs in the form self - other
+
+        """
+        try:
+            return HyperDual(self.val - other.val, self.eps1 - other.eps1,
+                             self.eps2 - other.eps2, self.eps12 - other.eps12)
+        except AttributeError:
+            return HyperDual(self.val - other, self.eps1, self.eps2, self.eps12)
+
+    def __rsub__(self, other):
+        """
+        inputs: self: HyperDual object, other: scalar
+        returns HyperDual object of subtraction of two inputs in the form other - self
+
+        """
+        return - self.__sub__(other)
+
+    def __mul__(self, other):
+        """
+        inputs: self: HyperDual object, other: HyperDual object or scalar
+        returns HyperDual object of multiplication of two inputs in the form self * other
+
+        """
+        try:
+            return HyperDual(self.val * other.val,
+                             self.val * other.eps1 + self.eps1 * other.val,
+                             self.val * other.eps2 + self.eps2 * other.val,
+                             self.val * other.eps12 + self.eps1 * other.eps2
+                             + self.eps2 * other.eps1 + self.eps12 * other.val)
+        except AttributeError:
+            return HyperDual(self.val * other, self.eps1 * other, self.eps2 * other,
+                             self.eps12 * other)
+
+    def __rmul__(self, other):
+        """
+        inputs: self: HyperDual object, other: scalar
+        returns HyperDual object of multiplication of two inputs in the form other * self
+
+        """
+        return self.__mul__(other)
+
+    def reciprocal(self):
+        """
+        inputs: self: HyperDual object
+        returns HyperDual object of the form 1 / self
+
+        """
+        inv = 1 / self.val
+        return self._chain(inv, - inv ** 2, 2 * inv ** 3)
+
+    def __truediv__(self, other):
+        """
+        inputs: self: HyperDual object, other: HyperDual object or scalar
+        returns HyperDual object of true division of two inputs in the form self / other
+
+        """
+        try:
+            return self * other.reciprocal()
+        except AttributeError:
+            return HyperDual(self.val / other, self.eps1 / other, self.eps2 / other,
+                             self.eps12 / other)
+
+    def __rtruediv__(self, other):
+        """
+        inputs: self: HyperDual object, other: scalar
+        returns HyperDual object of true division of two inputs in the form other / self
+
+        """
+        return other * self.reciprocal()
+
+    def __pow__(self, other):
+        """
+        inputs: self: HyperDual object, other: HyperDual object or scalar
+        returns HyperDual object of power function of the form self ** other
+
+        """
+        if isinstance(other, HyperDual):
+            return (other * self.ln()).exp()
+        # x ** 1 has no curvature, and val ** -1 would be infinite at 0
+        d2f = 0. if np.ndim(other) == 0 and other == 1 else \
+            other * (other - 1) * self.val ** (other - 2)
+        return self._chain(self.val ** other, other * self.val ** (other - 1), d2f)
+
+    def __rpow__(self, other):
+        """
+        inputs: self: HyperDual object, other: scalar
+        returns HyperDual object of power function of the form other ** self
+
+        """
+        return self.expm(other)
+
+    """ unary operators """
+    def __neg__(self):
+        """
+        inputs: self: HyperDual object
+        returns HyperDual object of negative function of the form - self
+
+        """
+        return HyperDual(- self.val, - self.eps1, - self.eps2, - self.eps12)
+
+    """ elementary functions """
+    def sin(self):
+        """
+        inputs: self: HyperDual object
+        returns HyperDual object of sine function of the form sine(self)
+
+        """
+        sin = np.sin(self.val)
+        return self._chain(sin, np.cos(self.val), - sin)
+
+    def cos(self):
+        """
+        inputs: self: HyperDual object
+        returns HyperDual object of cosine function of the form cosine(self)
+
+        """
+        cos = np.cos(self.val)
+        return self._chain(cos, - np.sin(self.val), - cos)
+
+    def tan(self):
+        """
+        inputs: self: HyperDual object
+        returns HyperDual object of tangent function of the form tangent(self)
+
+        """
+        tan = np.tan(self.val)
+        sec2 = 1 + tan ** 2
+        return self._chain(tan, sec2, 2 * tan * sec2)
+
+    """ inverse trig functions """
+    def arcsine(self):
+        """
+        inputs: self: HyperDual object
+        returns HyperDual object of arcsine function of the form arcsine(self)
+
+        """
+        d = 1 / np.sqrt(1 - self.val ** 2)
+        return self._chain(np.arcsin(self.val), d, self.val * d ** 3)
+
+    def arccosine(self):
+        """
+        inputs: self: HyperDual object
+        returns HyperDual object of arccosine function of the form arccosine(self)
+
+        """
+        d = 1 / np.sqrt(1 - self.val ** 2)
+        return self._chain(np.arccos(self.val), - d, - self.val * d ** 3)
+
+    def arctangent(self):
+        """
+        inputs: self: HyperDual object
+        returns HyperDual object of arctangent function of the form arctangent(self)
+
+        """
+        d = 1 / (1 + self.val ** 2)
+        return self._chain(np.arctan(self.val), d, - 2 * self.val * d ** 2)
+
+    """ hyperbolic functions """
+    def sinh(self):
+        """
+        inputs: self: HyperDual object
+        returns HyperDual object of sinh function of the form sinh(self)
+
+        """
+        sinh = np.sinh(self.val)
+        return self._chain(sinh, np.cosh(self.val), sinh)
+
+    def cosh(self):
+        """
+        inputs: self: HyperDual object
+        returns HyperDual object of cosh function of the form cosh(self)
+
+        """
+        cosh = np.cosh(self.val)
+        return self._chain(cosh, np.sinh(self.val), cosh)
+
+    def tanh(self):
+        """
+        inputs: self: HyperDual object
+        returns HyperDual object of tanh function of the form tanh(self)
+
+        """
+        tanh = np.tanh(self.val)
+        sech2 = 1 - tanh ** 2
+        return self._chain(tanh, sech2, - 2 * tanh * sech2)
+
+    def ln(self):
+        """
+        inputs: self: HyperDual object
+        returns HyperDual object of natural log (ln) function of the form ln(self)
+
+        """
+        inv = 1 / self.val
+        return self._chain(np.log(self.val), inv, - inv ** 2)
+
+    def log(self, base):
+        """
+        inputs: self: HyperDual object, base: scalar
+        returns HyperDual object of log function with base = base of the form log(self, base)
+
+        """
+        return self.ln() / np.log(base)
+
+    def exp(self):
+        """
+        inputs: self: HyperDual object
+        returns HyperDual object of exponential function of the form exp(self)
+
+        """
+        exp = np.exp(self.val)
+        return self._chain(exp, exp, exp)
+
+    def expm(self, base):
+        """
+        inputs: self: HyperDual object, base: scalar
+        returns HyperDual object of exponential function of the form base ** self
+
+        """
+        f = base ** self.val
+        log_base = np.log(base)
+        return self._chain(f, f * log_base, f * log_base ** 2)
+
+    def logistic(self):
+        """
+        inputs: self: HyperDual object
+        returns HyperDual object of logistic function of the form logistic(self)
+
+        """
+        s = 1 / (1 + np.exp(- self.val))
+        ds = s * (1 - s)
+        return self._chain(s, ds, ds * (1 - 2 * s))
+
+    def sqrt(self):
+        """
+        inputs: self: HyperDual object
+        returns HyperDual object of sqrt function of the form sqrt(self)
+
+        """
+        root = np.sqrt(self.val)
+        return self._chain(root, 1 / (2 * root), - 1 / (4 * root * self.val))
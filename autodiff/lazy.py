@@ -0,0 +1,139 @@
+import weakref
+
+# Stack of active lazy blocks, AutoDiff operations defer their derivatives while the
+# stack is not empty
+_active = []
+
+# Functions called w/ True when a first lazy block is activated and w/ False when the
+# last one is deactivated, or after it when the last derivative deferred in a block is
+# computed or its object deleted, so that eager code pays nothing for lazy mode
+_hooks = []
+
+# Weak references to the objects whose derivative is deferred, by id, and the number of
+# resolve calls running, which suspend the active blocks
+_pending = {}
+_resolving = 0
+
+
+class LazyDerivatives():
+    """
+    Lazy derivative mode. While the block is active (inside a with block), AutoDiff
+    operations compute only the value of their result and record how to compute its
+    derivative. The derivative is computed the first time der is read, w/ the same
+    rules as outside the block, so evaluations that only need val, e.g. line searches
+    and convergence checks, cost about as much as the same computation on np.ndarrays.
+
+    Attributes:
+
+    deferred: number of operations whose derivative was deferred in this block
+    evaluated: number of those derivatives computed since, because der was read
+
+    NOTE:
+      A deferred result keeps its operands alive until its der is read, and its der is
+      computed from their values at that time, so the operands must not be modified in
+      place in between (e.g. x.val += step).
+
+    """
+
+    def __init__(self):
+        """
+        Initializes LazyDerivatives object
+
+        """
+        self.deferred = 0
+        self.evaluated = 0
+
+    def __enter__(self):
+        """
+        activates lazy mode
+
+        """
+        _active.append(self)
+        if(len(_active) == 1):
+            for hook in _hooks:
+                hook(True)
+        return self
+
+    def __exit__(self, *exc):
+        """
+        deactivates lazy mode. Results deferred in the block stay lazy.
+
+        """
+        _active.remove(self)
+        if(not _active):
+            for hook in _hooks:
+                hook(False)
+        return False
+
+
+def defer(obj, method, *args):
+    '''
+        Records on obj, a new object holding only its value, that its derivative is the
+        der of method(*args). Returns obj.
+    '''
+    block = _active[-1]
+    block.deferred += 1
+    obj.__dict__['_thunk'] = (block, method, args)
+    track(obj)
+    return obj
+
+
+def track(obj):
+    '''
+        Records that the derivative of obj is deferred, until it is computed or obj is
+        deleted. defer does it, objects given the _thunk of another need it.
+    '''
+    key = id(obj)
+    _pending[key] = weakref.ref(obj, lambda ref: _forget(key))
+
+
+def _forget(key):
+    '''
+        Internal function dropping the deferred object of id key from _pending, and
+        calling the hooks w/ False once none is left outside lazy blocks
+    '''
+    _pending.pop(key, None)
+    if(not _pending and not _active and not _resolving):
+        for hook in _hooks:
+            hook(False)
+
+
+def is_deferred(obj):
+    '''
+        Returns True if the derivative of obj has not been computed yet
+    '''
+    return '_thunk' in getattr(obj, '__dict__', ())
+
+
+def resolve(obj):
+    '''
+        Computes the der of a deferred object, first computing those of the deferred
+        operands it depends on, deepest first. Lazy mode is suspended meanwhile, so the
+        recorded methods run eagerly.
+    '''
+    global _resolving
+    suspended = _active[:]
+    del _active[:]
+    _resolving += 1
+    try:
+        # An explicit stack, long chains of operations would exceed the recursion limit
+        stack = [obj]
+        while(stack):
+            top = stack[-1]
+            if(not is_deferred(top)):
+                stack.pop()
+                continue
+            block, method, args = top.__dict__['_thunk']
+            pending = [a for a in args if is_deferred(a)]
+            if(pending):
+                stack.extend(pending)
+                continue
+            top.__dict__['der'] = method(*args).der
+            del top.__dict__['_thunk']
+            _pending.pop(id(top), None)
+            block.evaluated += 1
+            stack.pop()
+    finally:
+        _active.extend(suspended)
+        _resolving -= 1
+    _forget(id(obj))
@@ -0,0 +1,378 @@
+import numpy as np
+from autodiff.autodiff import AutoDiff
+from autodiff.advector import ADVector
+from autodiff.reverse import ReverseAutoDiff
+from autodiff.sparse import PatternDer
+
+
+def _holds(x, cls):
+    '''
+        Internal function returning True if x is a list, tuple or object array w/ at
+        least one cls instance
+    '''
+    if(isinstance(x, np.ndarray) and x.dtype != object):
+        return False
+    if(not isinstance(x, (list, tuple, np.ndarray))):
+        return False
+    return any(isinstance(o, cls) for o in np.ravel(np.asarray(x, dtype=object)))
+
+
+def _forward_input(x):
+    '''
+        Internal function returning (val, der, squeeze, pattern) for an AutoDiff object
+        or a list or array of AutoDiff objects and constants, or None if x holds no
+        AutoDiff object. der has shape val.shape + (m,); squeeze is True if the
+        direction axis was added here, pattern if der is the mask of a PatternDer.
+    '''
+    if(isinstance(x, AutoDiff)):
+        val, der = np.asarray(x.val), x.der
+    elif(_holds(x, AutoDiff)):
+        items = np.asarray(x, dtype=object)
+        seed = next(o.der for o in items.flat if isinstance(o, AutoDiff))
+        pattern = isinstance(seed, PatternDer)
+        # Constant entries get the floating point type of the AutoDiff entries
+        dtype = np.result_type(*[o.val for o in items.flat if isinstance(o, AutoDiff)])
+        dtype = dtype if dtype.kind == 'f' else np.dtype(float)
+        zero = np.zeros(np.shape(seed), dtype=bool if pattern else dtype)
+        ders = []
+        for o in items.flat:
+            d = o.der if isinstance(o, AutoDiff) else zero
+            ders.append(d.mask if pattern else (d.toarray() if hasattr(d, 'toarray') else d))
+        val = np.array([getattr(o, 'val', o) for o in items.flat], dtype=dtype)
+        val = val.reshape(items.shape)
+        der = np.array(ders).reshape(items.shape + np.shape(seed))
+        if(pattern):
+            der = PatternDer(der)
+    else:
+        return None
+
+    if(val.dtype.kind != 'f'):
+        val = val.astype(float)
+    pattern = isinstance(der, PatternDer)
+    der = der.mask.astype(float) if pattern else \
+        (der.toarray() if hasattr(der, 'toarray') else np.asarray(der))
+    squeeze = der.ndim == val.ndim
+    if(squeeze):
+        der = der[..., None]
+    return val, der, squeeze, pattern
+
+
+def _constant(x, val):
+    '''
+        Internal function returning the constant operand x as an array of the floating
+        point type of val, the value of the other operand, see autodiff._constant
+    '''
+    return np.asarray(x, dtype=val.dtype if val.dtype.kind == 'f' else float)
+
+
+def _reverse_input(x):
+    '''
+        Internal function returning (val, nodes) for a ReverseAutoDiff object or a list
+        or array of ReverseAutoDiff scalars and constants, or None if x holds no
+        ReverseAutoDiff object. nodes is the object itself, or the list of
+        (position, object) pairs of the list entries on the tape.
+    '''
+    if(isinstance(x, ReverseAutoDiff)):
+        return np.asarray(x.val, dtype=float), x
+    if(not _holds(x, ReverseAutoDiff)):
+        return None
+    items = np.asarray(x, dtype=object)
+    nodes = [(i, o) for i, o in enumerate(items.flat) if isinstance(o, ReverseAutoDiff)]
+    val = np.array([getattr(o, 'val', o) for o in items.flat], dtype=float)
+    return val.reshape(items.shape), nodes
+
+
+def _result(val, der, squeeze, pattern):
+    '''
+        Internal function returning the AutoDiff object (an ADVector for vectors) of a
+        computed value and derivative w/ a trailing direction axis
+    '''
+    if(squeeze):
+        der = der[..., 0]
+    if(pattern):
+        der = PatternDer(der != 0)
+    if(np.ndim(val) == 1 and np.ndim(der) == 2):
+        return ADVector._new(np.asarray(val), der)
+    return AutoDiff._new(val, der)
+
+
+def _reduce(x, axis, rule):
+    '''
+        Internal function applying a reduction w/ its derivative rule. rule(val, axis)
+        returns the reduced value and the partial derivative of the reduced value w/
+        respect to each element, w/ the shape of val, so the derivative of the result
+        is a single weighted sum of the input derivatives.
+    '''
+    forward = _forward_input(x)
+    if(forward is not None):
+        val, der, squeeze, pattern = forward
+        out, partial = rule(val, axis)
+        if(pattern):
+            partial = np.ones(val.shape)
+        elif(der.dtype.kind == 'f'):
+            partial = partial.astype(der.dtype, copy=False)
+        axes = tuple(range(val.ndim)) if axis is None else (axis % val.ndim,)
+        new_der = np.sum(der * partial[..., None], axis=axes)
+        return _result(out, new_der, squeeze, pattern)
+
+    reverse = _reverse_input(x)
+    if(reverse is not None):
+        val, nodes = reverse
+        out, partial = rule(val, axis)
+        if(isinstance(nodes, ReverseAutoDiff)):
+            if(axis is None):
+                return nodes._record(out, ((nodes, partial),))
+            return nodes._record(out, ((nodes, lambda adj: partial * np.expand_dims(adj, axis)),))
+        if(axis is not None):
+            raise ValueError("axis is only supported for arrays of values")
+        partial = np.ravel(partial)
+        node = nodes[0][1]
+        return node._record(out, tuple((o, partial[i]) for i, o in nodes))
+
+    return rule(np.asarray(x, dtype=float), axis)[0]
+
+
+def _sum_rule(val, axis):
+    '''
+        Internal function returning the sum and its partial derivatives
+    '''
+    return np.sum(val, axis=axis), np.ones(val.shape)
+
+
+def _mean_rule(val, axis):
+    '''
+        Internal function returning the mean and its partial derivatives
+    '''
+    count = val.size if axis is None else val.shape[axis]
+    return np.mean(val, axis=axis), np.full(val.shape, 1. / count)
+
+
+def _prod_rule(val, axis):
+    '''
+        Internal function returning the product and its partial derivatives. The
+        derivative w/ respect to each element is the product of all the others, the
+        product of its prefix and suffix, which is exact even when elements are zero.
+    '''
+    flat = val.reshape(-1) if axis is None else np.moveaxis(val, axis, 0)
+    ones = np.ones((1,) + flat.shape[1:])
+    prefix = np.concatenate((ones, np.cumprod(flat[:-1], axis=0)))
+    suffix = np.concatenate((np.cumprod(flat[:0:-1], axis=0)[::-1], ones))
+    partial = prefix * suffix
+    partial = partial.reshape(val.shape) if axis is None else np.moveaxis(partial, 0, axis)
+    return np.prod(val, axis=axis), partial
+
+
+def _norm_rule(val, axis):
+    '''
+        Internal function returning the Euclidean norm and its partial derivatives,
+        taken as 0 where the norm is 0
+    '''
+    norm = np.sqrt(np.sum(val ** 2, axis=axis, keepdims=True))
+    partial = np.divide(val, norm, out=np.zeros(val.shape), where=norm != 0)
+    return (norm.reshape(()) if axis is None else np.squeeze(norm, axis)), partial
+
+
+def _logsumexp_rule(val, axis):
+    '''
+        Internal function returning log(sum(exp(val))), shifted by the maximum so that
+        it does not overflow, and its partial derivatives, the softmax of val
+    '''
+    shift = np.max(val, axis=axis, keepdims=True)
+    shift = np.where(np.isfinite(shift), shift, 0.)
+    out = np.log(np.sum(np.exp(val - shift), axis=axis, keepdims=True)) + shift
+    partial = np.exp(val - out)
+    return (out.reshape(()) if axis is None else np.squeeze(out, axis)), partial
+
+
+def sum(x, axis=None):
+    '''
+        Sum of the elements of x, w/ the derivative summed in one numpy call.
+
+        INPUTS:
+          x: AutoDiff object, ADVector, ReverseAutoDiff object, or list or np.ndarray
+             of AutoDiff or ReverseAutoDiff objects and constants
+
+          axis: int, optional (default = None)
+                axis to sum over, all of them if None
+
+        OUTPUTS:
+          total: AutoDiff object (ADVector if it is a vector) or ReverseAutoDiff
+                 object, or a float if x holds no differentiable object
+    '''
+    return _reduce(x, axis, _sum_rule)
+
+
+def mean(x, axis=None):
+    '''
+        Mean of the elements of x, see sum.
+    '''
+    return _reduce(x, axis, _mean_rule)
+
+
+def prod(x, axis=None):
+    '''
+        Product of the elements of x, see sum. The derivative comes from prefix and
+        suffix products in O(n), and is exact when elements are zero.
+    '''
+    return _reduce(x, axis, _prod_rule)
+
+
+def norm(x, axis=None):
+    '''
+        Euclidean norm of x, see sum. Its derivative is taken as 0 at the zero vector.
+    '''
+    return _reduce(x, axis, _norm_rule)
+
+
+def logsumexp(x, axis=None):
+    '''
+        log(sum(exp(x))) computed w/o overflow, see sum. Its derivative is the softmax
+        of x.
+    '''
+    return _reduce(x, axis, _logsumexp_rule)
+
+
+def _as_matrices(a, b):
+    '''
+        Internal function returning the operands of a @ b as matrices, a 1-D a as a
+        row and a 1-D b as a column
+    '''
+    a2 = a[None, :] if a.ndim == 1 else a
+    b2 = b[:, None] if b.ndim == 1 else b
+    return a2, b2
+
+
+def _squeeze_matrix(c, a, b):
+    '''
+        Internal function removing from a product c of the matrices of _as_matrices
+        the row and column axes that 1-D operands a and b did not have
+    '''
+    if(b.ndim == 1):
+        c = np.take(c, 0, axis=1)
+    if(a.ndim == 1):
+        c = np.take(c, 0, axis=0)
+    return c
+
+
+def matmul(a, b):
+    '''
+        Matrix product a @ b of 1-D or 2-D operands, either of which may be constant,
+        w/ the derivative from the product rule d(a @ b) = da @ b + a @ db computed
+        w/ one numpy matmul per differentiable operand.
+
+        INPUTS:
+          a, b: AutoDiff objects, ADVectors, ReverseAutoDiff objects, lists or
+                np.ndarrays of AutoDiff objects and constants, or constant arrays
+
+        OUTPUTS:
+          product: AutoDiff object (ADVector if it is a vector) or ReverseAutoDiff
+                   object, or an np.ndarray if neither operand is differentiable
+    '''
+    fa, fb = _forward_input(a), _forward_input(b)
+    if(fa is not None or fb is not None):
+        va = fa[0] if fa else _constant(a, fb[0])
+        vb = fb[0] if fb else _constant(b, fa[0])
+        squeeze = (fa or fb)[2]
+        pattern = (fa or fb)[3] or (fb or fa)[3]
+        a2, b2 = _as_matrices(va, vb)
+        if(pattern):
+            a2, b2 = np.ones(a2.shape), np.ones(b2.shape)
+        val = np.matmul(va, vb)
+
+        # The direction axis moves to the front so that matmul broadcasts over it
+        der = 0.
+        if(fa is not None):
+            da = np.moveaxis(fa[1], -1, 0)
+            da = da[:, None, :] if va.ndim == 1 else da
+            der = der + np.matmul(da, b2)
+        if(fb is not None):
+            db = np.moveaxis(fb[1], -1, 0)
+            db = db[:, :, None] if vb.ndim == 1 else db
+            der = der + np.matmul(a2, db)
+        der = _squeeze_matrix(np.moveaxis(der, 0, -1), va, vb)
+        return _result(val, der, squeeze, pattern)
+
+    ra, rb = _reverse_input(a), _reverse_input(b)
+    if(ra is not None or rb is not None):
+        va = ra[0] if ra else np.asarray(a, dtype=float)
+        vb = rb[0] if rb else np.asarray(b, dtype=float)
+        a2, b2 = _as_matrices(va, vb)
+
+        def matrix(adj):
+            adj = np.asarray(adj)
+            if(vb.ndim == 1):
+                adj = adj[..., None]
+            if(va.ndim == 1):
+                adj = adj[None, ...]
+            return adj
+
+        def pullback(grad, shape):
+            # Entries of a list share one product per backward sweep
+            last = {}
+
+            def partial(adj):
+                if(last.get('adjoint') is not adj):
+                    last['adjoint'] = adj
+                    last['grad'] = grad(matrix(adj)).reshape(shape)
+                return last['grad']
+            return partial
+
+        parents = []
+        for r, v, grad in [(ra, va, lambda adj: np.matmul(adj, b2.T)),
+                           (rb, vb, lambda adj: np.matmul(a2.T, adj))]:
+            if(r is None):
+                continue
+            partial = pullback(grad, v.shape)
+            if(isinstance(r[1], ReverseAutoDiff)):
+                parents.append((r[1], partial))
+            else:
+                for i, o in r[1]:
+                    parents.append((o, lambda adj, p=partial, i=i: np.ravel(p(adj))[i]))
+        node = next(r[1] if isinstance(r[1], ReverseAutoDiff) else r[1][0][1]
+                    for r in (ra, rb) if r is not None)
+        return node._record(np.matmul(va, vb), tuple(parents))
+
+    return np.matmul(np.asarray(a, dtype=float), np.asarray(b, dtype=float))
+
+
+def dot(a, b):
+    '''
+        Dot product of 1-D operands, or matrix product of 2-D operands, see matmul.
+    '''
+    return matmul(a, b)
+
+
+def _reduction(rule):
+    '''
+        Internal function adapting a reduction to the signature of its numpy
+        counterpart for AutoDiff.__array_function__, returning NotImplemented for
+        arguments other than a single int axis
+    '''
+    def handler(x, axis=None, **kwargs):
+        if(kwargs or not (axis is None or isinstance(axis, (int, np.integer)))):
+            return NotImplemented
+        return _reduce(x, axis, rule)
+    return handler
+
+
+def _norm(x, ord=None, axis=None, keepdims=False):
+    '''
+        Internal function handling np.linalg.norm, the Euclidean or Frobenius norm only
+    '''
+    if(ord is not None or keepdims):
+        return NotImplemented
+    return _reduction(_norm_rule)(x, axis)
+
+
+def _dot(a, b):
+    '''
+        Internal function handling np.dot, for 1-D and 2-D operands only
+    '''
+    if(any(np.ndim(getattr(x, 'val', x)) not in (1, 2) for x in (a, b))):
+        return NotImplemented
+    return matmul(a, b)
+
+
+# numpy functions AutoDiff.__array_function__ dispatches here
+_ARRAY_FUNCTIONS = {np.sum: _reduction(_sum_rule), np.mean: _reduction(_mean_rule),
+                    np.prod: _reduction(_prod_rule), np.linalg.norm: _norm, np.dot: _dot}
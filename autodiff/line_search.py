@@ -0,0 +1,150 @@
+import numpy as np
+
+
+def backtracking(phi, phi0, slope, step=1., shrink=0.5, c1=1e-4, max_steps=50):
+    '''
+        Armijo backtracking line search. Shrinks the step until the function decreases
+        in proportion to the step, phi(t) <= phi(0) + c1 t phi'(0).
+
+        INPUTS:
+          phi: callable
+               value of the function along the search direction, phi(t) = f(x + t d)
+
+          phi0: float
+                phi(0)
+
+          slope: float
+                 phi'(0) = grad f(x).d, negative for a descent direction
+
+          step: float, optional (default = 1.)
+                first step tried
+
+          shrink: float, optional (default = 0.5)
+                  factor the step is multiplied by after each failure
+
+          c1: float, optional (default = 1e-4)
+              sufficient decrease constant, 0 < c1 < 1
+
+          max_steps: int, optional (default = 50)
+                     maximum number of steps tried
+
+        OUTPUTS:
+          step: float
+                step length satisfying the Armijo condition, or the last one tried
+    '''
+    for _ in range(max_steps):
+        if(phi(step) <= phi0 + c1 * step * slope):
+            break
+        step *= shrink
+    return step
+
+
+def _cubic_minimizer(a, fa, da, b, fb, db):
+    '''
+        Internal function returning the minimizer of the cubic interpolating the values
+        and derivatives at a and b, kept at least a tenth of the interval away from its
+        ends. Falls back to bisection when the cubic has no minimizer in the interval.
+    '''
+    d1 = da + db - 3 * (fa - fb) / (a - b)
+    radicand = d1 ** 2 - da * db
+    low, high = min(a, b), max(a, b)
+    margin = 0.1 * (high - low)
+    if(radicand < 0 or not np.isfinite(radicand)):
+        return (a + b) / 2
+    d2 = np.sign(b - a) * np.sqrt(radicand)
+    denominator = db - da + 2 * d2
+    if(denominator == 0):
+        return (a + b) / 2
+    t = b - (b - a) * (db + d2 - d1) / denominator
+    if(not np.isfinite(t)):
+        return (a + b) / 2
+    return min(max(t, low + margin), high - margin)
+
+
+def strong_wolfe(phi, dphi, phi0, slope, step=1., c1=1e-4, c2=0.9, max_step=1e10,
+                 max_steps=30):
+    '''
+        Line search for a step satisfying the strong Wolfe conditions, sufficient
+        decrease phi(t) <= phi(0) + c1 t phi'(0) and curvature |phi'(t)| <= c2 |phi'(0)|.
+        Steps are doubled until an interval containing such a step is bracketed, which
+        is then narrowed w/ the minimizers of cubic interpolants (Nocedal and Wright,
+        Numerical Optimization, algorithms 3.5 and 3.6).
+
+        INPUTS:
+          phi: callable
+               value of the function along the search direction, phi(t) = f(x + t d)
+
+          dphi: callable
+                derivative along the search direction, dphi(t) = grad f(x + t d).d
+
+          phi0: float
+                phi(0)
+
+          slope: float
+                 phi'(0), negative for a descent direction
+
+          step: float, optional (default = 1.)
+                first step tried
+
+          c1: float, optional (default = 1e-4)
+              sufficient decrease constant
+
+          c2: float, optional (default = 0.9)
+              curvature constant, c1 < c2 < 1. 0.9 suits quasi-Newton methods, 0.1
+              conjugate gradient methods
+
+          max_step: float, optional (default = 1e10)
+                    largest step tried
+
+          max_steps: int, optional (default = 30)
+                     maximum number of steps tried in each phase
+
+        OUTPUTS:
+          step: float
+                step length satisfying the strong Wolfe conditions. If none is found, the
+                last step found w/ sufficient decrease, which may be 0
+
+        NOTE:
+          phi is evaluated before dphi at every step, so a cache of function outputs
+          lets dphi reuse the evaluation of phi.
+    '''
+    prev, f_prev, d_prev = 0., phi0, slope
+    for i in range(max_steps):
+        f_step = phi(step)
+        if(f_step > phi0 + c1 * step * slope or (i > 0 and f_step >= f_prev)):
+            return _zoom(phi, dphi, phi0, slope, c1, c2, max_steps,
+                         prev, f_prev, d_prev, step, f_step, dphi(step))
+        d_step = dphi(step)
+        if(abs(d_step) <= - c2 * slope):
+            return step
+        if(d_step >= 0):
+            return _zoom(phi, dphi, phi0, slope, c1, c2, max_steps,
+                         step, f_step, d_step, prev, f_prev, d_prev)
+        if(step >= max_step):
+            return step
+        prev, f_prev, d_prev = step, f_step, d_step
+        step = min(2 * step, max_step)
+    return prev
+
+
+def _zoom(phi, dphi, phi0, slope, c1, c2, max_steps, low, f_low, d_low, high, f_high, d_high):
+    '''
+        Internal function narrowing the bracket between low, the step w/ the lowest
+        value found that satisfies the sufficient decrease condition, and high until a
+        step satisfies the strong Wolfe conditions
+    '''
+    for _ in range(max_steps):
+        step = _cubic_minimizer(low, f_low, d_low, high, f_high, d_high)
+        f_step = phi(step)
+        if(f_step > phi0 + c1 * step * slope or f_step >= f_low):
+            high, f_high, d_high = step, f_step, dphi(step)
+        else:
+            d_step = dphi(step)
+            if(abs(d_step) <= - c2 * slope):
+                return step
+            if(d_step * (high - low) >= 0):
+                high, f_high, d_high = low, f_low, d_low
+            low, f_low, d_low = step, f_step, d_step
+        if(abs(high - low) <= 1e-12 * max(abs(low), abs(high))):
+            break
+    return low
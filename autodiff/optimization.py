@@ -1,32 +1,256 @@
 import sys
+from collections import deque
 import numpy as np
 from autodiff.autodiff import AutoDiff as ad
+from autodiff.advector import ADVector
+from autodiff.reverse import gradient as reverse_gradient
+from autodiff.hyperdual import HyperDual
+from autodiff.derivatives import value_gradient_hessian, gradient_and_hvp, hvp
+from autodiff.tracing import CompiledFunction
+from autodiff.cache import CachedFunction, cached_function
+from autodiff.lazy import LazyDerivatives
+from autodiff import line_search as ls
 #from autodiff import AutoDiff as ad
 
-def _hessian_update(B, y, s):
+# Number of points whose function output each solver keeps, enough for the point
+# evaluated at the end of one iteration to be reused at the start of the next
+_SOLVER_CACHE_SIZE = 2
+
+def _to_boundary(z, d, radius):
+    '''
+        Internal function used in the Steihaug algorithm, returning the tau >= 0 for
+        which z + tau d lies on the boundary of the trust region, ||z + tau d|| = radius
+    '''
+    a = np.dot(d, d)
+    b = np.dot(z, d)
+    c = np.dot(z, z) - radius ** 2
+    return (- b + np.sqrt(max(b ** 2 - a * c, 0.))) / a
+
+
+def _steihaug(func, x, grad, radius, max_cg_iter):
+    '''
+        Internal function used in trust_region_newton_cg, approximately minimizing the
+        model g.p + p.Hp / 2 over ||p|| <= radius by truncated conjugate gradient
+        (Nocedal and Wright, Numerical Optimization, algorithm 7.2). Returns p and Hp,
+        w/ one Hessian-vector product per iteration.
+    '''
+    z = np.zeros(len(grad))
+    r = np.copy(grad)
+    d = - r
+    rr = np.dot(r, r)
+    if(rr == 0):
+        return z, np.zeros(len(grad))
+    # Forcing sequence for superlinear convergence
+    cg_tol = min(0.5, np.sqrt(np.sqrt(rr))) * np.sqrt(rr)
+    for _ in range(max_cg_iter):
+        Hd = hvp(func, x, d)
+        dHd = np.dot(d, Hd)
+        # Negative curvature, the model decreases to the boundary along d
+        if(dHd <= 0):
+            tau = _to_boundary(z, d, radius)
+            return z + tau * d, r - grad + tau * Hd
+        alpha = rr / dHd
+        if(np.linalg.norm(z + alpha * d) >= radius):
+            tau = _to_boundary(z, d, radius)
+            return z + tau * d, r - grad + tau * Hd
+        z = z + alpha * d
+        r = r + alpha * Hd
+        rr_new = np.dot(r, r)
+        if(np.sqrt(rr_new) < cg_tol):
+            break
+        d = - r + rr_new / rr * d
+        rr = rr_new
+    # r = grad + H z
+    return z, r - grad
+
+
+def _inverse_hessian_update(H, s, y):
     '''
-        Internal function used in the BFGS algorithm
+        Internal function used in the BFGS algorithm, updating the inverse Hessian
+        approximation H in place to (I - rho s y^T) H (I - rho y s^T) + rho s s^T, w/
+        rho = 1 / y.s, in O(n^2)
     '''
-    return np.outer(y, y)/np.dot(y, s) - \
-           np.dot(B, np.outer(s, np.dot(s.T, B)))/np.dot(s.T, np.dot(B, s))
+    rho = 1. / np.dot(y, s)
+    Hy = np.dot(H, y)
+    H += rho * ((1 + rho * np.dot(y, Hy)) * np.outer(s, s) - np.outer(Hy, s) - np.outer(s, Hy))
 
 
-def BFGS(func, num, init_hessian=None, step_size=0.1, tol=1e-10, max_iter=10000, 
-         return_trace=False):
+def _two_loop(grad, history):
+    '''
+        Internal function used in the L-BFGS algorithm, returning the product of the
+        inverse Hessian approximation built from the (s, y, rho) pairs in history w/
+        grad by the two-loop recursion, in O(m n) for m pairs of length n
+    '''
+    q = np.copy(grad)
+    alphas = []
+    for s, y, rho in reversed(history):
+        alpha = rho * np.dot(s, q)
+        q -= alpha * y
+        alphas.append(alpha)
+
+    # Initial inverse Hessian gamma * I, scaled by the most recent pair
+    if(history):
+        s, y, rho = history[-1]
+        q *= np.dot(s, y) / np.dot(y, y)
+
+    for (s, y, rho), alpha in zip(history, reversed(alphas)):
+        beta = rho * np.dot(y, q)
+        q += (alpha - beta) * s
+    return q
+
+
+def _shifted_cholesky(hess, beta=1e-3):
+    '''
+        Internal function used in newton_minimize, returning the Cholesky factor of
+        hess + tau I and tau. tau is 0 if hess is positive definite, else doubled until
+        the factorization succeeds (Nocedal and Wright, Numerical Optimization,
+        algorithm 3.3). It starts at twice the most negative diagonal entry, flipping
+        its sign rather than shifting it to about 0, which would give a huge step
+    '''
+    if(not np.all(np.isfinite(hess))):
+        raise FloatingPointError("NON-FINITE HESSIAN")
+    min_diag = np.min(np.diag(hess))
+    shift = 0. if min_diag > 0 else max(beta, - 2 * min_diag)
+    identity = np.eye(len(hess))
+    while(True):
+        try:
+            return np.linalg.cholesky(hess + shift * identity), shift
+        except np.linalg.LinAlgError:
+            shift = max(2 * shift, beta)
+
+
+def _cholesky_solve(L, b, block=64):
+    '''
+        Internal function used in newton_minimize, solving L L^T x = b for a lower
+        triangular factor L by forward and back substitution over blocks of rows. Each
+        block updates its right hand side w/ one product and solves its diagonal block,
+        so the cost is O(n^2 + n block^2) w/ n / block Python iterations
+    '''
+    n = len(b)
+    blocks = [(i, min(i + block, n)) for i in range(0, n, block)]
+    y = np.empty(n)
+    for i, j in blocks:
+        y[i:j] = np.linalg.solve(L[i:j, i:j], b[i:j] - np.dot(L[i:j, :i], y[:i]))
+    x = np.empty(n)
+    for i, j in reversed(blocks):
+        x[i:j] = np.linalg.solve(L[i:j, i:j].T, y[i:j] - np.dot(L[j:, i:j].T, x[j:]))
+    return x
+
+
+def _hyperdual_value(func, values):
+    '''
+        Internal function returning the value of func, which takes HyperDual objects, at
+        values w/ all derivative parts zero
+    '''
+    out = func([HyperDual(v) for v in values])
+    return float(getattr(out, 'val', out))
+
+
+def _iterate(num, seeded=True):
+    '''
+        Internal function returning a copy of num as the ADVector the solvers update in
+        place. W/o seeded only values are used, as in reverse mode, and the copy gets
+        zero-width seeds, so memory stays O(n) instead of O(n^2) for identity seeds.
+    '''
+    if(seeded):
+        return ADVector.from_autodiff(num)
+    values = np.array(num.val if isinstance(num, ADVector) else [n.val for n in num])
+    return ADVector(values, np.zeros((len(values), 0), values.dtype), values.dtype)
+
+
+def _value(func, values, seeds):
+    '''
+        Internal function returning the value of func at values, w/o computing its
+        derivative, see autodiff.lazy. values must be a new array.
+    '''
+    with LazyDerivatives():
+        return float(func(ADVector._new(values, seeds)).val)
+
+
+def _step_length(func, x, direction, grad, mode, line_search, step_size, c2=0.9):
+    '''
+        Internal function returning the length of the step along direction from x
+        chosen by line_search, 'wolfe' (strong Wolfe conditions w/ curvature constant
+        c2), 'armijo' (backtracking) or None (step_size itself), starting from
+        step_size. Values at
+        trial points are computed in lazy mode and gradients only where the strong
+        Wolfe search needs them, from the cache of func when evaluated before.
+    '''
+    if(line_search is None):
+        return step_size
+    if(line_search not in ('wolfe', 'armijo')):
+        raise ValueError("line_search must be 'wolfe', 'armijo' or None")
+
+    def phi(t):
+        return _value(func, x.val + t * direction, x.der)
+
+    phi0 = _value(func, np.copy(x.val), x.der)
+    slope = np.dot(grad, direction)
+    if(line_search == 'armijo'):
+        return ls.backtracking(phi, phi0, slope, step_size)
+
+    def dphi(t):
+        point = ADVector._new(x.val + t * direction, x.der)
+        return np.dot(_gradient(func, point, mode), direction)
+    return ls.strong_wolfe(phi, dphi, phi0, slope, step_size, c2=c2)
+
+
+def _descent(direction, grad):
+    '''
+        Internal function returning direction if it is a descent direction, else the
+        steepest descent direction - grad
+    '''
+    if(np.dot(direction, grad) < 0):
+        return direction
+    return - grad
+
+
+def _conjugate_beta(formula, new_grad, grad):
+    '''
+        Internal function used in the conjugate gradient algorithm, returning the scalar
+        weight of the previous direction in the next one, Fletcher-Reeves ('FR') or
+        Polak-Ribiere clipped at 0 ('PR+')
+    '''
+    if(formula == 'FR'):
+        return np.dot(new_grad, new_grad) / np.dot(grad, grad)
+    return max(np.dot(new_grad, new_grad - grad) / np.dot(grad, grad), 0.)
+
+
+def _gradient(func, num, mode):
+    '''
+        Internal function returning the gradient of func at the ADVector num. In
+        forward mode the derivative seeds carried by num are propagated through func,
+        in reverse mode only the values of num are used and the gradient comes from
+        a single reverse sweep over the recorded tape, or over the compiled trace when
+        func is a CompiledFunction. A CachedFunction answers repeated points from its
+        cache in either mode.
+    '''
+    if(mode == 'forward'):
+        return func(num).der
+    elif(mode == 'reverse'):
+        if(isinstance(func, (CompiledFunction, CachedFunction))):
+            return func.gradient(num.val)
+        return reverse_gradient(func, num.val)[1]
+    raise ValueError("mode must be 'forward' or 'reverse'")
+
+
+def BFGS(func, num, init_hessian=None, step_size=1., tol=1e-10, max_iter=10000, 
+         return_trace=False, mode='forward', line_search='wolfe'):
     '''
         INPUTS:
           func: callable (function)
                  the function we would like to perform gradient descent on
 
-          num: np.ndarray of AutoDiff objects
+          num: np.ndarray of AutoDiff objects or ADVector
                 vector of inputs a list of AutoDiff objects
 
           init_hessian: np.ndarray, optional (default = None)
                         initial guess of the hessian. If None, we set the guess to the
                         identity matrix of size nxn where n is length of num
 
-          step_size: float, optional (default = 0.1)
-                      step size of algorithm
+          step_size: float, optional (default = 1.)
+                      first step length tried by the line search along the quasi-Newton
+                      direction, or the length of every step if line_search is None
 
           tol: float, optional (default = 1e-10)
                 convergence critera. if 
@@ -37,6 +261,19 @@ def BFGS(func, num, init_hessian=None, step_size=0.1, tol=1e-10, max_iter=10000,
           return_trace: boolean, optional (default = False)
                         Returns the trace of points if True. Useful for plotting
 
+          mode: str, optional (default = 'forward')
+                source of the gradient. 'forward' propagates the derivatives seeded
+                in num, 'reverse' records a tape and computes the full gradient in
+                one reverse sweep, which is cheaper when num is long. Only the values
+                of num are used in reverse mode, the returned AutoDiff objects have
+                derivatives of length 0
+
+          line_search: str or None, optional (default = 'wolfe')
+                       choice of the step length, 'wolfe' for a step satisfying the
+                       strong Wolfe conditions, 'armijo' for backtracking until the
+                       function decreases enough, None for a fixed step_size. See
+                       autodiff.line_search
+
         OUTPUTS:
           min: np.ndarray of AutoDiff objects
                the minimum to which gradient descent converged
@@ -51,59 +288,364 @@ def BFGS(func, num, init_hessian=None, step_size=0.1, tol=1e-10, max_iter=10000,
           This algorithm terminates when the gradient is zero, whether or not that point
           is a minimum or maximum. The algorithm is fairly robust and should converge
           eventually, depending on step size. Default parameters are set so that most
+
+          The inverse of the hessian approximation is kept and updated instead, so each
+          step is a matrix-vector product, O(n^2), rather than a linear solve, O(n^3).
+          Function values at the trial points of the line search are computed in lazy
+          mode, see autodiff.lazy.
+
+          Outputs of func are cached per point, see autodiff.cache. Pass a
+          CachedFunction to read the hit and miss statistics afterwards.
     '''
+    func = cached_function(func, _SOLVER_CACHE_SIZE)
+
+    # Values and seeds are kept in contiguous buffers, updated in place. Reverse mode
+    # needs no seeds
+    x = _iterate(num, mode == 'forward')
 
-    # If hessian guess is default value, set to identity
-    if(init_hessian == None):
-        init_hessian = np.eye(len(num))
+    # If hessian guess is default value, the identity is rescaled after the first step
+    rescale = init_hessian is None
+    if(rescale):
+        inv_hessian = np.eye(len(x))
+    else:
+        inv_hessian = np.linalg.inv(init_hessian)
 
     # Initialize variables for loop
-    last = np.ones(len(num))*999
+    last = np.ones(len(x))*999
     iterations = 0
     if(return_trace):
         trace = [num]
 
-    while(np.linalg.norm(last - num) > tol):
-        last = np.copy([v.val for v in num])
-
-        # Calculate gradient for BFGS method
-        df_val = -func(num).der
-        s = np.linalg.solve(init_hessian, df_val)
-        num += s
-        y = func(num).der + df_val
-        
-        # Update Hessian
-        init_hessian += _hessian_update(init_hessian, y, s)
+    grad = _gradient(func, x, mode)
+    while(np.linalg.norm(last - x.val) > tol):
+        last = np.copy(x.val)
+
+        # Quasi-Newton direction, steepest descent if the approximation lost
+        # positive definiteness
+        direction = _descent(- np.dot(inv_hessian, grad), grad)
+        s = _step_length(func, x, direction, grad, mode, line_search, step_size) * direction
+        x.val += s
+        new_grad = _gradient(func, x, mode)
+        y = new_grad - grad
+
+        # Update inverse hessian, skipping pairs w/o positive curvature
+        curvature = np.dot(y, s)
+        if(curvature > 1e-12 * np.linalg.norm(y) * np.linalg.norm(s)):
+            if(rescale):
+                inv_hessian *= curvature / np.dot(y, y)
+                rescale = False
+            _inverse_hessian_update(inv_hessian, s, y)
+        grad = new_grad
 
         # Append to trace
         if(return_trace):
-            trace.append(np.copy(num))
+            trace.append(x.to_autodiff())
 
         iterations += 1
         if(iterations == max_iter):
-            return num, False, iterations
+            if(return_trace):
+                return x.to_autodiff(), False, iterations, np.array(trace)
+            else:
+                return x.to_autodiff(), False, iterations
     
     if(return_trace):
-        return num, True, iterations, np.array(trace)
+        return x.to_autodiff(), True, iterations, np.array(trace)
     else:
-        return num, True, iterations
+        return x.to_autodiff(), True, iterations
 
 
-def conjugate_gradient(f, num, step_size=0.01, tol=10e-8, max_iter=10000, return_trace=False):
+def L_BFGS(func, num, m=10, tol=1e-10, max_iter=10000, return_trace=False, mode='forward'):
     '''
         INPUTS:
           func: callable (function)
-                 the function we would like to perform gradient descent on
+                 the function we would like to minimize
 
-          num: np.ndarray of AutoDiff objects
+          num: np.ndarray of AutoDiff objects or ADVector
                 vector of inputs a list of AutoDiff objects
 
-          init_hessian: np.ndarray, optional (default = None)
-                        initial guess of the hessian. If None, we set the guess to the
-                        identity matrix of size nxn where n is length of num
+          m: int, optional (default = 10)
+             number of most recent steps and gradient changes kept to approximate the
+             inverse hessian
 
-          step_size: float, optional (default = 0.1)
-                      step size of algorithm
+          tol: float, optional (default = 1e-10)
+                convergence critera. if the step taken is shorter than tol the algorithm
+                has converged
+
+          max_iter: int, optional (default = 10000)
+                    number of iterations allowed before no convergence is declared
+
+          return_trace: boolean, optional (default = False)
+                        Returns the trace of points if True. Useful for plotting
+
+          mode: str, optional (default = 'forward')
+                source of the gradient, see BFGS
+
+        OUTPUTS:
+          min: np.ndarray of AutoDiff objects
+               the minimum to which the algorithm converged
+
+          converged: boolean
+                     True if the algorithm comverge, else False
+
+          iterations: int
+                      The number of iterations performed, whether or not the algorithm converged
+
+        NOTE:
+          Unlike BFGS no n x n matrix is stored, the search direction comes from the two-loop
+          recursion over the last m steps, in O(m n) time and memory per iteration, so
+          the algorithm scales to many variables. Step lengths satisfy the Wolfe
+          conditions, w/ the function values at trial points computed in lazy mode and
+          gradients only where the function decreased enough. In reverse mode the
+          iterate carries no derivative seeds, so memory stays O(m n) in total.
+
+          Outputs of func are cached per point, see autodiff.cache.
+    '''
+    if(m < 1):
+        raise ValueError("m must be at least 1")
+    func = cached_function(func, _SOLVER_CACHE_SIZE)
+
+    # Values and seeds are kept in contiguous buffers, updated in place. Reverse mode
+    # needs no seeds
+    x = _iterate(num, mode == 'forward')
+    history = deque(maxlen=m)
+
+    last = np.ones(len(x))*999
+    iterations = 0
+    if(return_trace):
+        trace = [num]
+
+    grad = _gradient(func, x, mode)
+    while(np.linalg.norm(last - x.val) > tol):
+        last = np.copy(x.val)
+
+        direction = - _two_loop(grad, history)
+        s = _step_length(func, x, direction, grad, mode, 'wolfe', 1.) * direction
+        x.val += s
+        new_grad = _gradient(func, x, mode)
+
+        # Pairs w/o positive curvature would make the approximation indefinite
+        y = new_grad - grad
+        curvature = np.dot(y, s)
+        if(curvature > 1e-12 * np.linalg.norm(y) * np.linalg.norm(s)):
+            history.append((s, y, 1. / curvature))
+        grad = new_grad
+
+        if(return_trace):
+            trace.append(x.to_autodiff())
+
+        iterations += 1
+        if(iterations == max_iter):
+            if(return_trace):
+                return x.to_autodiff(), False, iterations, np.array(trace)
+            else:
+                return x.to_autodiff(), False, iterations
+
+    if(return_trace):
+        return x.to_autodiff(), True, iterations, np.array(trace)
+    else:
+        return x.to_autodiff(), True, iterations
+
+
+def newton_minimize(func, num, tol=1e-10, max_iter=100, return_trace=False,
+                    line_search='armijo', vectorized=True):
+    '''
+        INPUTS:
+          func: callable (function)
+                 the function we would like to minimize, taking a list of HyperDual
+                 objects, see autodiff.derivatives.value_gradient_hessian
+
+          num: np.ndarray of AutoDiff objects or ADVector
+                vector of inputs a list of AutoDiff objects
+
+          tol: float, optional (default = 1e-10)
+                convergence critera. if the step taken is shorter than tol the algorithm
+                has converged
+
+          max_iter: int, optional (default = 100)
+                    number of iterations allowed before no convergence is declared
+
+          return_trace: boolean, optional (default = False)
+                        Returns the trace of points if True. Useful for plotting
+
+          line_search: str or None, optional (default = 'armijo')
+                       'armijo' backtracks from the full Newton step until the function
+                       decreases enough, None always takes the full step
+
+          vectorized: boolean, optional (default = True)
+                      how the Hessian is evaluated, see value_gradient_hessian
+
+        OUTPUTS:
+          min: np.ndarray of AutoDiff objects
+               the minimum to which the algorithm converged
+
+          converged: boolean
+                     True if the algorithm comverge, else False
+
+          iterations: int
+                      The number of iterations performed, whether or not the algorithm converged
+
+        NOTE:
+          Each iteration evaluates the exact Hessian w/ hyper-dual numbers and solves
+          for the Newton step w/ its Cholesky factorization. Where the Hessian is not
+          positive definite a multiple of the identity is added to it, so the step is
+          always a descent direction. Near a minimum w/ a positive definite Hessian
+          the full step is taken and convergence is quadratic.
+    '''
+    if(line_search not in ('armijo', None)):
+        raise ValueError("line_search must be 'armijo' or None")
+
+    x = _iterate(num, seeded=False)
+
+    last = np.ones(len(x))*999
+    iterations = 0
+    if(return_trace):
+        trace = [num]
+
+    while(np.linalg.norm(last - x.val) > tol):
+        last = np.copy(x.val)
+
+        val, grad, hess = value_gradient_hessian(func, x.val, vectorized)
+        direction = - _cholesky_solve(_shifted_cholesky(hess)[0], grad)
+
+        step = 1.
+        slope = np.dot(grad, direction)
+        if(line_search == 'armijo' and slope < 0):
+            step = ls.backtracking(lambda t: _hyperdual_value(func, x.val + t * direction),
+                                   val, slope)
+        x.val += step * direction
+
+        if(return_trace):
+            trace.append(x.to_autodiff())
+
+        iterations += 1
+        if(iterations == max_iter):
+            if(return_trace):
+                return x.to_autodiff(), False, iterations, np.array(trace)
+            else:
+                return x.to_autodiff(), False, iterations
+
+    if(return_trace):
+        return x.to_autodiff(), True, iterations, np.array(trace)
+    else:
+        return x.to_autodiff(), True, iterations
+
+
+def trust_region_newton_cg(func, num, radius=1., max_radius=1000., eta=0.15, tol=1e-10,
+                           max_iter=1000, max_cg_iter=None, return_trace=False):
+    '''
+        INPUTS:
+          func: callable (function)
+                 the function we would like to minimize, taking a list of
+                 ReverseAutoDiff objects, see autodiff.derivatives.gradient_and_hvp
+
+          num: np.ndarray of AutoDiff objects or ADVector
+                vector of inputs a list of AutoDiff objects
+
+          radius: float, optional (default = 1.)
+                  initial radius of the trust region
+
+          max_radius: float, optional (default = 1000.)
+                      largest radius of the trust region
+
+          eta: float, optional (default = 0.15)
+               steps are accepted if the function decreases by more than eta times the
+               decrease predicted by the model, 0 <= eta < 0.25
+
+          tol: float, optional (default = 1e-10)
+                convergence critera. if the norm of the gradient is at most tol the
+                algorithm has converged
+
+          max_iter: int, optional (default = 1000)
+                    number of iterations allowed before no convergence is declared
+
+          max_cg_iter: int, optional (default = None)
+                       maximum number of conjugate gradient iterations per step, the
+                       number of variables if None
+
+          return_trace: boolean, optional (default = False)
+                        Returns the trace of points if True. Useful for plotting
+
+        OUTPUTS:
+          min: np.ndarray of AutoDiff objects
+               the minimum to which the algorithm converged
+
+          converged: boolean
+                     True if the algorithm comverge, else False
+
+          iterations: int
+                      The number of iterations performed, whether or not the algorithm converged
+
+        NOTE:
+          Each step minimizes the quadratic model of the function within the trust
+          region by truncated conjugate gradient (Steihaug), which stops at the boundary
+          or along directions of negative curvature. The Hessian is never formed, the
+          model only needs Hessian-vector products computed in forward-over-reverse
+          mode, so memory is O(n). The radius shrinks when the function decreases much
+          less than predicted and grows when a step reaching the boundary is accurate.
+          If it shrinks below the spacing of floating point numbers around the point
+          before the gradient is small enough, the algorithm stops w/o converging.
+    '''
+    if(not 0 <= eta < 0.25):
+        raise ValueError("eta must be in [0, 0.25)")
+    if(radius <= 0 or max_radius < radius):
+        raise ValueError("radius must be positive and at most max_radius")
+
+    x = _iterate(num, seeded=False)
+    if(max_cg_iter is None):
+        max_cg_iter = len(x)
+
+    iterations = 0
+    if(return_trace):
+        trace = [num]
+
+    zeros = np.zeros(len(x))
+    val, grad, _ = gradient_and_hvp(func, x.val, zeros)
+    converged = False
+    while(True):
+        if(np.linalg.norm(grad) <= tol):
+            converged = True
+            break
+        # Steps this short no longer change the point
+        if(iterations == max_iter or radius <= np.finfo(float).eps * np.linalg.norm(x.val)):
+            break
+
+        step, Hstep = _steihaug(func, x.val, grad, radius, max_cg_iter)
+        predicted = - (np.dot(grad, step) + 0.5 * np.dot(step, Hstep))
+        ratio = 0.
+        if(predicted > 0):
+            new_val, new_grad, _ = gradient_and_hvp(func, x.val + step, zeros)
+            ratio = (val - new_val) / predicted
+        if(ratio < 0.25):
+            radius *= 0.25
+        elif(ratio > 0.75 and np.linalg.norm(step) >= 0.99 * radius):
+            radius = min(2 * radius, max_radius)
+        if(ratio > eta):
+            x.val += step
+            val, grad = new_val, new_grad
+            if(return_trace):
+                trace.append(x.to_autodiff())
+        iterations += 1
+
+    if(return_trace):
+        return x.to_autodiff(), converged, iterations, np.array(trace)
+    else:
+        return x.to_autodiff(), converged, iterations
+
+
+def conjugate_gradient(f, num, step_size=0.01, tol=10e-8, max_iter=10000, return_trace=False,
+                       mode='forward', line_search='wolfe', beta='PR+'):
+    '''
+        INPUTS:
+          func: callable (function)
+                 the function we would like to perform gradient descent on
+
+          num: np.ndarray of AutoDiff objects or ADVector
+                vector of inputs a list of AutoDiff objects
+
+          step_size: float, optional (default = 0.01)
+                      first step length tried by the line search, later ones are scaled
+                      from the previous step. The length of every step if line_search is
+                      None
 
           tol: float, optional (default = 1e-10)
                 convergence critera. if 
@@ -114,6 +656,21 @@ def conjugate_gradient(f, num, step_size=0.01, tol=10e-8, max_iter=10000, return
           return_trace: boolean, optional (default = False)
                         Returns the trace of points if True. Useful for plotting
 
+          mode: str, optional (default = 'forward')
+                source of the gradient. 'forward' propagates the derivatives seeded
+                in num, 'reverse' records a tape and computes the full gradient in
+                one reverse sweep, which is cheaper when num is long. Only the values
+                of num are used in reverse mode, the returned AutoDiff objects have
+                derivatives of length 0
+
+          line_search: str or None, optional (default = 'wolfe')
+                       choice of the step length, see BFGS
+
+          beta: str, optional (default = 'PR+')
+                formula of the weight of the previous direction in the next one,
+                'FR' (Fletcher-Reeves) or 'PR+' (Polak-Ribiere, restarting whenever it
+                is negative), which usually converges faster
+
 
         OUTPUTS:
           min: np.ndarray of AutoDiff objects
@@ -129,54 +686,88 @@ def conjugate_gradient(f, num, step_size=0.01, tol=10e-8, max_iter=10000, return
           is a minimum or maximum. The algorithm is fairly robust and should converge
           eventually, depending on step size. Default parameters are set so that most
           functions used for input should converge.
+
+          Only the current direction and gradient are kept, so each iteration takes
+          O(n) time and memory besides the gradient. The direction restarts as steepest
+          descent every n iterations, when consecutive gradients are far from
+          orthogonal, and when it is not a descent direction.
+
+          Function values at the trial points of the line search are computed in lazy
+          mode, see autodiff.lazy. Outputs of f are cached per point, see
+          autodiff.cache.
     '''
+    if(beta not in ('FR', 'PR+')):
+        raise ValueError("beta must be 'FR' or 'PR+'")
+    f = cached_function(f, _SOLVER_CACHE_SIZE)
+
+    # Values and seeds are kept in contiguous buffers, updated in place. Reverse mode
+    # needs no seeds
+    x = _iterate(num, mode == 'forward')
 
     # 0th step values for the algorithm
-    g = f(num).der
+    g = _gradient(f, x, mode)
     s = -np.copy(g)
+    step, slope = step_size, None
+    since_restart = 0
 
     # Initialize the variables for the loop
-    last = np.ones(len(num))*999
+    last = np.ones(len(x))*999
     iterations = 0
     if(return_trace):
         trace = [num]
 
-    while(np.linalg.norm(last - num) > tol):
-        last = np.copy(num)
+    while(np.linalg.norm(last - x.val) > tol):
+        last = np.copy(x.val)
+
+        # First step tried makes the same first order decrease as the previous step
+        s = _descent(s, g)
+        new_slope = np.dot(g, s)
+        if(line_search is not None and slope is not None and new_slope != 0):
+            step = step * slope / new_slope
+        slope = new_slope
 
-        # Update current value
-        num += step_size*s
+        # Update current value, w/ the step length chosen along s
+        step = _step_length(f, x, s, g, mode, line_search, step, c2=0.1)
+        x.val += step*s
 
         # Update gradient
-        new_g = f(num).der
+        new_g = _gradient(f, x, mode)
 
         # Udate intermediate values of algorithm
-        beta = np.outer(new_g,new_g)/np.dot(g,g)
-        s = -g + np.dot(beta, s)
-        g = np.copy(new_g)
+        since_restart += 1
+        if(since_restart >= len(x) or abs(np.dot(new_g, g)) >= 0.2 * np.dot(new_g, new_g)):
+            s = -new_g
+            since_restart = 0
+        else:
+            s = -new_g + _conjugate_beta(beta, new_g, g)*s
+        g = new_g
 
         iterations += 1
 
         if(return_trace):
-            trace.append(np.copy(num))
+            trace.append(x.to_autodiff())
 
         # Break out of loop if we have reached maximum iterations
         if(iterations > max_iter):
-            return num, False, iterations, np.array(trace)
+            if(return_trace):
+                return x.to_autodiff(), False, iterations, np.array(trace)
+            else:
+                return x.to_autodiff(), False, iterations
 
     if(return_trace):
-        return num, True, iterations, np.array(trace)
+        return x.to_autodiff(), True, iterations, np.array(trace)
     else:
-        return num, True, iterations
+        return x.to_autodiff(), True, iterations
 
 
-def gradient_descent(func, num, step_size=0.1, tol=10e-8, max_iter=10000, return_trace=False):
+def gradient_descent(func, num, step_size=0.1, tol=10e-8, max_iter=10000, return_trace=False,
+                     mode='forward', line_search='wolfe'):
     '''
         INPUTS:
           func: callable (function)
                  the function we would like to perform gradient descent on
 
-          num: np.ndarray of AutoDiff objects
+          num: np.ndarray of AutoDiff objects or ADVector
                 vector of inputs a list of AutoDiff objects
 
           step_size: float, optional (default = 0.1)
@@ -191,6 +782,16 @@ def gradient_descent(func, num, step_size=0.1, tol=10e-8, max_iter=10000, return
           return_trace: boolean, optional (default = False)
                         Returns the trace of points if True. Useful for plotting
 
+          mode: str, optional (default = 'forward')
+                source of the gradient. 'forward' propagates the derivatives seeded
+                in num, 'reverse' records a tape and computes the full gradient in
+                one reverse sweep, which is cheaper when num is long. Only the values
+                of num are used in reverse mode, the returned AutoDiff objects have
+                derivatives of length 0
+
+          line_search: str or None, optional (default = 'wolfe')
+                       choice of the step length, starting from step_size, see BFGS
+
 
         OUTPUTS:
           min: np.ndarray of AutoDiff objects
@@ -206,49 +807,51 @@ def gradient_descent(func, num, step_size=0.1, tol=10e-8, max_iter=10000, return
           is a minimum or maximum. The algorithm is fairly robust and should converge
           eventually, depending on step size. Default parameters are set so that most
           functions used for input should converge.
+
+          Function values at the trial points of the line search are computed in lazy
+          mode, see autodiff.lazy. Outputs of func are cached per point, see
+          autodiff.cache.
     '''
+    func = cached_function(func, _SOLVER_CACHE_SIZE)
 
-    # Set up values
-    n_func = len(num)  # Number of functions in the vector
-    default_der = np.copy([num[i].der for i in range(n_func)]) # Used for casting back to AD
-    last = np.ones(len(num))*999
+    # Set up values. Values and seeds are kept in contiguous buffers, the
+    # seeds never change so only the values are updated in place. Reverse mode needs
+    # no seeds
+    x = _iterate(num, mode == 'forward')
+    last = np.ones(len(x))*999
 
     iterations = 0
     if(return_trace):
         trace = [np.copy(num)]
 
-    if(all(func(num).der == np.zeros(len(func(num).der)))): # Zero derivative
+    grad = _gradient(func, x, mode)
+    if(all(grad == np.zeros(len(grad)))): # Zero derivative
         return num, False, 0
 
-    while(np.linalg.norm(num-last) > tol):
+    while(np.linalg.norm(x.val-last) > tol):
 
-        last = np.copy([n.val for n in num])
+        last = np.copy(x.val)
 
         # Evaluate function to get derivatives
-        f_val = func(num)
+        grad = _gradient(func, x, mode)
 
         # Update values by stepping along derivative
-        for j in range(n_func):
-            num[j] -= ad(step_size*f_val.der[j])
-
-        # Recast values as autodiff objects
-        for j in range(n_func):
-            num[j] = ad(num[j].val, default_der[j])
+        x.val -= _step_length(func, x, -grad, grad, mode, line_search, step_size, c2=0.1)*grad
 
         if(return_trace):
-            trace.append(np.copy(num))
+            trace.append(x.to_autodiff())
 
         iterations += 1
         if(iterations == max_iter):
             if(return_trace):
-                return num, False, iterations, np.array(trace)
+                return x.to_autodiff(), False, iterations, np.array(trace)
             else:
-                return num, False, iterations
+                return x.to_autodiff(), False, iterations
 
     if(return_trace):
-        return num, True, iterations, np.array(trace)
+        return x.to_autodiff(), True, iterations, np.array(trace)
     else:
-        return num, True, iterations
+        return x.to_autodiff(), True, iterations
 
 
 #if __name__ == '__main__':
@@ -2,6 +2,7 @@ import sys
 import numpy as np
 #from autodiff import AutoDiff as ad 
 from autodiff.autodiff import AutoDiff as ad
+from autodiff.derivatives import batch_variables
 from matplotlib import pyplot as plt
 
 #import optimization as opt
@@ -18,6 +19,16 @@ def _ad_to_scalar(points):
 
 
 def _func_grid_points(func, X, Y):
+    # Evaluate the whole grid in one batched pass, falling back to one point at a
+    # time for functions that branch on the value of their inputs
+    try:
+        output = func(batch_variables(np.column_stack((X.ravel(), Y.ravel()))))
+        if(isinstance(output, list)):
+            output = output[0]
+        return np.reshape(np.broadcast_to(output.val, X.size), X.shape)
+    except (AttributeError, TypeError, ValueError):
+        pass
+
     func_pos = np.zeros(X.shape)
     root = isinstance(func([X[0][0], Y[0][0]]), list)
     for i in range(X.shape[0]):
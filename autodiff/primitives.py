@@ -0,0 +1,297 @@
+import numpy as np
+from autodiff.autodiff import AutoDiff, _expand
+from autodiff.advector import ADVector
+from autodiff.reverse import ReverseAutoDiff
+from autodiff.tracing import Tracer, _OPS
+
+# Registered primitives by name
+_REGISTRY = {}
+
+# Names of the traced operations that primitives cannot replace
+_BUILTIN = frozenset(_OPS) | {'input', 'const', 'affine'}
+
+
+def _dense(der):
+    '''
+        Internal function returning a derivative as a float np.ndarray, densifying
+        SparseDer and PatternDer objects
+    '''
+    if(hasattr(der, 'toarray')):
+        return der.toarray()
+    return np.asarray(der, dtype=float)
+
+
+class Primitive():
+    """
+    Function w/ a user-supplied derivative rule. Called on AutoDiff objects (scalar,
+    ADVector or batched), ReverseAutoDiff objects or tracers, it applies the rule in
+    one step instead of differentiating through the internals of the function, which
+    may be any black-box numeric routine. Called on plain numbers it returns func.
+
+    Attributes:
+
+    name: str, name the primitive is registered and traced under
+    func: callable, value of the primitive, func(*args) on scalars or arrays
+    derivative: callable returning the partial derivative w/ respect to each
+                argument, derivative(*args) -> tuple, one entry per argument
+                (elementwise for array arguments), or None
+    jvp: callable returning the tangent of the value, jvp(args, tangents), where
+         tangents holds one tangent per argument, or None
+    vjp: callable returning the cotangent of each argument, vjp(args, value,
+         cotangent) -> tuple, or None
+
+    """
+
+    def __init__(self, name, func, derivative=None, jvp=None, vjp=None):
+        """
+        Initializes Primitive object. At least one of derivative, jvp and vjp is needed.
+
+        """
+        if(name in _BUILTIN):
+            raise ValueError("{} is a built-in operation".format(name))
+        if(not callable(func)):
+            raise TypeError("func must be callable")
+        if(derivative is None and jvp is None and vjp is None):
+            raise ValueError("A primitive needs a derivative, jvp or vjp rule")
+        self.name = name
+        self.func = func
+        self.derivative = derivative
+        self.jvp = jvp
+        self.vjp = vjp
+        self.__doc__ = getattr(func, '__doc__', None)
+
+    def __repr__(self):
+        """
+        returns string value of the primitive
+
+        """
+        return "Primitive({})".format(self.name)
+
+    def partials(self, *args):
+        """
+        inputs: args: scalars
+        returns tuple of the partial derivatives of the value w/ respect to each
+        argument, from whichever rule was given
+
+        """
+        if(self.derivative is not None):
+            partials = self.derivative(*args)
+            return tuple(partials) if isinstance(partials, (tuple, list)) else (partials,)
+        if(self.jvp is not None):
+            return tuple(self.jvp(args, [1. if j == i else 0. for j in range(len(args))])
+                         for i in range(len(args)))
+        return tuple(self.vjp(args, self.func(*args), 1.))
+
+    def jacobians(self, args, value):
+        """
+        inputs: args: list of scalars or arrays, value: func(*args)
+        returns list of the Jacobians of the value w/ respect to each argument, np.ndarray
+        of shape (value.size, arg.size), from one jvp per argument element or one vjp
+        per value element
+
+        """
+        args = [np.asarray(a, dtype=float) for a in args]
+        value = np.asarray(value)
+        if(self.jvp is not None):
+            jacs = []
+            for i, a in enumerate(args):
+                jac = np.zeros((value.size, a.size))
+                for j in range(a.size):
+                    tangents = [np.zeros(b.shape) for b in args]
+                    tangents[i].flat[j] = 1.
+                    jac[:, j] = np.ravel(self.jvp(args, tangents))
+                jacs.append(jac)
+            return jacs
+        jacs = [np.zeros((value.size, a.size)) for a in args]
+        for k in range(value.size):
+            cotangent = np.zeros(value.shape)
+            cotangent.flat[k] = 1.
+            for jac, c in zip(jacs, self.vjp(args, value, cotangent)):
+                jac[k] = np.ravel(c)
+        return jacs
+
+    def _forward(self, args):
+        '''
+            Internal function applying the primitive to AutoDiff arguments. Derivatives
+            carry a trailing axis of directions when der has one more axis than val.
+        '''
+        vals = [a.val if isinstance(a, AutoDiff) else a for a in args]
+        value = np.asarray(self.func(*vals))
+        ads = [a for a in args if isinstance(a, AutoDiff)]
+
+        if(self.derivative is not None):
+            # Sparse and pattern derivatives propagate as in the built-in operators
+            der = None
+            for a, partial in zip(args, self.partials(*vals)):
+                if(isinstance(a, AutoDiff)):
+                    term = a.der * _expand(partial, a)
+                    der = term if der is None else der + term
+        else:
+            k = max(np.ndim(a.der) - np.ndim(a.val) for a in ads)
+            ders = [_dense(a.der) if isinstance(a, AutoDiff) else None for a in args]
+            if(self.jvp is not None):
+                def tangent(i, d):
+                    if(ders[i] is None):
+                        return np.zeros(np.shape(vals[i]))
+                    return ders[i] if d is None else ders[i][..., d]
+                if(k <= 0):
+                    der = self.jvp(vals, [tangent(i, None) for i in range(len(args))])
+                else:
+                    m = max(d.shape[-1] for d in ders if d is not None)
+                    der = np.stack([self.jvp(vals, [tangent(i, d) for i in range(len(args))])
+                                    for d in range(m)], axis=-1)
+            else:
+                der = 0.
+                for a, d, jac in zip(args, ders, self.jacobians(vals, value)):
+                    if(d is not None):
+                        extra = d.shape[np.ndim(a.val):]
+                        block = np.dot(jac, d.reshape((np.size(a.val),) + extra))
+                        der = der + block.reshape(value.shape + extra)
+
+        if(not hasattr(der, 'toarray')):
+            der = np.asarray(der)
+        dtype = value.dtype if value.dtype.kind == 'f' else None
+        if(any(isinstance(a, ADVector) for a in args) and value.ndim == 1 and
+           np.ndim(der) == 2):
+            return ADVector(value, der, dtype)
+        return AutoDiff(value, der, dtype)
+
+    def _reverse(self, args):
+        '''
+            Internal function recording the primitive on the tape of its
+            ReverseAutoDiff arguments
+        '''
+        tapes = {a.tape for a in args if isinstance(a, ReverseAutoDiff)}
+        if(len(tapes) > 1):
+            raise ValueError("Arguments were recorded on different tapes")
+        vals = [a.val if isinstance(a, ReverseAutoDiff) else a for a in args]
+        value = self.func(*vals)
+        positions = [i for i, a in enumerate(args) if isinstance(a, ReverseAutoDiff)]
+
+        if(self.derivative is not None):
+            partials = self.partials(*vals)
+            parents = [(args[i], partials[i]) for i in positions]
+        elif(self.vjp is not None):
+            # One vjp per backward sweep serves every argument
+            last = {}
+
+            def pullback(i):
+                def partial(adjoint):
+                    if(last.get('adjoint') is not adjoint):
+                        last['adjoint'] = adjoint
+                        last['cotangents'] = self.vjp(vals, value, adjoint)
+                    return last['cotangents'][i]
+                return partial
+            parents = [(args[i], pullback(i)) for i in positions]
+        else:
+            jacs = self.jacobians(vals, value)
+
+            def pullback(i):
+                shape = np.shape(vals[i])
+                return lambda adjoint: np.dot(np.ravel(adjoint), jacs[i]).reshape(shape)
+            parents = [(args[i], pullback(i)) for i in positions]
+        return ReverseAutoDiff(value, tapes.pop(), tuple(parents))
+
+    def __call__(self, *args):
+        """
+        inputs: args: AutoDiff, ReverseAutoDiff or Tracer objects, or constants
+        returns the value of the primitive w/ its derivative propagated by the rule
+
+        """
+        if(any(isinstance(a, Tracer) for a in args)):
+            # Traces look operations up by name, see register
+            if(_REGISTRY.get(self.name) is not self):
+                raise ValueError("Primitive {} must be registered to be traced".format(
+                    self.name))
+            trace = next(a.trace for a in args if isinstance(a, Tracer))
+            return trace.record(self.name, *args)
+        forward = any(isinstance(a, AutoDiff) for a in args)
+        reverse = any(isinstance(a, ReverseAutoDiff) for a in args)
+        if(forward and reverse):
+            raise TypeError("Cannot mix AutoDiff and ReverseAutoDiff arguments")
+        if(forward):
+            return self._forward(args)
+        if(reverse):
+            return self._reverse(args)
+        return self.func(*args)
+
+
+class _TracePartials():
+    """
+    Partial derivatives of a primitive in the form of the entries of _OPS, item k
+    being the partial w/ respect to argument k as a function of the argument values
+    and the result, for any number of arguments
+
+    """
+
+    def __init__(self, prim):
+        self.prim = prim
+
+    def __getitem__(self, k):
+        return lambda *a: self.prim.partials(*a[:-1])[k]
+
+
+def register(name, func, derivative=None, jvp=None, vjp=None):
+    '''
+        Declares a primitive w/ its own derivative rule and registers it under name,
+        replacing any primitive of the same name.
+
+        INPUTS:
+          name: str
+                name of the primitive, which must differ from the built-in operations
+
+          func: callable
+                value of the primitive on scalars or arrays, e.g. scipy.special.erf
+
+          derivative: callable, optional (default = None)
+                      closed-form partial derivatives, derivative(*args) returning one
+                      partial per argument (a single value for one argument). For array
+                      arguments the partials are taken elementwise
+
+          jvp: callable, optional (default = None)
+               Jacobian-vector product, jvp(args, tangents) returning the tangent of
+               the value for one tangent per argument
+
+          vjp: callable, optional (default = None)
+               vector-Jacobian product, vjp(args, value, cotangent) returning one
+               cotangent per argument
+
+        OUTPUTS:
+          primitive: Primitive
+                     callable on AutoDiff, ADVector, batched, ReverseAutoDiff and traced
+                     inputs
+
+        NOTE:
+          Forward mode uses derivative, else jvp, else Jacobians from vjp. Reverse mode
+          uses derivative, else vjp, else Jacobians from jvp. Traced and generated code
+          only supports scalar arguments, and the rule must not depend on anything but
+          the arguments.
+    '''
+    prim = Primitive(name, func, derivative, jvp, vjp)
+    _REGISTRY[name] = prim
+    _OPS[name] = (prim.func, _TracePartials(prim))
+    return prim
+
+
+def primitive(name=None, derivative=None, jvp=None, vjp=None):
+    '''
+        Decorator registering the decorated function as a primitive, under its own
+        name unless name is given. See register.
+
+        >>> @primitive(derivative=lambda x: 1 / (1 + np.exp(- x)))
+        ... def softplus(x):
+        ...     return np.log1p(np.exp(x))
+    '''
+    def decorate(func):
+        return register(name or func.__name__, func, derivative, jvp, vjp)
+    return decorate
+
+
+def get_primitive(name):
+    '''
+        Returns the primitive registered under name, raising KeyError if there is none
+    '''
+    try:
+        return _REGISTRY[name]
+    except KeyError:
+        raise KeyError("No primitive registered as {}".format(name))
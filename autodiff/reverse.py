@@ -0,0 +1,500 @@
+import numpy as np
+
+
+def _unbroadcast(grad, shape):
+    '''
+        Internal function summing grad down to shape, undoing any numpy
+        broadcasting that happened on the forward pass
+    '''
+    if(np.shape(grad) == shape):
+        return grad
+    grad = np.asarray(grad)
+    while(grad.ndim > len(shape)):
+        grad = grad.sum(axis=0)
+    for i, s in enumerate(shape):
+        if(s == 1 and grad.shape[i] != 1):
+            grad = grad.sum(axis=i, keepdims=True)
+    return grad
+
+
+_NUMPY_FUNCTIONS = {'sin': np.sin, 'cos': np.cos, 'tan': np.tan, 'arcsine': np.arcsin,
+                    'arccosine': np.arccos, 'arctangent': np.arctan, 'sinh': np.sinh,
+                    'cosh': np.cosh, 'tanh': np.tanh, 'ln': np.log, 'exp': np.exp,
+                    'sqrt': np.sqrt}
+
+
+def _elementary(name, x):
+    '''
+        Internal function applying an elementary function to a value. Values that are
+        themselves differentiable numbers (e.g. HyperDual) use their own method of the
+        same name, which lets another mode be nested inside the tape.
+    '''
+    if(isinstance(x, (float, int, np.ndarray, np.generic))):
+        return _NUMPY_FUNCTIONS[name](x)
+    return getattr(x, name)()
+
+
+class Tape():
+    """
+    Records ReverseAutoDiff operations in evaluation order
+
+    Attributes:
+
+    nodes: list of ReverseAutoDiff objects in the order they were created
+
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty tape
+
+        """
+        self.nodes = []
+
+    def variable(self, value):
+        """
+        inputs: value: scalar or array
+        returns ReverseAutoDiff leaf recorded on this tape
+
+        """
+        return ReverseAutoDiff(value, self)
+
+    def backward(self, output):
+        """
+        inputs: output: ReverseAutoDiff object recorded on this tape
+        sets the adjoint of every node on the tape to the derivative of output with
+        respect to that node, sweeping the tape once in reverse order
+
+        """
+        if(output.tape is not self):
+            raise ValueError("Output was not recorded on this tape")
+
+        for node in self.nodes:
+            node.adjoint = None
+        output.adjoint = np.ones(np.shape(output.val))
+
+        for node in reversed(self.nodes[:output.index + 1]):
+            if(node.adjoint is None):
+                continue
+            for parent, partial in node.parents:
+                # Callable partials map the adjoint themselves, e.g. a vector-Jacobian
+                # product supplied for a primitive
+                contrib = partial(node.adjoint) if callable(partial) else partial * node.adjoint
+                contrib = _unbroadcast(contrib, np.shape(parent.val))
+                if(parent.adjoint is None):
+                    parent.adjoint = contrib
+                else:
+                    parent.adjoint = parent.adjoint + contrib
+
+
+class ReverseAutoDiff():
+    """
+    Implementation of Reverse Auto Differentiation using a tape
+
+    Attributes:
+
+    val: value of custom function evaluated at x
+    tape: Tape on which the operation producing this object was recorded
+    parents: tuple of (ReverseAutoDiff, local partial derivative) pairs. A callable
+             partial maps the adjoint of this object to that of the parent
+    adjoint: derivative of the output with respect to this object, set by Tape.backward
+
+    """
+
+    __slots__ = ('val', 'tape', 'parents', 'adjoint', 'index')
+
+    def __init__(self, values, tape=None, parents=()):
+        """
+        Initializes ReverseAutoDiff object w/ value and records it on tape.
+        A new tape is created when none is given.
+
+        """
+        if isinstance(values, str):
+            raise TypeError("Cannot accept string values")
+        elif isinstance(values, list) and any(type(item)==str for item in values):
+            raise TypeError("Cannot accept string values")
+
+        if isinstance(values, (list, tuple)):
+            values = np.array(values)
+        if tape is None:
+            tape = Tape()
+
+        self.val = values
+        self.tape = tape
+        self.parents = parents
+        self.adjoint = None
+        self.index = len(tape.nodes)
+        tape.nodes.append(self)
+
+    def _record(self, val, parents):
+        """
+        returns new ReverseAutoDiff object w/ value val recorded on the same tape
+
+        """
+        return ReverseAutoDiff(val, self.tape, parents)
+
+    def __str__(self):
+        """
+        returns string value of the function
+
+        """
+        return "ReverseAutoDiff({})".format(self.val)
+
+    def __repr__(self):
+        """
+        returns string value of the function
+
+        """
+        return "ReverseAutoDiff({})".format(self.val)
+
+    @property
+    def der(self):
+        """
+        returns the adjoint accumulated by the last backward sweep
+
+        """
+        return self.adjoint
+
+    """ Comparison operators """
+    def __eq__(self, other):
+        '''
+        inputs: self: ReverseAutoDiff object, other: ReverseAutoDiff object or scalar
+        returns boolean, True if value of self is equal to other else False
+        '''
+        try:
+            return self.val == other.val
+        except AttributeError:
+            return self.val == other
+
+    def __ne__(self, other):
+        '''
+        inputs: self: ReverseAutoDiff object, other: ReverseAutoDiff object or scalar
+        returns boolean, True if value of self is not equal to other else False
+        '''
+        try:
+            return self.val != other.val
+        except AttributeError:
+            return self.val != other
+
+    def __gt__(self, other):
+        '''
+        inputs: self: ReverseAutoDiff object, other: ReverseAutoDiff object or scalar
+        returns boolean, True if value of self is greater than other else False
+        '''
+        try:
+            return self.val > other.val
+        except AttributeError:
+            return self.val > other
+
+    def __ge__(self, other):
+        '''
+        inputs: self: ReverseAutoDiff object, other: ReverseAutoDiff object or scalar
+        returns boolean, True if value of self is greater than or equal to other else False
+        '''
+        try:
+            return self.val >= other.val
+        except AttributeError:
+            return self.val >= other
+
+    def __lt__(self, other):
+        '''
+        inputs: self: ReverseAutoDiff object, other: ReverseAutoDiff object or scalar
+        returns boolean, True if value of self is less than other else False
+        '''
+        try:
+            return self.val < other.val
+        except AttributeError:
+            return self.val < other
+
+    def __le__(self, other):
+        '''
+        inputs: self: ReverseAutoDiff object, other: ReverseAutoDiff object or scalar
+        returns boolean, True if value of self is less than or equal to other else False
+        '''
+        try:
+            return self.val <= other.val
+        except AttributeError:
+            return self.val <= other
+
+    """binary operators"""
+    def __add__(self, other):
+        """
+        inputs: self: ReverseAutoDiff object, other: ReverseAutoDiff object or scalar
+        returns ReverseAutoDiff object of addition of two inputs in the form self + other
+
+        """
+        try:
+            return self._record(self.val + other.val, ((self, 1.), (other, 1.)))
+        except AttributeError:
+            return self._record(self.val + other, ((self, 1.),))
+
+    def __radd__(self, other):
+        """
+        inputs: self: ReverseAutoDiff object, other: scalar
+        returns ReverseAutoDiff object of addition of two inputs in the form other + self
+
+        """
+        return self.__add__(other)
+
+    def __sub__(self, other):
+        """
+        inputs: self: ReverseAutoDiff object, other: ReverseAutoDiff object or scalar
+        returns ReverseAutoDiff object of subtraction of two inputs in the form self - other
+
+        """
+        try:
+            return self._record(self.val - other.val, ((self, 1.), (other, -1.)))
+        except AttributeError:
+            return self._record(self.val - other, ((self, 1.),))
+
+    def __rsub__(self, other):
+        """
+        inputs: self: ReverseAutoDiff object, other: scalar
+        returns ReverseAutoDiff object of subtraction of two inputs in the form other - self
+
+        """
+        return self._record(other - self.val, ((self, -1.),))
+
+    def __mul__(self, other):
+        """
+        inputs: self: ReverseAutoDiff object, other: ReverseAutoDiff object or scalar
+        returns ReverseAutoDiff object of multiplication of two inputs in the form self * other
+
+        """
+        try:
+            return self._record(self.val * other.val, ((self, other.val), (other, self.val)))
+        except AttributeError:
+            return self._record(self.val * other, ((self, other),))
+
+    def __rmul__(self, other):
+        """
+        inputs: self: ReverseAutoDiff object, other: scalar
+        returns ReverseAutoDiff object of multiplication of two inputs in the form other * self
+
+        """
+        return self.__mul__(other)
+
+    def __truediv__(self, other):
+        """
+        inputs: self: ReverseAutoDiff object, other: ReverseAutoDiff object or scalar
+        returns ReverseAutoDiff object of true division of two inputs in the form self / other
+
+        """
+        try:
+            new_val = self.val / other.val
+            return self._record(new_val, ((self, 1 / other.val),
+                                          (other, - new_val / other.val)))
+        except AttributeError:
+            return self._record(self.val / other, ((self, 1 / other),))
+
+    def __rtruediv__(self, other):
+        """
+        inputs: self: ReverseAutoDiff object, other: scalar
+        returns ReverseAutoDiff object of true division of two inputs in the form other / self
+
+        """
+        new_val = other / self.val
+        return self._record(new_val, ((self, - new_val / self.val),))
+
+    def __pow__(self, other):
+        """
+        inputs: self: ReverseAutoDiff object, other: ReverseAutoDiff object or scalar
+        returns ReverseAutoDiff object of power function of the form self ** other
+
+        """
+        try:
+            new_val = self.val ** other.val
+            return self._record(new_val, ((self, other.val * self.val ** (other.val - 1)),
+                                          (other, new_val * _elementary('ln', self.val))))
+        except AttributeError:
+            return self._record(self.val ** other, ((self, other * self.val ** (other - 1)),))
+
+    def __rpow__(self, other):
+        """
+        inputs: self: ReverseAutoDiff object, other: scalar
+        returns ReverseAutoDiff object of power function of the form other ** self
+
+        """
+        new_val = other ** self.val
+        return self._record(new_val, ((self, new_val * np.log(other)),))
+
+    """ unary operators """
+    def __neg__(self):
+        """
+        inputs: self: ReverseAutoDiff object
+        returns ReverseAutoDiff object of negative function of the form - self
+
+        """
+        return self._record(- self.val, ((self, -1.),))
+
+    """ elementary functions """
+    def sin(self):
+        """
+        inputs: self: ReverseAutoDiff object
+        returns ReverseAutoDiff object of sine function of the form sine(self)
+
+        """
+        new_val = _elementary('sin', self.val)
+        return self._record(new_val, ((self, _elementary('cos', self.val)),))
+
+    def cos(self):
+        """
+        inputs: self: ReverseAutoDiff object
+        returns ReverseAutoDiff object of cosine function of the form cosine(self)
+
+        """
+        new_val = _elementary('cos', self.val)
+        return self._record(new_val, ((self, - _elementary('sin', self.val)),))
+
+    def tan(self):
+        """
+        inputs: self: ReverseAutoDiff object
+        returns ReverseAutoDiff object of tangent function of the form tangent(self)
+
+        """
+        new_val = _elementary('tan', self.val)
+        return self._record(new_val, ((self, 1 / (_elementary('cos', self.val) ** 2)),))
+
+    """ inverse trig functions """
+    def arcsine(self):
+        """
+        inputs: self: ReverseAutoDiff object
+        returns ReverseAutoDiff object of arcsine function of the form arcsine(self)
+
+        """
+        new_val = _elementary('arcsine', self.val)
+        return self._record(new_val, ((self, 1 / _elementary('sqrt', 1 - self.val ** 2)),))
+
+    def arccosine(self):
+        """
+        inputs: self: ReverseAutoDiff object
+        returns ReverseAutoDiff object of arccosine function of the form arccosine(self)
+
+        """
+        new_val = _elementary('arccosine', self.val)
+        return self._record(new_val, ((self, - 1 / _elementary('sqrt', 1 - self.val ** 2)),))
+
+    def arctangent(self):
+        """
+        inputs: self: ReverseAutoDiff object
+        returns ReverseAutoDiff object of arctangent function of the form arctangent(self)
+
+        """
+        new_val = _elementary('arctangent', self.val)
+        return self._record(new_val, ((self, 1 / (1 + self.val ** 2)),))
+
+    """ hyperbolic functions """
+    def sinh(self):
+        """
+        inputs: self: ReverseAutoDiff object
+        returns ReverseAutoDiff object of sinh function of the form sinh(self)
+
+        """
+        new_val = _elementary('sinh', self.val)
+        return self._record(new_val, ((self, _elementary('cosh', self.val)),))
+
+    def cosh(self):
+        """
+        inputs: self: ReverseAutoDiff object
+        returns ReverseAutoDiff object of cosh function of the form cosh(self)
+
+        """
+        new_val = _elementary('cosh', self.val)
+        return self._record(new_val, ((self, _elementary('sinh', self.val)),))
+
+    def tanh(self):
+        """
+        inputs: self: ReverseAutoDiff object
+        returns ReverseAutoDiff object of tanh function of the form tanh(self)
+
+        """
+        new_val = _elementary('tanh', self.val)
+        return self._record(new_val, ((self, 1 / (_elementary('cosh', self.val) ** 2)),))
+
+    def ln(self):
+        """
+        inputs: self: ReverseAutoDiff object
+        returns ReverseAutoDiff object of natural log (ln) function of the form ln(self)
+
+        """
+        new_val = _elementary('ln', self.val)
+        return self._record(new_val, ((self, 1 / self.val),))
+
+    def log(self, base):
+        """
+        inputs: self: ReverseAutoDiff object, base: scalar
+        returns ReverseAutoDiff object of log function with base = base of the form log(self, base)
+
+        """
+        return self._record(_elementary('ln', self.val) / np.log(base),
+                            ((self, 1 / (self.val * np.log(base))),))
+
+    def exp(self):
+        """
+        inputs: self: ReverseAutoDiff object
+        returns ReverseAutoDiff object of exponential function of the form exp(self)
+
+        """
+        new_val = _elementary('exp', self.val)
+        return self._record(new_val, ((self, new_val),))
+
+    def expm(self, base):
+        """
+        inputs: self: ReverseAutoDiff object, base: scalar
+        returns ReverseAutoDiff object of exponential function of the form base ** self
+
+        """
+        new_val = base ** self.val
+        return self._record(new_val, ((self, new_val * np.log(base)),))
+
+    def logistic(self):
+        """
+        inputs: self: ReverseAutoDiff object
+        returns ReverseAutoDiff object of logistic function of the form logistic(self)
+
+        """
+        new_val = 1 / (1 + _elementary('exp', - self.val))
+        return self._record(new_val, ((self, new_val * (1 - new_val)),))
+
+    def sqrt(self):
+        """
+        inputs: self: ReverseAutoDiff object
+        returns ReverseAutoDiff object of sqrt function of the form sqrt(self)
+
+        """
+        new_val = self.val ** (1/2)
+        return self._record(new_val, ((self, 1 / (2 * new_val)),))
+
+
+def gradient(func, values):
+    '''
+        Computes the value and gradient of a scalar function in reverse mode.
+        The function is evaluated once while the operations are recorded on a tape,
+        and the whole gradient is recovered by one reverse sweep over that tape.
+
+        INPUTS:
+          func: callable
+                function taking a list of ReverseAutoDiff objects and returning a
+                ReverseAutoDiff object
+
+          values: list or np.ndarray
+                  point at which to evaluate the function, one entry per input
+
+        OUTPUTS:
+          val: scalar or np.ndarray
+               value of func at values
+
+          grad: np.ndarray
+                derivative of func with respect to each input
+    '''
+    tape = Tape()
+    inputs = [tape.variable(v) for v in values]
+    output = func(inputs)
+
+    # Function does not depend on its inputs
+    if(not isinstance(output, ReverseAutoDiff)):
+        return output, np.zeros(len(inputs))
+
+    tape.backward(output)
+    grad = [np.zeros(np.shape(x.val)) if x.adjoint is None else x.adjoint for x in inputs]
+    return output.val, np.array(grad, dtype=float)
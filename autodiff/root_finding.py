@@ -1,23 +1,87 @@
 import sys
 #from autodiff import AutoDiff as ad
 from autodiff.autodiff import AutoDiff as ad
+from autodiff.advector import ADVector
+from autodiff.derivatives import value_and_jacobian
+from autodiff.cache import cached_function
+from autodiff.sparsity import SparseJacobian, jacobian_sparsity, color_columns, \
+    compressed_jacobian
 import numpy as np
 
 
-def _inv_jacobian(num):
-    jac = np.array([list(n.der) for n in num])
-    return np.linalg.pinv(jac)
+def _values(num):
+    '''
+        Internal function returning the values of a function output, either an
+        ADVector or a list of AutoDiff objects
+    '''
+    if(isinstance(num, ADVector)):
+        return num.val
+    return np.array([n.val for n in num], dtype=float)
 
 
-def newton(func, num, tol=1e-10, max_iter=10000, return_trace=False):
+def _jacobian(num):
+    '''
+        Internal function stacking the derivatives of a function output into its
+        Jacobian matrix. A Jacobian already computed as a float array is returned as is,
+        a SparseJacobian is made dense.
+    '''
+    if(isinstance(num, SparseJacobian)):
+        return num.toarray()
+    if(isinstance(num, np.ndarray) and num.dtype != object):
+        return num
+    if(isinstance(num, ADVector)):
+        return num.der
+    return np.array([n.der for n in num], dtype=float)
+
+
+def _evaluate(func, x, chunk_size, coloring=None):
+    '''
+        Internal function evaluating func at x. Returns the function output, from which
+        the Jacobian is read off the seeded derivatives, or the Jacobian computed in
+        chunks when chunk_size is given, or from the compressed seeds of the column
+        coloring (pattern, colors) when given, together with the output values. The
+        values are None when the output is not a list, array or ADVector.
+    '''
+    if(coloring is not None):
+        f_val, jac = compressed_jacobian(func, x, *coloring)
+        return jac, f_val
+
+    if(chunk_size is None):
+        output = func(x)
+        if(isinstance(output, (list, tuple, np.ndarray, ADVector))):
+            return output, _values(output)
+        return output, None
+
+    size = None if chunk_size == 'auto' else chunk_size
+    f_val, jac = value_and_jacobian(func, x, size)
+    return jac, f_val
+
+
+def _newton_step(num, f_val):
+    '''
+        Internal function returning the Newton step, the solution of J step = f_val for
+        the Jacobian J of num, w/ one LU solve. Singular and non-square Jacobians get
+        the least squares step of smallest norm, as the pseudo-inverse would give.
+    '''
+    jac = _jacobian(num)
+    if(jac.ndim == 2 and jac.shape[0] == jac.shape[1]):
+        try:
+            return np.linalg.solve(jac, f_val)
+        except np.linalg.LinAlgError:
+            pass
+    return np.linalg.lstsq(np.atleast_2d(jac), f_val, rcond=None)[0]
+
+
+def newton(func, num, tol=1e-10, max_iter=10000, return_trace=False, chunk_size=None,
+           sparse=False):
     '''
         This function runs Newton's method of root finding.
 
         INPUTS:
-          num: np.ndarray of AutoDiff objects
+          num: np.ndarray of AutoDiff objects or ADVector
                an autodiff number object
 
-          func: callable, input is array of AutoDiff objects
+          func: callable, input is an ADVector
                 the function we are trying to find the root of
 
           tol: float, optional (default = 1e-10)
@@ -29,6 +93,18 @@ def newton(func, num, tol=1e-10, max_iter=10000, return_trace=False):
           return_trace: boolean, optional (default = False)
                         Returns trace of minimization procedure if True
 
+          chunk_size: int or 'auto', optional (default = None)
+                      If None, the Jacobian comes from the derivatives seeded in num.
+                      Otherwise it is computed by derivatives.jacobian with chunk_size
+                      seed directions per pass ('auto' picks the size), which bounds
+                      memory for large systems
+
+          sparse: boolean, optional (default = False)
+                  If True, the sparsity pattern of the Jacobian is detected once at num
+                  and every Jacobian is computed w/ one seed direction per color of its
+                  columns (see autodiff.sparsity), e.g. 3 for a tridiagonal system of
+                  any size. Cannot be combined w/ chunk_size
+
         OUTPUT:
             root: AutoDiff object
                   The value of the root and derivative at the root.
@@ -46,60 +122,73 @@ def newton(func, num, tol=1e-10, max_iter=10000, return_trace=False):
             First, you must start in a good starting position, otherwise the algorithm may not
             converge. Also, the function must approach the root smooth enough to converge.
 
-            Function output must be a list or array, even for scalar valued functions.
-            For example:
+            Function output must be a list, array or ADVector, even for scalar valued
+            functions. For example:
 
             >>> lambda x: x[0] # This throws an error because the output is a scalar
             >>> lambda x: [x[0]] # This works because the output is a list
+
+            Outputs of func are cached per point, see autodiff.cache.
+
+            sparse=True only makes computing the Jacobian cheaper. Each step still
+            densifies it and solves the Newton system w/ np.linalg.solve, which takes
+            O(n^2) memory and O(n^3) time, as numpy has no sparse solver.
             
     '''
-    last = np.array([-999]*len(num))
-    root = [n.val for n in num]
-    default_der = np.copy([num[i].der for i in range(len(num))])
+    if(sparse and chunk_size is not None):
+        raise ValueError("chunk_size and sparse cannot be combined")
+    # Repeated evaluations at the same point are answered from a small cache
+    func = cached_function(func, 2)
+
+    # Values and seeds are kept in contiguous buffers, updated in place
+    x = ADVector.from_autodiff(num)
     if(return_trace):
         trace = [np.copy([n for n in num])]
 
+    # The pattern is structural, so the coloring is reused at every iterate
+    coloring = None
+    if(sparse):
+        pattern = jacobian_sparsity(func, x)
+        coloring = (pattern, color_columns(pattern))
+
     # Started at root case
-    if(isinstance(func(num), ad)):
+    output, f_val = _evaluate(func, x, chunk_size, coloring)
+    if(f_val is None or np.ndim(f_val) == 0):
         err_str = "Function output must be list, even for scalar functions."
         err_str += "\nTry returning your function output as a list: return [output]."
         raise TypeError(err_str)
 
-    f_val = np.copy([f.val for f in func(num)])
-
     if(np.linalg.norm(f_val) < tol):
-        print("WHAT")
-        return num, False, 0, np.array(trace)
+        if(return_trace):
+            return x.to_autodiff(), False, 0, np.array(trace)
+        else:
+            return x.to_autodiff(), False, 0
 
     # Root finding algorithm. Terminates after 200 steps with error message
     iterations = 0
     while(np.linalg.norm(f_val) > 1e-10):
 
-        last = np.copy([n.val for n in num])
-        num = func(num)
-
         # Catch zero derivatives
-        if(len(num)==1 and np.linalg.norm([n.der for n in num]) == 0):
+        if(len(f_val)==1 and np.linalg.norm(_jacobian(output)) == 0):
             raise FloatingPointError("ZERO DERIVATIVE")
 
-        root -= np.dot(_inv_jacobian(num), num)
-        num = np.copy([ad(v.val, default_der[j]) for j, v in enumerate(root)])
+        x.val -= _newton_step(output, f_val)
 
-        f_val = np.copy([f.val for f in func(num)])
+        output, f_val = _evaluate(func, x, chunk_size, coloring)
 
         if(return_trace):
-            trace.append(np.copy([n for n in num]))
+            trace.append(x.to_autodiff())
         iterations += 1
         if(iterations == max_iter):
             if(return_trace):
-                return num, False, iterations, np.array(trace)
+                return x.to_autodiff(), False, iterations, np.array(trace)
             else:
-                return num, False, iterations
+                return x.to_autodiff(), False, iterations
 
     if(return_trace):
-        return num, True, iterations, np.array(trace)
+        return x.to_autodiff(), True, iterations, np.array(trace)
     else:
-        return num, True, iterations
+        return x.to_autodiff(), True, iterations
 
 #if __name__ == '__main__':
 #    x = ad(1, [1., 0., 0.])
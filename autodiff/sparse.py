@@ -0,0 +1,347 @@
+import numpy as np
+
+
+class SparseDer():
+    """
+    Sparse derivative vector stored as sorted index/value pairs, for use as the
+    der of an AutoDiff object. Only the entries an intermediate actually depends
+    on are stored, so seeding n inputs costs O(n) memory instead of O(n^2).
+
+    Attributes:
+
+    indices: sorted np.ndarray of ints, positions of the stored entries
+    values: np.ndarray, derivative values at those positions
+    size: int, length of the dense derivative vector
+
+    """
+
+    # Make numpy scalars and arrays defer to the reflected operators below
+    __array_ufunc__ = None
+
+    ndim = 1
+
+    def __init__(self, indices, values, size):
+        """
+        Initializes SparseDer object. indices must be sorted and unique.
+
+        """
+        self.indices = np.asarray(indices, dtype=np.intp)
+        self.values = np.asarray(values, dtype=float)
+        self.size = size
+
+    @classmethod
+    def unit(cls, index, size, value=1.):
+        """
+        inputs: index: int, size: int, value: scalar
+        returns SparseDer object with value at index and zero elsewhere
+
+        """
+        return cls([index], [value], size)
+
+    @classmethod
+    def from_dense(cls, der):
+        """
+        inputs: der: list or np.ndarray
+        returns SparseDer object holding the nonzero entries of der
+
+        """
+        der = np.asarray(der, dtype=float)
+        indices = np.flatnonzero(der)
+        return cls(indices, der[indices], len(der))
+
+    @property
+    def shape(self):
+        """
+        returns shape of the dense derivative vector
+
+        """
+        return (self.size,)
+
+    @property
+    def nnz(self):
+        """
+        returns number of stored entries
+
+        """
+        return len(self.indices)
+
+    def toarray(self):
+        """
+        returns dense np.ndarray of the derivative
+
+        """
+        dense = np.zeros(self.size)
+        dense[self.indices] = self.values
+        return dense
+
+    def __str__(self):
+        """
+        returns string value of the derivative
+
+        """
+        return "SparseDer({},{},{})".format(self.indices, self.values, self.size)
+
+    def __repr__(self):
+        """
+        returns string value of the derivative
+
+        """
+        return "SparseDer({},{},{})".format(self.indices, self.values, self.size)
+
+    def _merge(self, other, sign):
+        """
+        returns SparseDer of self + sign * other, taking the union of both patterns
+
+        """
+        if(self.size != other.size):
+            raise ValueError("Derivative sizes do not match: {} and {}".format(self.size,
+                                                                              other.size))
+        if(np.array_equal(self.indices, other.indices)):
+            return SparseDer(self.indices, self.values + sign * other.values, self.size)
+
+        indices, inverse = np.unique(np.concatenate((self.indices, other.indices)),
+                                     return_inverse=True)
+        values = np.bincount(inverse, np.concatenate((self.values, sign * other.values)),
+                             minlength=len(indices))
+        return SparseDer(indices, values, self.size)
+
+    """binary operators"""
+    def __add__(self, other):
+        """
+        inputs: self: SparseDer object, other: SparseDer object or dense array
+        returns derivative of the form self + other, sparse if both inputs are sparse
+
+        """
+        if(isinstance(other, SparseDer)):
+            return self._merge(other, 1.)
+        return self.toarray() + other
+
+    def __radd__(self, other):
+        """
+        inputs: self: SparseDer object, other: dense array
+        returns dense derivative of the form other + self
+
+        """
+        return other + self.toarray()
+
+    def __sub__(self, other):
+        """
+        inputs: self: SparseDer object, other: SparseDer object or dense array
+        returns derivative of the form self - other, sparse if both inputs are sparse
+
+        """
+        if(isinstance(other, SparseDer)):
+            return self._merge(other, -1.)
+        return self.toarray() - other
+
+    def __rsub__(self, other):
+        """
+        inputs: self: SparseDer object, other: dense array
+        returns dense derivative of the form other - self
+
+        """
+        return other - self.toarray()
+
+    def __mul__(self, other):
+        """
+        inputs: self: SparseDer object, other: scalar
+        returns SparseDer object of the form self * other. Non-scalar factors densify.
+
+        """
+        if(np.ndim(other) == 0):
+            return SparseDer(self.indices, self.values * other, self.size)
+        return self.toarray() * other
+
+    def __rmul__(self, other):
+        """
+        inputs: self: SparseDer object, other: scalar
+        returns SparseDer object of the form other * self
+
+        """
+        return self.__mul__(other)
+
+    def __truediv__(self, other):
+        """
+        inputs: self: SparseDer object, other: scalar
+        returns SparseDer object of the form self / other. Non-scalar divisors densify.
+
+        """
+        if(np.ndim(other) == 0):
+            return SparseDer(self.indices, self.values / other, self.size)
+        return self.toarray() / other
+
+    """ unary operators """
+    def __neg__(self):
+        """
+        inputs: self: SparseDer object
+        returns SparseDer object of the form - self
+
+        """
+        return SparseDer(self.indices, - self.values, self.size)
+
+
+class PatternDer():
+    """
+    Derivative that only records which inputs an intermediate depends on, for
+    detecting the sparsity pattern of a Jacobian. Sums take the union of both patterns
+    and products keep the pattern whatever the factor, so the result is structural:
+    entries that cancel or vanish at the evaluation point are still marked.
+
+    Attributes:
+
+    mask: np.ndarray of bools, True where the derivative may be nonzero. Has the
+          shape a dense derivative would have, e.g. (n,) for a scalar and (k, n) for
+          a vector of k values
+
+    """
+
+    # Make numpy scalars and arrays defer to the reflected operators below
+    __array_ufunc__ = None
+
+    def __init__(self, mask):
+        """
+        Initializes PatternDer object from a boolean mask
+
+        """
+        self.mask = np.asarray(mask, dtype=bool)
+
+    @classmethod
+    def identity(cls, n):
+        """
+        inputs: n: int
+        returns PatternDer object seeding n inputs, each depending on itself only
+
+        """
+        return cls(np.eye(n, dtype=bool))
+
+    @property
+    def shape(self):
+        """
+        returns shape of the dense derivative
+
+        """
+        return self.mask.shape
+
+    @property
+    def ndim(self):
+        """
+        returns number of axes of the dense derivative
+
+        """
+        return self.mask.ndim
+
+    def toarray(self):
+        """
+        returns dense float np.ndarray w/ 1 where the derivative may be nonzero
+
+        """
+        return self.mask.astype(float)
+
+    def __getitem__(self, index):
+        """
+        inputs: index: int, slice or index array
+        returns PatternDer object of the selected rows
+
+        """
+        return PatternDer(self.mask[index])
+
+    def __str__(self):
+        """
+        returns string value of the pattern
+
+        """
+        return "PatternDer({})".format(self.mask)
+
+    def __repr__(self):
+        """
+        returns string value of the pattern
+
+        """
+        return "PatternDer({})".format(self.mask)
+
+    def _union(self, other):
+        """
+        returns PatternDer of the entries set in self or in other, a PatternDer object
+        or a dense derivative
+
+        """
+        if(isinstance(other, PatternDer)):
+            return PatternDer(self.mask | other.mask)
+        return PatternDer(self.mask | (np.asarray(other) != 0))
+
+    def _scale(self, other):
+        """
+        returns PatternDer of self multiplied or divided by other, broadcast to the
+        shape of the product
+
+        """
+        shape = np.broadcast(self.mask, np.empty(np.shape(other), dtype=bool)).shape
+        if(shape == self.mask.shape):
+            return self
+        return PatternDer(np.broadcast_to(self.mask, shape))
+
+    """binary operators"""
+    def __add__(self, other):
+        """
+        inputs: self: PatternDer object, other: PatternDer object or dense array
+        returns PatternDer object of the union of both patterns
+
+        """
+        return self._union(other)
+
+    def __radd__(self, other):
+        """
+        inputs: self: PatternDer object, other: dense array
+        returns PatternDer object of the union of both patterns
+
+        """
+        return self._union(other)
+
+    def __sub__(self, other):
+        """
+        inputs: self: PatternDer object, other: PatternDer object or dense array
+        returns PatternDer object of the union of both patterns
+
+        """
+        return self._union(other)
+
+    def __rsub__(self, other):
+        """
+        inputs: self: PatternDer object, other: dense array
+        returns PatternDer object of the union of both patterns
+
+        """
+        return self._union(other)
+
+    def __mul__(self, other):
+        """
+        inputs: self: PatternDer object, other: scalar or array
+        returns PatternDer object w/ the pattern of self
+
+        """
+        return self._scale(other)
+
+    def __rmul__(self, other):
+        """
+        inputs: self: PatternDer object, other: scalar or array
+        returns PatternDer object w/ the pattern of self
+
+        """
+        return self._scale(other)
+
+    def __truediv__(self, other):
+        """
+        inputs: self: PatternDer object, other: scalar or array
+        returns PatternDer object w/ the pattern of self
+
+        """
+        return self._scale(other)
+
+    """ unary operators """
+    def __neg__(self):
+        """
+        inputs: self: PatternDer object
+        returns PatternDer object w/ the pattern of self
+
+        """
+        return self
@@ -0,0 +1,255 @@
+import numpy as np
+from autodiff.autodiff import AutoDiff
+from autodiff.advector import ADVector
+from autodiff.derivatives import _value_and_der
+from autodiff.sparse import PatternDer
+
+
+class SparseJacobian():
+    """
+    Jacobian stored in compressed sparse row form, w/o depending on scipy
+
+    Attributes:
+
+    data: np.ndarray, values of the stored entries, row by row
+    indices: np.ndarray of ints, column of each stored entry
+    indptr: np.ndarray of ints of length m + 1, the entries of row i are
+            data[indptr[i]:indptr[i + 1]]
+    shape: tuple (m, n)
+
+    """
+
+    def __init__(self, data, indices, indptr, shape):
+        """
+        Initializes SparseJacobian object from its compressed sparse row arrays
+
+        """
+        self.data = np.asarray(data, dtype=float)
+        self.indices = np.asarray(indices, dtype=np.intp)
+        self.indptr = np.asarray(indptr, dtype=np.intp)
+        self.shape = tuple(shape)
+
+    @classmethod
+    def from_dense(cls, jac):
+        """
+        inputs: jac: np.ndarray of shape (m, n)
+        returns SparseJacobian object holding the nonzero entries of jac
+
+        """
+        jac = np.asarray(jac, dtype=float)
+        mask = jac != 0
+        rows, cols = np.nonzero(mask)
+        indptr = np.concatenate(([0], np.cumsum(mask.sum(axis=1))))
+        return cls(jac[rows, cols], cols, indptr, jac.shape)
+
+    @property
+    def nnz(self):
+        """
+        returns number of stored entries
+
+        """
+        return len(self.data)
+
+    def _rows(self):
+        """
+        returns row of each stored entry
+
+        """
+        return np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+
+    def toarray(self):
+        """
+        returns dense np.ndarray of shape (m, n)
+
+        """
+        dense = np.zeros(self.shape)
+        dense[self._rows(), self.indices] = self.data
+        return dense
+
+    def dot(self, v):
+        """
+        inputs: v: np.ndarray of shape (n,) or (n, k)
+        returns matrix product of the Jacobian and v, w/o forming the dense Jacobian
+
+        """
+        v = np.asarray(v)
+        out = np.zeros((self.shape[0],) + v.shape[1:], dtype=np.result_type(self.data, v))
+        products = self.data.reshape((-1,) + (1,) * (v.ndim - 1)) * v[self.indices]
+        np.add.at(out, self._rows(), products)
+        return out
+
+    def __matmul__(self, v):
+        """
+        inputs: v: np.ndarray of shape (n,) or (n, k)
+        returns matrix product of the Jacobian and v
+
+        """
+        return self.dot(v)
+
+    def __str__(self):
+        """
+        returns string value of the Jacobian
+
+        """
+        return "SparseJacobian({},{},{},{})".format(self.data, self.indices, self.indptr,
+                                                   self.shape)
+
+    def __repr__(self):
+        """
+        returns string value of the Jacobian
+
+        """
+        return "SparseJacobian({},{},{},{})".format(self.data, self.indices, self.indptr,
+                                                   self.shape)
+
+
+def _pattern_rows(output, n):
+    '''
+        Internal function returning the boolean pattern of a function output, which is
+        an AutoDiff object, an ADVector or a list of either, as an (m, n) array
+    '''
+    def mask(o):
+        if(not isinstance(o, AutoDiff)):
+            return np.zeros(np.shape(o) + (n,), dtype=bool)
+        if(isinstance(o.der, PatternDer)):
+            return o.der.mask
+        return np.asarray(o.der) != 0
+
+    if(isinstance(output, (list, tuple, np.ndarray))):
+        return np.array([mask(o) for o in output], dtype=bool).reshape(-1, n)
+    return np.reshape(mask(output), (-1, n))
+
+
+def jacobian_sparsity(func, x):
+    '''
+        Detects which outputs of a function depend on which inputs, by evaluating it
+        once on inputs whose derivatives are PatternDer objects. Sums propagate the
+        union of the index sets and products keep them, so the pattern is structural
+        and does not miss entries that happen to vanish at x.
+
+        INPUTS:
+          func: callable
+                function taking an ADVector and returning an AutoDiff object, an
+                ADVector or a list of AutoDiff objects
+
+          x: list, np.ndarray or ADVector
+             point at which to evaluate the function
+
+        OUTPUTS:
+          pattern: np.ndarray of bools of shape (m, n)
+                   True where output i may depend on input j
+
+        NOTE:
+          The pattern is only valid at other points if func does not branch on the
+          value of its inputs.
+    '''
+    x = np.array(getattr(x, 'val', x), dtype=float)
+    n = len(x)
+    return _pattern_rows(func(ADVector(x, PatternDer.identity(n))), n)
+
+
+def color_columns(pattern):
+    '''
+        Colors the columns of a sparsity pattern so that no two columns of the same
+        color have an entry in the same row. Columns are colored greedily, those w/
+        the most entries first, w/ the smallest color not used by a conflicting column.
+
+        INPUTS:
+          pattern: np.ndarray of bools of shape (m, n)
+
+        OUTPUTS:
+          colors: np.ndarray of ints of shape (n,)
+                  color of each column, from 0 to the number of colors - 1
+    '''
+    pattern = np.asarray(pattern, dtype=bool)
+    m, n = pattern.shape
+    rows_of = [np.flatnonzero(pattern[:, j]) for j in range(n)]
+    cols_of = [np.flatnonzero(pattern[i]) for i in range(m)]
+
+    colors = np.full(n, -1, dtype=np.intp)
+    for j in np.argsort(- pattern.sum(axis=0), kind='stable'):
+        forbidden = set()
+        for i in rows_of[j]:
+            forbidden.update(colors[cols_of[i]].tolist())
+        color = 0
+        while(color in forbidden):
+            color += 1
+        colors[j] = color
+    return colors
+
+
+def compressed_jacobian(func, x, pattern, colors):
+    '''
+        Computes the value and sparse Jacobian of a function in a single forward pass
+        w/ one seed direction per color, the sum of the unit directions of the columns
+        of that color. Since columns of one color never share a row, each entry of the
+        compressed Jacobian belongs to exactly one column.
+
+        INPUTS:
+          func: callable
+                function taking an ADVector and returning an AutoDiff object, an
+                ADVector or a list of AutoDiff objects
+
+          x: list, np.ndarray or ADVector
+             point at which to evaluate the Jacobian
+
+          pattern: np.ndarray of bools of shape (m, n)
+                   sparsity pattern, see jacobian_sparsity
+
+          colors: np.ndarray of ints of shape (n,)
+                  column coloring of the pattern, see color_columns
+
+        OUTPUTS:
+          val: scalar or np.ndarray of shape (m,)
+               value of func at x
+
+          jac: SparseJacobian of shape (m, n)
+    '''
+    x = np.array(getattr(x, 'val', x), dtype=float)
+    pattern = np.asarray(pattern, dtype=bool)
+    colors = np.asarray(colors, dtype=np.intp)
+    n = len(x)
+    k = int(colors.max()) + 1 if n else 0
+
+    seed = np.zeros((n, k))
+    seed[np.arange(n), colors] = 1.
+    val, block = _value_and_der(func(ADVector(x, seed)), k)
+    block = np.reshape(block, (-1, k))
+
+    rows, cols = np.nonzero(pattern)
+    indptr = np.concatenate(([0], np.cumsum(pattern.sum(axis=1))))
+    return val, SparseJacobian(block[rows, colors[cols]], cols, indptr, pattern.shape)
+
+
+def sparse_jacobian(func, x, pattern=None, colors=None):
+    '''
+        Computes the value and Jacobian of a function w/ as many forward directions as
+        colors of its columns instead of one per input, e.g. 3 for a tridiagonal
+        Jacobian of any size. See jacobian_sparsity, color_columns and
+        compressed_jacobian.
+
+        INPUTS:
+          func: callable
+                function taking an ADVector and returning an AutoDiff object, an
+                ADVector or a list of AutoDiff objects
+
+          x: list, np.ndarray or ADVector
+             point at which to evaluate the Jacobian
+
+          pattern: np.ndarray of bools of shape (m, n), optional (default = None)
+                   sparsity pattern, detected at x if None
+
+          colors: np.ndarray of ints of shape (n,), optional (default = None)
+                  column coloring, computed from pattern if None
+
+        OUTPUTS:
+          val: scalar or np.ndarray of shape (m,)
+               value of func at x
+
+          jac: SparseJacobian of shape (m, n)
+    '''
+    if(pattern is None):
+        pattern = jacobian_sparsity(func, x)
+    if(colors is None):
+        colors = color_columns(pattern)
+    return compressed_jacobian(func, x, pattern, colors)
@@ -0,0 +1,485 @@
+import numpy as np
+from math import factorial
+
+
+class Taylor():
+    """
+    Implementation of truncated Taylor polynomial arithmetic for high order univariate
+    derivatives. Each object carries the normalized coefficients f^(k)(x) / k! for
+    k = 0..K, and every operation updates all of them with the standard O(K^2)
+    recurrences, so one pass gives all K derivatives.
+
+    Attributes:
+
+    coeffs: np.ndarray of shape (K + 1,), Taylor coefficients of the function at x
+
+    """
+
+    def __init__(self, coeffs):
+        """
+        Initializes Taylor object w/ its Taylor coefficients.
+
+        """
+        if isinstance(coeffs, str):
+            raise TypeError("Cannot accept string values")
+        elif isinstance(coeffs, list) and any(type(item)==str for item in coeffs):
+            raise TypeError("Cannot accept string values")
+
+        self.coeffs = np.array(coeffs, dtype=float)
+        if self.coeffs.ndim != 1 or len(self.coeffs) == 0:
+            raise ValueError("Taylor coefficients must be a non-empty one dimensional array")
+
+    @classmethod
+    def variable(cls, x, order):
+        """
+        inputs: x: scalar, order: int
+        returns Taylor object of the identity function at x, truncated after order terms
+
+        """
+        coeffs = np.zeros(order + 1)
+        coeffs[0] = x
+        if order > 0:
+            coeffs[1] = 1.
+        return cls(coeffs)
+
+    @property
+    def val(self):
+        """
+        returns value of the function, the 0th coefficient
+
+        """
+        return self.coeffs[0]
+
+    @property
+    def order(self):
+        """
+        returns highest derivative order K carried by this object
+
+        """
+        return len(self.coeffs) - 1
+
+    def derivatives(self):
+        """
+        returns np.ndarray of the derivatives f(x), f'(x), ..., f^(K)(x)
+
+        """
+        return self.coeffs * np.array([factorial(k) for k in range(len(self.coeffs))],
+                                      dtype=float)
+
+    def _coerce(self, other):
+        """
+        returns coefficients of other, a Taylor object or a constant, at this order
+
+        """
+        try:
+            if len(other.coeffs) != len(self.coeffs):
+                raise ValueError("Taylor orders do not match")
+            return other.coeffs
+        except AttributeError:
+            coeffs = np.zeros(len(self.coeffs))
+            coeffs[0] = other
+            return coeffs
+
+    def _compose(self, f, df):
+        """
+        inputs: f: value of a function g at the 0th coefficient, df: Taylor object of g'(self)
+        returns Taylor object of g(self), integrating g(self)' = g'(self) * self'
+
+        """
+        a = self.coeffs
+        k = np.arange(1, len(a))
+        da = k * a[1:]
+        coeffs = np.empty(len(a))
+        coeffs[0] = f
+        coeffs[1:] = np.convolve(df.coeffs[:-1], da)[:len(a) - 1] / k
+        return Taylor(coeffs)
+
+    def __str__(self):
+        """
+        returns string value of the function
+
+        """
+        return "Taylor({})".format(self.coeffs)
+
+    def __repr__(self):
+        """
+        returns string value of the function
+
+        """
+        return "Taylor({})".format(self.coeffs)
+
+    """ Comparison operators """
+    def __eq__(self, other):
+        '''
+        inputs: self: Taylor object, other: Taylor object or scalar
+        returns boolean, True if value of self is equal to other else False
+        '''
+        try:
+            return self.val == other.val
+        except AttributeError:
+            return self.val == other
+
+    def __ne__(self, other):
+        '''
+        inputs: self: Taylor object, other: Taylor object or scalar
+        returns boolean, True if value of self is not equal to other else False
+        '''
+        try:
+            return self.val != other.val
+        except AttributeError:
+            return self.val != other
+
+    def __gt__(self, other):
+        '''
+        inputs: self: Taylor object, other: Taylor object or scalar
+        returns boolean, True if value of self is greater than other else False
+        '''
+        try:
+            return self.val > other.val
+        except AttributeError:
+            return self.val > other
+
+    def __ge__(self, other):
+        '''
+        inputs: self: Taylor object, other: Taylor object or scalar
+        returns boolean, True if value of self is greater than or equal to other else False
+        '''
+        try:
+            return self.val >= other.val
+        except AttributeError:
+            return self.val >= other
+
+    def __lt__(self, other):
+        '''
+        inputs: self: Taylor object, other: Taylor object or scalar
+        returns boolean, True if value of self is less than other else False
+        '''
+        try:
+            return self.val < other.val
+        except AttributeError:
+            return self.val < other
+
+    def __le__(self, other):
+        '''
+        inputs: self: Taylor object, other: Taylor object or scalar
+        returns boolean, True if value of self is less than or equal to other else False
+        '''
+        try:
+            return self.val <= other.val
+        except AttributeError:
+            return self.val <= other
+
+    """binary operators"""
+    def __add__(self, other):
+        """
+        inputs: self: Taylor object, other: Taylor object or scalar
+        returns Taylor object of addition of two inputs in the form self + other
+
+        """
+        return Taylor(self.coeffs + self._coerce(other))
+
+    def __radd__(self, other):
+        """
+        inputs: self: Taylor object, other: scalar
+        returns Taylor object of addition of two inputs in the form other + self
+
+        """
+        return self.__add__(other)
+
+    def __sub__(self, other):
+        """
+        inputs: self: Taylor object, other: Taylor object or scalar
+        returns Taylor object of subtraction of two inputs in the form self - other
+
+        """
+        return Taylor(self.coeffs - self._coerce(other))
+
+    def __rsub__(self, other):
+        """
+        inputs: self: Taylor object, other: scalar
+        returns Taylor object of subtraction of two inputs in the form other - self
+
+        """
+        return Taylor(self._coerce(other) - self.coeffs)
+
+    def __mul__(self, other):
+        """
+        inputs: self: Taylor object, other: Taylor object or scalar
+        returns Taylor object of multiplication of two inputs in the form self * other
+
+        """
+        if isinstance(other, Taylor):
+            return Taylor(np.convolve(self.coeffs, self._coerce(other))[:len(self.coeffs)])
+        return Taylor(self.coeffs * other)
+
+    def __rmul__(self, other):
+        """
+        inputs: self: Taylor object, other: scalar
+        returns Taylor object of multiplication of two inputs in the form other * self
+
+        """
+        return self.__mul__(other)
+
+    def __truediv__(self, other):
+        """
+        inputs: self: Taylor object, other: Taylor object or scalar
+        returns Taylor object of true division of two inputs in the form self / other
+
+        """
+        if not isinstance(other, Taylor):
+            return Taylor(self.coeffs / other)
+        b = self._coerce(other)
+
+        # c = a / b  =>  c_k = (a_k - sum_{j=1..k} b_j c_{k-j}) / b_0
+        a = self.coeffs
+        c = np.zeros(len(a))
+        for k in range(len(a)):
+            c[k] = (a[k] - np.dot(b[1:k + 1], c[k - 1::-1][:k])) / b[0]
+        return Taylor(c)
+
+    def __rtruediv__(self, other):
+        """
+        inputs: self: Taylor object, other: scalar
+        returns Taylor object of true division of two inputs in the form other / self
+
+        """
+        return Taylor(self._coerce(other)) / self
+
+    def __pow__(self, other):
+        """
+        inputs: self: Taylor object, other: Taylor object or scalar
+        returns Taylor object of power function of the form self ** other
+
+        """
+        if isinstance(other, Taylor):
+            return (other * self.ln()).exp()
+
+        # Non-negative integer powers by squaring, exact at a_0 = 0
+        if float(other).is_integer() and other >= 0:
+            power = Taylor(self._coerce(1.))
+            base = self
+            n = int(other)
+            while n:
+                if n % 2:
+                    power = power * base
+                n //= 2
+                if n:
+                    base = base * base
+            return power
+
+        a = self.coeffs
+        p = np.zeros(len(a))
+        if a[0] == 0:
+            # a = t^m b w/ b_0 != 0  =>  a^r = t^(m r) b^r, whose coefficients below
+            # t^(m r) are 0 and which has no finite derivatives beyond unless m r is an
+            # integer
+            nonzero = np.flatnonzero(a)
+            if len(nonzero) == 0:
+                p[:] = 0. if other > 0 else np.inf
+                return Taylor(p)
+            m = nonzero[0]
+            shift = m * other
+            if float(shift).is_integer() and shift >= 0:
+                shift = int(shift)
+                if shift < len(a):
+                    b = Taylor(np.concatenate((a[m:], np.zeros(m)))) ** other
+                    p[shift:] = b.coeffs[:len(a) - shift]
+                return Taylor(p)
+            p[max(int(np.ceil(shift)), 0):] = np.inf
+            return Taylor(p)
+
+        # p = a^r  =>  p_k = sum_{j=1..k} (r j - (k - j)) a_j p_{k-j} / (k a_0)
+        p[0] = a[0] ** other
+        for k in range(1, len(a)):
+            j = np.arange(1, k + 1)
+            p[k] = np.dot((other * j - (k - j)) * a[1:k + 1], p[k - 1::-1][:k]) / (k * a[0])
+        return Taylor(p)
+
+    def __rpow__(self, other):
+        """
+        inputs: self: Taylor object, other: scalar
+        returns Taylor object of power function of the form other ** self
+
+        """
+        return self.expm(other)
+
+    """ unary operators """
+    def __neg__(self):
+        """
+        inputs: self: Taylor object
+        returns Taylor object of negative function of the form - self
+
+        """
+        return Taylor(- self.coeffs)
+
+    """ elementary functions """
+    def _sin_cos(self):
+        """
+        returns Taylor objects of sin(self) and cos(self), computed together since
+        each recurrence needs the other
+
+        """
+        a = self.coeffs
+        s = np.zeros(len(a))
+        c = np.zeros(len(a))
+        s[0] = np.sin(a[0])
+        c[0] = np.cos(a[0])
+        for k in range(1, len(a)):
+            ja = np.arange(1, k + 1) * a[1:k + 1]
+            s[k] = np.dot(ja, c[k - 1::-1][:k]) / k
+            c[k] = - np.dot(ja, s[k - 1::-1][:k]) / k
+        return Taylor(s), Taylor(c)
+
+    def _sinh_cosh(self):
+        """
+        returns Taylor objects of sinh(self) and cosh(self), computed together since
+        each recurrence needs the other
+
+        """
+        a = self.coeffs
+        s = np.zeros(len(a))
+        c = np.zeros(len(a))
+        s[0] = np.sinh(a[0])
+        c[0] = np.cosh(a[0])
+        for k in range(1, len(a)):
+            ja = np.arange(1, k + 1) * a[1:k + 1]
+            s[k] = np.dot(ja, c[k - 1::-1][:k]) / k
+            c[k] = np.dot(ja, s[k - 1::-1][:k]) / k
+        return Taylor(s), Taylor(c)
+
+    def sin(self):
+        """
+        inputs: self: Taylor object
+        returns Taylor object of sine function of the form sine(self)
+
+        """
+        return self._sin_cos()[0]
+
+    def cos(self):
+        """
+        inputs: self: Taylor object
+        returns Taylor object of cosine function of the form cosine(self)
+
+        """
+        return self._sin_cos()[1]
+
+    def tan(self):
+        """
+        inputs: self: Taylor object
+        returns Taylor object of tangent function of the form tangent(self)
+
+        """
+        sin, cos = self._sin_cos()
+        return sin / cos
+
+    """ inverse trig functions """
+    def arcsine(self):
+        """
+        inputs: self: Taylor object
+        returns Taylor object of arcsine function of the form arcsine(self)
+
+        """
+        return self._compose(np.arcsin(self.val), (1 - self * self) ** (-1/2))
+
+    def arccosine(self):
+        """
+        inputs: self: Taylor object
+        returns Taylor object of arccosine function of the form arccosine(self)
+
+        """
+        return self._compose(np.arccos(self.val), - (1 - self * self) ** (-1/2))
+
+    def arctangent(self):
+        """
+        inputs: self: Taylor object
+        returns Taylor object of arctangent function of the form arctangent(self)
+
+        """
+        return self._compose(np.arctan(self.val), 1 / (1 + self * self))
+
+    """ hyperbolic functions """
+    def sinh(self):
+        """
+        inputs: self: Taylor object
+        returns Taylor object of sinh function of the form sinh(self)
+
+        """
+        return self._sinh_cosh()[0]
+
+    def cosh(self):
+        """
+        inputs: self: Taylor object
+        returns Taylor object of cosh function of the form cosh(self)
+
+        """
+        return self._sinh_cosh()[1]
+
+    def tanh(self):
+        """
+        inputs: self: Taylor object
+        returns Taylor object of tanh function of the form tanh(self)
+
+        """
+        sinh, cosh = self._sinh_cosh()
+        return sinh / cosh
+
+    def ln(self):
+        """
+        inputs: self: Taylor object
+        returns Taylor object of natural log (ln) function of the form ln(self)
+
+        """
+        # l = ln(a)  =>  l_k = (a_k - sum_{j=1..k-1} j l_j a_{k-j} / k) / a_0
+        a = self.coeffs
+        l = np.zeros(len(a))
+        l[0] = np.log(a[0])
+        for k in range(1, len(a)):
+            j = np.arange(1, k)
+            l[k] = (a[k] - np.dot(j * l[1:k], a[k - 1:0:-1]) / k) / a[0]
+        return Taylor(l)
+
+    def log(self, base):
+        """
+        inputs: self: Taylor object, base: scalar
+        returns Taylor object of log function with base = base of the form log(self, base)
+
+        """
+        return self.ln() / np.log(base)
+
+    def exp(self):
+        """
+        inputs: self: Taylor object
+        returns Taylor object of exponential function of the form exp(self)
+
+        """
+        # e = exp(a)  =>  e_k = sum_{j=1..k} j a_j e_{k-j} / k
+        a = self.coeffs
+        e = np.zeros(len(a))
+        e[0] = np.exp(a[0])
+        for k in range(1, len(a)):
+            e[k] = np.dot(np.arange(1, k + 1) * a[1:k + 1], e[k - 1::-1][:k]) / k
+        return Taylor(e)
+
+    def expm(self, base):
+        """
+        inputs: self: Taylor object, base: scalar
+        returns Taylor object of exponential function of the form base ** self
+
+        """
+        return (self * np.log(base)).exp()
+
+    def logistic(self):
+        """
+        inputs: self: Taylor object
+        returns Taylor object of logistic function of the form logistic(self)
+
+        """
+        return 1 / (1 + (- self).exp())
+
+    def sqrt(self):
+        """
+        inputs: self: Taylor object
+        returns Taylor object of sqrt function of the form sqrt(self)
+
+        """
+        return self ** (1/2)
@@ -0,0 +1,742 @@
+import operator
+import numpy as np
+from autodiff.autodiff import AutoDiff
+from autodiff.advector import ADVector
+from autodiff.reverse import gradient as reverse_gradient
+
+
+class TracingError(Exception):
+    """
+    Raised while tracing when a function needs something a trace cannot record, e.g.
+    the value of an input to decide a branch. The function is then evaluated eagerly.
+
+    """
+
+
+def _logistic(a):
+    '''
+        Internal function evaluating the logistic function
+    '''
+    return 1 / (1 + np.exp(- a))
+
+
+# Operation name: (value function, derivative of the result with respect to each
+# argument as a function of the argument values and the result)
+_OPS = {
+    'add': (operator.add, (lambda a, b, f: 1., lambda a, b, f: 1.)),
+    'sub': (operator.sub, (lambda a, b, f: 1., lambda a, b, f: -1.)),
+    'mul': (operator.mul, (lambda a, b, f: b, lambda a, b, f: a)),
+    'div': (operator.truediv, (lambda a, b, f: 1 / b, lambda a, b, f: - f / b)),
+    'pow': (operator.pow, (lambda a, b, f: b * a ** (b - 1), lambda a, b, f: f * np.log(a))),
+    'log': (lambda a, b: np.log(a) / np.log(b),
+            (lambda a, b, f: 1 / (a * np.log(b)), lambda a, b, f: - f / (b * np.log(b)))),
+    'neg': (operator.neg, (lambda a, f: -1.,)),
+    'sin': (np.sin, (lambda a, f: np.cos(a),)),
+    'cos': (np.cos, (lambda a, f: - np.sin(a),)),
+    'tan': (np.tan, (lambda a, f: 1 / np.cos(a) ** 2,)),
+    'arcsine': (np.arcsin, (lambda a, f: 1 / np.sqrt(1 - a ** 2),)),
+    'arccosine': (np.arccos, (lambda a, f: - 1 / np.sqrt(1 - a ** 2),)),
+    'arctangent': (np.arctan, (lambda a, f: 1 / (1 + a ** 2),)),
+    'sinh': (np.sinh, (lambda a, f: np.cosh(a),)),
+    'cosh': (np.cosh, (lambda a, f: np.sinh(a),)),
+    'tanh': (np.tanh, (lambda a, f: 1 - f ** 2,)),
+    'ln': (np.log, (lambda a, f: 1 / a,)),
+    'exp': (np.exp, (lambda a, f: f,)),
+    'logistic': (_logistic, (lambda a, f: f * (1 - f),)),
+    'sqrt': (np.sqrt, (lambda a, f: 1 / (2 * f),)),
+}
+
+# Operations whose arguments can be swapped
+_COMMUTATIVE = ('add', 'mul')
+
+# (op, position of a constant argument, constant) triples for which op returns its
+# other argument unchanged
+_IDENTITIES = {('add', 0, 0.), ('add', 1, 0.), ('sub', 1, 0.), ('mul', 0, 1.),
+               ('mul', 1, 1.), ('div', 1, 1.), ('pow', 1, 1.)}
+
+
+def _operation(op, value):
+    '''
+        Internal function returning the value function and partial derivatives of a node.
+        Fused 'affine' nodes compute a * scale + shift, w/ (scale, shift) held in value.
+    '''
+    if(op == 'affine'):
+        scale, shift = value
+        return (lambda a: a * scale + shift), (lambda a, f: scale,)
+    return _OPS[op]
+
+
+def _key(node):
+    '''
+        Internal function returning a hashable key that is equal for identical nodes
+    '''
+    op, args, value = node
+    if(op in _COMMUTATIVE):
+        args = tuple(sorted(args))
+    return op, args, None if value is None else np.asarray(value, dtype=float).tobytes()
+
+
+def _simplify(nodes, outputs):
+    '''
+        Internal graph pass folding operations on constants, removing identity operations
+        such as x * 1, rewriting x ** 2 as x * x and merging identical nodes, so every
+        distinct subexpression is computed once
+    '''
+    new = []
+    seen = {}
+    remap = []
+
+    def emit(node):
+        key = _key(node)
+        if(key not in seen):
+            seen[key] = len(new)
+            new.append(node)
+        return seen[key]
+
+    for op, args, value in nodes:
+        args = tuple(remap[a] for a in args)
+        consts = [new[a][0] == 'const' for a in args]
+
+        if(op == 'input'):
+            new.append((op, args, value))
+            remap.append(len(new) - 1)
+        elif(op != 'const' and all(consts)):
+            fn = _operation(op, value)[0]
+            remap.append(emit(('const', (), np.float64(fn(*[new[a][2] for a in args])))))
+        elif(any((op, k, float(new[a][2])) in _IDENTITIES
+                 for k, a in enumerate(args) if consts[k])):
+            k = consts.index(True)
+            remap.append(args[1 - k])
+        elif(op == 'pow' and consts[1] and new[args[1]][2] == 2):
+            remap.append(emit(('mul', (args[0], args[0]), None)))
+        else:
+            remap.append(emit((op, args, value)))
+
+    return new, [remap[o] for o in outputs]
+
+
+def _affine_form(nodes, op, args, value):
+    '''
+        Internal function returning (base, scale, shift) if the node computes
+        base * scale + shift for a single non-constant argument base, else None
+    '''
+    if(op == 'affine'):
+        return (args[0],) + tuple(value)
+    if(op == 'neg'):
+        return args[0], -1., 0.
+    if(op not in ('add', 'sub', 'mul', 'div')):
+        return None
+
+    consts = [nodes[a][0] == 'const' for a in args]
+    if(consts[0] == consts[1]):
+        return None
+    c = nodes[args[consts.index(True)]][2]
+    x = args[consts.index(False)]
+    if(op == 'add'):
+        return x, 1., c
+    if(op == 'mul'):
+        return x, c, 0.
+    if(op == 'sub'):
+        return (x, 1., - c) if consts[1] else (x, -1., c)
+    return (x, 1 / c, 0.) if consts[1] else None
+
+
+def _fuse_affine(nodes, outputs):
+    '''
+        Internal graph pass fusing chains of additions, subtractions, multiplications
+        and divisions by constants into single 'affine' nodes, when every intermediate
+        result of the chain is used only once
+    '''
+    uses = [0] * len(nodes)
+    for _, args, _ in nodes:
+        for a in args:
+            uses[a] += 1
+    for o in outputs:
+        uses[o] += 1
+
+    nodes = list(nodes)
+    forms = {}
+    for i, (op, args, value) in enumerate(nodes):
+        form = _affine_form(nodes, op, args, value)
+        if(form is None):
+            continue
+        base, scale, shift = form
+        if(base in forms and uses[base] == 1):
+            inner, inner_scale, inner_shift = forms[base]
+            base, scale, shift = inner, inner_scale * scale, inner_shift * scale + shift
+            nodes[i] = ('affine', (base,), (scale, shift))
+        forms[i] = (base, scale, shift)
+
+    return nodes, outputs
+
+
+def _eliminate_dead_code(nodes, outputs):
+    '''
+        Internal graph pass removing nodes that no output depends on. Inputs are kept
+        so that their positions do not change.
+    '''
+    needed = [op == 'input' for op, _, _ in nodes]
+    for o in outputs:
+        needed[o] = True
+    for i in range(len(nodes) - 1, -1, -1):
+        if(needed[i]):
+            for a in nodes[i][1]:
+                needed[a] = True
+
+    new = []
+    remap = {}
+    for i, (op, args, value) in enumerate(nodes):
+        if(needed[i]):
+            remap[i] = len(new)
+            new.append((op, tuple(remap[a] for a in args), value))
+    return new, [remap[o] for o in outputs]
+
+
+class Trace():
+    """
+    Flat instruction list recorded from one call of a function on Tracer inputs. After
+    compile, evaluate replays the instructions for new input values with preallocated
+    buffers and returns the value and Jacobian of the outputs from one reverse sweep.
+    Independent nodes applying the same operation are replayed w/ one numpy call, so
+    elementwise work over many inputs costs a few calls per operation, while a chain
+    of dependent nodes, e.g. a running sum, still costs one call per node.
+
+    Attributes:
+
+    nodes: list of (op, args, value) tuples in evaluation order. Inputs come first
+           with op 'input', constants have op 'const' and hold their value, fused
+           'affine' nodes hold their (scale, shift), every other node applies op from
+           _OPS to the nodes whose indices are in args
+    n_inputs: number of input nodes
+    outputs: list of indices of the nodes returned by the function
+    scalar_output: True if the function returned a single value instead of a list
+
+    """
+
+    def __init__(self, n_inputs):
+        """
+        Initializes a trace w/ n_inputs input nodes and no operations
+
+        """
+        self.nodes = [('input', (), None) for _ in range(n_inputs)]
+        self.n_inputs = n_inputs
+        self.outputs = []
+        self.scalar_output = True
+
+    def constant(self, value):
+        """
+        inputs: value: scalar
+        returns index of a new constant node holding value
+
+        """
+        if(isinstance(value, (AutoDiff, Tracer)) or np.ndim(value) != 0):
+            raise TracingError("Only scalar constants can be traced")
+        self.nodes.append(('const', (), np.float64(value)))
+        return len(self.nodes) - 1
+
+    def _index(self, arg):
+        '''
+            Internal function returning the node index of a Tracer or constant argument
+        '''
+        if(isinstance(arg, Tracer)):
+            if(arg.trace is not self):
+                raise TracingError("Tracer belongs to a different trace")
+            return arg.index
+        return self.constant(arg)
+
+    def record(self, op, *args):
+        """
+        inputs: op: str, key of _OPS, args: Tracer objects or scalar constants
+        returns Tracer of the result of op applied to args
+
+        """
+        self.nodes.append((op, tuple(self._index(a) for a in args), None))
+        return Tracer(self, len(self.nodes) - 1)
+
+    def set_outputs(self, output):
+        """
+        inputs: output: Tracer, scalar, or list, tuple or np.ndarray of either
+        records the nodes returned by the traced function
+
+        """
+        if(isinstance(output, (list, tuple, np.ndarray)) and np.ndim(output) > 0):
+            self.scalar_output = False
+            self.outputs = [self._index(o) for o in output]
+        else:
+            self.scalar_output = True
+            self.outputs = [self._index(output)]
+
+    def optimize(self):
+        """
+        rewrites the nodes w/ the graph passes: constant folding, identity removal and
+        common subexpression elimination, then fusion of affine chains and dead code
+        elimination. The outputs are unchanged up to rounding of fused constants.
+
+        """
+        nodes, outputs = _simplify(self.nodes, self.outputs)
+        nodes, outputs = _fuse_affine(nodes, outputs)
+        self.nodes, self.outputs = _eliminate_dead_code(nodes, outputs)
+
+    def dependencies(self, outputs=None):
+        """
+        inputs: outputs: list of node indices, optional (default = all outputs)
+        returns two lists of booleans, one entry per node: active, True if the node
+        depends on an input, and needed, True if one of outputs depends on the node
+
+        """
+        n_nodes = len(self.nodes)
+        active = [op == 'input' for op, _, _ in self.nodes]
+        needed = [False] * n_nodes
+        for o in (self.outputs if outputs is None else outputs):
+            needed[o] = True
+
+        for i, (op, args, _) in enumerate(self.nodes):
+            if(op not in ('input', 'const')):
+                active[i] = any(active[a] for a in args)
+        for i in range(n_nodes - 1, -1, -1):
+            if(needed[i]):
+                for a in self.nodes[i][1]:
+                    needed[a] = True
+        return active, needed
+
+    def compile(self):
+        """
+        builds the replay program: the forward instructions, the reverse sweep over the
+        nodes that depend on an input and feed an output, and the value and adjoint
+        buffers. Nodes are scheduled by depth, the length of the longest path from an
+        input, and the nodes of one depth that apply the same operation are replayed
+        as one numpy call over their index arrays.
+
+        """
+        n_nodes = len(self.nodes)
+        active, needed = self.dependencies()
+
+        self._values = np.zeros(n_nodes)
+        self._forward = []
+        self._reverse = []
+        depth = [0] * n_nodes
+        forward_groups = {}
+        reverse_groups = {}
+        for i, (op, args, value) in enumerate(self.nodes):
+            if(op == 'const'):
+                self._values[i] = value
+            elif(op != 'input' and needed[i]):
+                depth[i] = 1 + max(depth[a] for a in args)
+                fn, partials = _operation(op, value)
+                self._forward.append((fn, args, i))
+                forward_groups.setdefault((depth[i], op), []).append((args, i, value))
+                if(active[i]):
+                    for k, (partial, a) in enumerate(zip(partials, args)):
+                        if(active[a]):
+                            self._reverse.append((partial, args, i, a))
+                            reverse_groups.setdefault((depth[i], op, k), []).append(
+                                (args, i, value, a))
+        self._reverse.reverse()
+
+        self._forward_program = [_group(op, members)
+                                 for (_, op), members in sorted(forward_groups.items())]
+        self._reverse_program = [_group(op, members, k)
+                                 for (_, op, k), members in sorted(reverse_groups.items(),
+                                                                  reverse=True)]
+
+        # Unit adjoint seeds, one column per output, or a vector for scalar outputs
+        if(self.scalar_output):
+            self._adjoint = np.zeros(n_nodes)
+            self._seeds = [(Ellipsis, self.outputs[0])]
+        else:
+            self._adjoint = np.zeros((n_nodes, len(self.outputs)))
+            self._seeds = list(enumerate(self.outputs))
+
+    def evaluate(self, values):
+        """
+        inputs: values: np.ndarray of shape (n_inputs,)
+        returns the values of the outputs, np.ndarray of shape (m,), and their
+        Jacobian, np.ndarray of shape (m, n_inputs)
+
+        """
+        vals = self._values
+        vals[:self.n_inputs] = np.asarray(values, dtype=float)
+        for fn, args, out in self._forward_program:
+            vals[out] = fn(*[vals[a] for a in args])
+
+        # Adjoints of all outputs are propagated together, one column each
+        adjoint = self._adjoint
+        adjoint.fill(0.)
+        for k, out in self._seeds:
+            adjoint[out, k] += 1.
+        shape = (-1, 1) if adjoint.ndim == 2 else (-1,)
+        for partial, args, out, target, repeated in self._reverse_program:
+            if(isinstance(target, int)):
+                adjoint[target] += partial(*[vals[a] for a in args], vals[out]) * adjoint[out]
+                continue
+            contribution = np.reshape(partial(*[vals[a] for a in args], vals[out]),
+                                      shape) * adjoint[out]
+            if(repeated):
+                np.add.at(adjoint, target, contribution)
+            else:
+                adjoint[target] += contribution
+
+        jac = np.reshape(adjoint[:self.n_inputs], (self.n_inputs, -1)).T.copy()
+        return vals[self.outputs].copy(), jac
+
+
+def _group(op, members, position=None):
+    '''
+        Internal function returning the instruction replaying the nodes in members, all
+        applying op at the same depth, w/ one call. Forward instructions are (fn, args,
+        out), reverse ones (partial, args, out, target, repeated) for the argument at
+        position, w/ repeated True if a target appears more than once. Indices are
+        arrays, or ints for a single node, which numpy then handles as scalars. Affine
+        nodes get their scales and shifts as arrays.
+    '''
+    def indices(column):
+        return column[0] if len(column) == 1 else np.array(column, dtype=np.intp)
+
+    args = [indices([m[0][j] for m in members]) for j in range(len(members[0][0]))]
+    out = indices([m[1] for m in members])
+    value = members[0][2]
+    if(op == 'affine' and len(members) > 1):
+        value = tuple(np.array([m[2][j] for m in members]) for j in range(2))
+    fn, partials = _operation(op, value)
+    if(position is None):
+        return fn, args, out
+    targets = [m[3] for m in members]
+    return (partials[position], args, out, indices(targets),
+            len(set(targets)) < len(targets))
+
+
+class Tracer():
+    """
+    Placeholder for a scalar input or intermediate value while a function is traced.
+    Every operation is recorded on the trace instead of being computed. Comparisons
+    raise TracingError since a recorded trace cannot follow value dependent branches.
+
+    Attributes:
+
+    trace: Trace on which this value is recorded
+    index: index of this value among the nodes of the trace
+
+    """
+
+    __slots__ = ('trace', 'index')
+
+    def __init__(self, trace, index):
+        """
+        Initializes Tracer object for node index of trace
+
+        """
+        self.trace = trace
+        self.index = index
+
+    def __str__(self):
+        """
+        returns string value of the tracer
+
+        """
+        return "Tracer({})".format(self.index)
+
+    def __repr__(self):
+        """
+        returns string value of the tracer
+
+        """
+        return "Tracer({})".format(self.index)
+
+    """ Comparison operators """
+    def _branch(self, *args):
+        '''
+            Internal function raising TracingError for operations that need a value
+        '''
+        raise TracingError("Control flow depends on the value of a traced input")
+
+    __eq__ = __ne__ = __gt__ = __ge__ = __lt__ = __le__ = __bool__ = _branch
+    __hash__ = object.__hash__
+
+    """binary operators"""
+    def __add__(self, other):
+        """
+        inputs: self: Tracer object, other: Tracer object or scalar
+        returns Tracer of addition in the form self + other
+
+        """
+        return self.trace.record('add', self, other)
+
+    def __radd__(self, other):
+        """
+        inputs: self: Tracer object, other: Tracer object or scalar
+        returns Tracer of addition in the form other + self
+
+        """
+        return self.trace.record('add', other, self)
+
+    def __sub__(self, other):
+        """
+        inputs: self: Tracer object, other: Tracer object or scalar
+        returns Tracer of subtraction in the form self - other
+
+        """
+        return self.trace.record('sub', self, other)
+
+    def __rsub__(self, other):
+        """
+        inputs: self: Tracer object, other: Tracer object or scalar
+        returns Tracer of subtraction in the form other - self
+
+        """
+        return self.trace.record('sub', other, self)
+
+    def __mul__(self, other):
+        """
+        inputs: self: Tracer object, other: Tracer object or scalar
+        returns Tracer of multiplication in the form self * other
+
+        """
+        return self.trace.record('mul', self, other)
+
+    def __rmul__(self, other):
+        """
+        inputs: self: Tracer object, other: Tracer object or scalar
+        returns Tracer of multiplication in the form other * self
+
+        """
+        return self.trace.record('mul', other, self)
+
+    def __truediv__(self, other):
+        """
+        inputs: self: Tracer object, other: Tracer object or scalar
+        returns Tracer of true division in the form self / other
+
+        """
+        return self.trace.record('div', self, other)
+
+    def __rtruediv__(self, other):
+        """
+        inputs: self: Tracer object, other: Tracer object or scalar
+        returns Tracer of true division in the form other / self
+
+        """
+        return self.trace.record('div', other, self)
+
+    def __pow__(self, other):
+        """
+        inputs: self: Tracer object, other: Tracer object or scalar
+        returns Tracer of power function of the form self ** other
+
+        """
+        return self.trace.record('pow', self, other)
+
+    def __rpow__(self, other):
+        """
+        inputs: self: Tracer object, other: Tracer object or scalar
+        returns Tracer of power function of the form other ** self
+
+        """
+        return self.trace.record('pow', other, self)
+
+    """ unary operators """
+    def __neg__(self):
+        """
+        returns Tracer of negative function of the form - self
+
+        """
+        return self.trace.record('neg', self)
+
+    """ elementary functions """
+    def log(self, base):
+        """
+        inputs: self: Tracer object, base: scalar
+        returns Tracer of log function with base = base of the form log(self, base)
+
+        """
+        return self.trace.record('log', self, base)
+
+    def expm(self, base):
+        """
+        inputs: self: Tracer object, base: scalar
+        returns Tracer of exponential function of the form base ** self
+
+        """
+        return self.trace.record('pow', base, self)
+
+
+def _unary(name):
+    '''
+        Internal function returning a Tracer method recording the operation name
+    '''
+    def method(self):
+        '''
+        returns Tracer of the elementary function {}(self)
+        '''
+        return self.trace.record(name, self)
+
+    method.__name__ = name
+    method.__doc__ = method.__doc__.format(name)
+    return method
+
+
+for _name in ['sin', 'cos', 'tan', 'arcsine', 'arccosine', 'arctangent', 'sinh', 'cosh',
+              'tanh', 'ln', 'exp', 'logistic', 'sqrt']:
+    setattr(Tracer, _name, _unary(_name))
+
+
+def trace_function(func, n_inputs, scalar_input=False, optimize=True):
+    '''
+        Records func on Tracer inputs, optimizes and compiles the result.
+
+        INPUTS:
+          func: callable
+                function taking a list of inputs (or a single input if scalar_input)
+
+          n_inputs: int
+                    number of scalar inputs
+
+          scalar_input: boolean, optional (default = False)
+                        If True, func is called with the single Tracer instead of a list
+
+          optimize: boolean, optional (default = True)
+                    If True, the graph passes of Trace.optimize are run before compiling
+
+        OUTPUTS:
+          trace: compiled Trace object
+
+        NOTE:
+          Raises TracingError if func branches on the value of its inputs.
+    '''
+    trace = Trace(n_inputs)
+    inputs = [Tracer(trace, i) for i in range(n_inputs)]
+    trace.set_outputs(func(inputs[0] if scalar_input else inputs))
+    if(optimize):
+        trace.optimize()
+    trace.compile()
+    return trace
+
+
+class CompiledFunction():
+    """
+    Wrapper that traces a function once per input signature and replays the trace on
+    later calls. It is called like the wrapped function, with an ADVector, a list of
+    scalar AutoDiff objects or a scalar AutoDiff object, and returns an AutoDiff object
+    for scalar outputs or an ADVector for list outputs. Inputs of any other kind, and
+    functions that cannot be traced (e.g. whose control flow depends on the input
+    values), are evaluated eagerly by calling the wrapped function.
+
+    Attributes:
+
+    func: wrapped function
+    optimize: boolean, True if the graph passes are run on each trace
+    traces: dict from input signature to compiled Trace, or None when the function
+            is evaluated eagerly for that signature
+
+    """
+
+    def __init__(self, func, optimize=True):
+        """
+        Initializes CompiledFunction object wrapping func
+
+        """
+        self.func = func
+        self.optimize = optimize
+        self.traces = {}
+        self.__doc__ = getattr(func, '__doc__', None)
+
+    def _signature(self, x):
+        '''
+            Internal function returning (key, values, seeds) for an input, or None if the
+            input cannot be replayed
+        '''
+        try:
+            if(isinstance(x, ADVector)):
+                if(not isinstance(x.der, np.ndarray)):
+                    return None
+                return ('vector', len(x)), x.val, np.asarray(x.der, dtype=float)
+            if(isinstance(x, AutoDiff)):
+                if(np.ndim(x.val) != 0 or not isinstance(x.der, (list, np.ndarray))):
+                    return None
+                return ('scalar', 1), np.array([x.val], dtype=float), \
+                    np.array(x.der, dtype=float).reshape(1, -1)
+            if(isinstance(x, (list, tuple, np.ndarray)) and len(x) > 0 and
+               all(isinstance(v, AutoDiff) and np.ndim(v.val) == 0 and
+                   isinstance(v.der, np.ndarray) for v in x)):
+                return ('vector', len(x)), np.array([v.val for v in x], dtype=float), \
+                    np.array([v.der for v in x], dtype=float)
+        except ValueError:
+            pass
+        return None
+
+    def trace_for(self, key):
+        """
+        inputs: key: input signature, ('vector', n) or ('scalar', 1)
+        returns compiled Trace for key, tracing the function on first use, or None if
+        the function must be evaluated eagerly
+
+        """
+        if(key not in self.traces):
+            try:
+                self.traces[key] = trace_function(self.func, key[1], key[0] == 'scalar',
+                                                   self.optimize)
+            except (TracingError, TypeError, AttributeError, ValueError):
+                self.traces[key] = None
+        return self.traces[key]
+
+    def __call__(self, x):
+        """
+        inputs: x: ADVector, list of scalar AutoDiff objects or scalar AutoDiff object
+        returns output of the wrapped function at x
+
+        """
+        signature = self._signature(x)
+        if(signature is None):
+            return self.func(x)
+        key, values, seeds = signature
+
+        trace = self.trace_for(key)
+        if(trace is None):
+            return self.func(x)
+
+        val, jac = trace.evaluate(values)
+        der = np.dot(jac, seeds)
+        if(trace.scalar_output):
+            return AutoDiff(val[0], der[0])
+        return ADVector(val, der)
+
+    def gradient(self, values):
+        """
+        inputs: values: list or np.ndarray of shape (n,)
+        returns gradient of the scalar wrapped function at values, np.ndarray of shape
+        (n,), from one replay. Falls back to a reverse-mode tape if the function
+        cannot be traced
+
+        """
+        values = np.asarray(values, dtype=float)
+        trace = self.trace_for(('vector', len(values)))
+        if(trace is None or not trace.scalar_output):
+            return reverse_gradient(self.func, values)[1]
+        return trace.evaluate(values)[1][0]
+
+
+def compile_function(func, optimize=True):
+    '''
+        Wraps func so that it is traced once and replayed on later calls, instead of
+        dispatching every operator through Python objects on each call. Can be used as
+        a decorator. See CompiledFunction.
+
+        INPUTS:
+          func: callable
+                function taking an ADVector (or list of AutoDiff objects) and returning
+                an AutoDiff object or a list of AutoDiff objects,
+                e.g. lambda x: x[0]**2 + x[1].sin()
+
+          optimize: boolean, optional (default = True)
+                    If True, repeated subexpressions are computed once, constants are
+                    folded and affine chains are fused before replaying
+
+        OUTPUTS:
+          compiled: CompiledFunction
+                    callable accepted by the solvers in place of func
+
+        NOTE:
+          Only operations on the inputs are recorded. func must not depend on state
+          that changes between calls, and functions that branch on input values or use
+          whole-vector ADVector operations are evaluated eagerly.
+    '''
+    return CompiledFunction(func, optimize)
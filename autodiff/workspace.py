@@ -0,0 +1,128 @@
+import sys
+import numpy as np
+
+# Stack of active workspaces, the last one receives and hands out buffers
+_active = []
+
+# Functions called w/ True when a first workspace is activated and w/ False when the
+# last one is deactivated, so that code outside workspaces pays nothing for pooling
+_hooks = []
+
+
+class Workspace():
+    """
+    Pool of reusable float arrays for the val and der of AutoDiff objects. While a
+    workspace is active (inside a with block), the results of AutoDiff operations are
+    written into recycled buffers, and the buffers of AutoDiff objects that are
+    garbage collected go back to the pool, so hot loops stop allocating new arrays
+    once the pool is warm. Buffers still referenced outside their AutoDiff object are
+    never recycled.
+
+    Attributes:
+
+    allocations: number of buffers the pool had to allocate
+    reuses: number of buffers handed out again from the pool
+    max_buffers: maximum number of free buffers kept per shape and dtype
+
+    """
+
+    def __init__(self, max_buffers=64):
+        """
+        Initializes an empty workspace keeping at most max_buffers free buffers per shape
+        and dtype
+
+        """
+        self._free = {}
+        self.allocations = 0
+        self.reuses = 0
+        self.max_buffers = max_buffers
+
+    def __enter__(self):
+        """
+        activates the workspace
+
+        """
+        _active.append(self)
+        if(len(_active) == 1):
+            for hook in _hooks:
+                hook(True)
+        return self
+
+    def __exit__(self, *exc):
+        """
+        deactivates the workspace
+
+        """
+        _active.remove(self)
+        if(not _active):
+            for hook in _hooks:
+                hook(False)
+        return False
+
+    def empty(self, shape, dtype=np.float64):
+        """
+        inputs: shape: tuple, dtype: floating point np.dtype
+        returns np.ndarray of the given shape and dtype w/ undefined contents, recycled
+        from the pool when possible
+
+        """
+        free = self._free.get((shape, np.dtype(dtype)))
+        if(free):
+            self.reuses += 1
+            return free.pop()
+        self.allocations += 1
+        return np.empty(shape, dtype)
+
+    def release(self, array):
+        """
+        inputs: array: np.ndarray
+        returns array to the pool if it owns its float data and nothing else refers to it
+
+        """
+        # References: the caller's, the argument and getrefcount's own
+        if(not isinstance(array, np.ndarray) or array.base is not None or
+           array.ndim == 0 or array.dtype.kind != 'f' or
+           not array.flags.writeable or sys.getrefcount(array) > 3):
+            return
+        free = self._free.setdefault((array.shape, array.dtype), [])
+        if(len(free) < self.max_buffers):
+            free.append(array)
+
+    def clear(self):
+        """
+        drops every free buffer
+
+        """
+        self._free = {}
+
+
+def buffer(*operands):
+    '''
+        Returns a recycled buffer for the result of an elementwise operation on operands
+        when a workspace is active, else None. Operands that are not arrays or scalars,
+        non float results and 0-d results get None, so numpy allocates.
+    '''
+    if(not _active):
+        return None
+    if(not all(isinstance(o, (np.ndarray, float, int, np.generic)) for o in operands)):
+        return None
+    try:
+        shape = np.broadcast(*operands).shape
+    except ValueError:
+        return None
+    dtype = np.result_type(*operands)
+    if(shape == () or dtype.kind != 'f'):
+        return None
+    return _active[-1].empty(shape, dtype)
+
+
+def recycle(ad):
+    '''
+        Returns the val and der buffers of an AutoDiff object that is being deleted to
+        the active workspace
+    '''
+    if(_active):
+        state = ad.__dict__
+        for name in ('val', 'der'):
+            array = state.pop(name, None)
+            _active[-1].release(array)
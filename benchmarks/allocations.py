@@ -0,0 +1,150 @@
+import sys
+import time
+import tracemalloc
+import numpy as np
+sys.path.append(sys.path[0][:-11])
+
+from autodiff.autodiff import AutoDiff
+from autodiff.advector import ADVector
+from autodiff.workspace import Workspace
+
+# Size of the input vector and number of timed iterations
+N = 200
+ITERATIONS = 200
+
+# Number of scalar evaluations timed, and the time they took in seconds w/o any
+# workspace, on the machine these benchmarks were written on (best of 30 runs). Eager
+# scalar code must not get slower because workspaces exist.
+SCALAR_EVALUATIONS = 20000
+SCALAR_REFERENCE = {'original code': 0.39, 'before workspaces': 0.54}
+
+
+def objective(x):
+    '''
+        Elementwise objective written w/ out-of-place operators
+    '''
+    y = (x - 1.) * (x - 1.)
+    y = y + 0.5 * x.sin()
+    return y / (1. + x * x)
+
+
+def objective_inplace(x):
+    '''
+        Same objective written w/ in-place operators
+    '''
+    y = x - 1.
+    y *= y
+    y += 0.5 * x.sin()
+    z = x * x
+    z += 1.
+    y /= z
+    return y
+
+
+def scalar_objective(x, y):
+    '''
+        Objective of two scalar AutoDiff objects, dominated by per-operation overhead
+    '''
+    return (x * y + x.sin()) / (1 + y * y) - (x - 1) ** 2
+
+
+class _Counter():
+    """
+    Counts AutoDiff objects built through either constructor, and the val/der arrays
+    they hold that own their memory, i.e. are not views of another array
+    """
+
+    def __init__(self):
+        self.objects = 0
+        self.buffers = 0
+        self._init = AutoDiff.__init__
+        self._new = AutoDiff.__dict__['_new']
+
+    def count(self, obj):
+        self.objects += 1
+        for array in (obj.val, obj.der):
+            if isinstance(array, np.ndarray) and array.flags.owndata:
+                self.buffers += 1
+
+    def __enter__(self):
+        counter = self
+        init, new = self._init, self._new.__func__
+
+        def counted_init(obj, *args, **kwargs):
+            init(obj, *args, **kwargs)
+            counter.count(obj)
+
+        def counted_new(cls, *args):
+            obj = new(cls, *args)
+            counter.count(obj)
+            return obj
+
+        AutoDiff.__init__ = counted_init
+        AutoDiff._new = classmethod(counted_new)
+        return self
+
+    def __exit__(self, *exc):
+        AutoDiff.__init__ = self._init
+        AutoDiff._new = self._new
+        return False
+
+
+def run(name, func, workspace=None):
+    '''
+        Runs func ITERATIONS times and prints the AutoDiff objects, newly allocated
+        val/der buffers, peak traced memory and time per iteration
+    '''
+    x = ADVector(np.linspace(0.1, 1., N))
+    func(x) # warm up, fills the workspace pool
+
+    allocations = workspace.allocations if workspace else 0
+    tracemalloc.start()
+    with _Counter() as counter:
+        start = time.perf_counter()
+        for _ in range(ITERATIONS):
+            func(x)
+        elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    objects = counter.objects / ITERATIONS
+    if workspace:
+        # Recycled buffers are owned by the results too, only count the new ones
+        buffers = (workspace.allocations - allocations) / ITERATIONS
+    else:
+        buffers = counter.buffers / ITERATIONS
+    print("{:<24} {:>8.1f} {:>10.1f} {:>12.1f} {:>10.1f}".format(
+        name, objects, buffers, peak / 1024, 1e6 * elapsed / ITERATIONS))
+
+
+def run_scalar(repeats=30):
+    '''
+        Times SCALAR_EVALUATIONS evaluations of scalar_objective, best of repeats, and
+        prints the time next to SCALAR_REFERENCE
+    '''
+    x = AutoDiff(0.5, [1., 0.])
+    y = AutoDiff(1.5, [0., 1.])
+    chunk = SCALAR_EVALUATIONS // 10
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(chunk):
+            scalar_objective(x, y)
+        best = min(best, time.perf_counter() - start)
+    print("{} scalar evaluations: {:.3f} s".format(SCALAR_EVALUATIONS, 10 * best))
+    for name, elapsed in SCALAR_REFERENCE.items():
+        print("  reference, {}: {:.3f} s".format(name, elapsed))
+
+
+if __name__ == '__main__':
+    print("N = {}, {} iterations".format(N, ITERATIONS))
+    print("{:<24} {:>8} {:>10} {:>12} {:>10}".format(
+        "", "objects", "buffers", "peak (KiB)", "time (us)"))
+    run("out-of-place", objective)
+    run("in-place", objective_inplace)
+    with Workspace() as ws:
+        run("out-of-place+workspace", objective, ws)
+    with Workspace() as ws:
+        run("in-place+workspace", objective_inplace, ws)
+    print()
+    run_scalar()
@@ -1,4 +1,5 @@
 import autodiff.autodiff as ad
+from autodiff import linalg
 import time
 import numpy as np
 from matplotlib import pyplot as plt
@@ -15,7 +16,7 @@ for num in nums:
         der[i] = 1.
         inputs.append(ad.AutoDiff(1, der))
     
-    func = lambda x: np.prod(x)
+    func = lambda x: linalg.prod(x)
     output = func(inputs)
     times.append(time.time() - start)
     print(times[-1])
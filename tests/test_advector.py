@@ -0,0 +1,77 @@
+import sys
+import numpy as np
+sys.path.append(sys.path[0][:-5])
+
+import pytest
+from autodiff.autodiff import AutoDiff
+from autodiff.advector import ADVector
+
+def test_default_seed():
+    x = ADVector([1., 2., 3.])
+    assert all(x.val == [1, 2, 3])
+    assert (x.der == np.eye(3)).all()
+    assert len(x) == 3
+
+def test_bad_shapes():
+    with pytest.raises(ValueError):
+        ADVector([[1., 2.]], np.eye(2))
+    with pytest.raises(ValueError):
+        ADVector([1., 2.], np.eye(3))
+
+def test_indexing():
+    x = ADVector([1., 2., 3.])
+    assert isinstance(x[1], AutoDiff) and not isinstance(x[1], ADVector)
+    assert x[1].val == 2
+    assert all(x[1].der == [0, 1, 0])
+    assert isinstance(x[1:], ADVector)
+    assert all(x[1:].val == [2, 3])
+    assert [v.val for v in x] == [1, 2, 3]
+
+def test_from_to_autodiff():
+    nums = [AutoDiff(1., [1., 0.]), AutoDiff(2., [0., 1.])]
+    x = ADVector.from_autodiff(nums)
+    assert all(x.val == [1, 2])
+    back = x.to_autodiff()
+    assert back.dtype == object
+    assert back[1].val == 2 and all(back[1].der == [0, 1])
+    y = ADVector.from_autodiff(x)
+    y.val += 1
+    assert all(x.val == [1, 2])
+
+def test_matches_scalar_autodiff():
+    values = [0.3, 0.6, 0.9]
+    fn = lambda x: (x * x[0] + 2 / x - x ** 2).sin() / (1 + x.exp()) + x.logistic() \
+        - 3 ** x + x.ln() * x.sqrt() + x.tanh().arctangent()
+    x = ADVector(values)
+    out = fn(x)
+    assert isinstance(out, ADVector)
+    for i in range(3):
+        scalar = [AutoDiff(v, np.eye(3)[j]) for j, v in enumerate(values)]
+        ref = (scalar[i] * scalar[0] + 2 / scalar[i] - scalar[i] ** 2).sin() \
+            / (1 + scalar[i].exp()) + scalar[i].logistic() - 3 ** scalar[i] \
+            + scalar[i].ln() * scalar[i].sqrt() + scalar[i].tanh().arctangent()
+        assert np.isclose(out.val[i], ref.val)
+        assert np.allclose(out.der[i], ref.der)
+
+def test_reflected_with_scalar_autodiff():
+    x = ADVector([1., 2.])
+    out = x[0] * x
+    assert isinstance(out, ADVector)
+    assert all(out.val == [1, 2])
+    assert (out.der == [[2, 0], [2, 1]]).all()
+    out = x[1] - x
+    assert isinstance(out, ADVector)
+    assert (out.der == [[-1, 1], [0, 0]]).all()
+
+def test_scalar_objective():
+    x = ADVector([1., 2.])
+    f = x[0] ** 2 + x[0] * x[1]
+    assert f.val == 3
+    assert all(f.der == [4, 1])
+
+def test_advector_dtype():
+    x = ADVector([1., 2.], dtype=np.float32)
+    assert x.der.dtype == np.float32
+    y = (x * np.array([1., 3.])).exp() / 2.
+    assert y.val.dtype == np.float32 and y.der.dtype == np.float32
+    assert y[0].val.dtype == np.float32 and y[:1].der.dtype == np.float32
@@ -3,7 +3,7 @@ import numpy as np
 sys.path.append(sys.path[0][:-5])
 
 import pytest
-from autodiff.autodiff import AutoDiff
+from autodiff.autodiff import AutoDiff, set_default_dtype, get_default_dtype
 
 def test_add_objects():
     AD1 = AutoDiff(1,2)
@@ -296,3 +296,81 @@ def test_vector_values3():
     AD2 = AutoDiff.cos(AD1)
     assert AD2.val == np.cos(2)
     assert all(AD2.der == [-3*np.sin(2),-5*np.sin(2)])
+
+def test_dtype():
+    for dtype in [np.float32, np.longdouble]:
+        x = AutoDiff(0.5, [1, 2], dtype=dtype)
+        assert x.val.dtype == dtype and x.der.dtype == dtype
+        for f in [lambda x: x + np.float64(1.), lambda x: 2. / x, lambda x: x * x,
+                  lambda x: np.float64(3.) * x, lambda x: x ** 2.5, lambda x: 2 ** x,
+                  lambda x: x.log(10), lambda x: x.expm(2), lambda x: x.exp().sin().sqrt(),
+                  lambda x: x.logistic() / x.tanh()]:
+            y = f(x)
+            assert y.val.dtype == dtype and y.der.dtype == dtype
+            z = f(AutoDiff(0.5, [1, 2]))
+            assert np.allclose(y.val, z.val, rtol=1e-6) and np.allclose(y.der, z.der, rtol=1e-6)
+        x *= np.array(2.)
+        x += x
+        assert x.val.dtype == dtype and x.der.dtype == dtype
+    with pytest.raises(ValueError):
+        AutoDiff(1, 1, dtype=int)
+
+def test_default_dtype():
+    assert get_default_dtype() is None
+    set_default_dtype(np.float32)
+    try:
+        x = AutoDiff(2, 3)
+        assert x.val.dtype == np.float32 and x.der.dtype == np.float32
+        assert AutoDiff(2, 3, dtype=np.float64).val.dtype == np.float64
+        with pytest.raises(ValueError):
+            set_default_dtype('int64')
+    finally:
+        set_default_dtype(None)
+    assert AutoDiff(2, 3).val.dtype.kind == 'i'
+
+def test_array_ufunc():
+    x = AutoDiff(0.5, [1, 2])
+    for ufunc, method in [(np.sin, x.sin), (np.exp, x.exp), (np.log, x.ln),
+                          (np.sqrt, x.sqrt), (np.tanh, x.tanh), (np.negative, x.__neg__)]:
+        y = ufunc(x)
+        assert isinstance(y, AutoDiff)
+        assert np.isclose(y.val, method().val) and np.allclose(y.der, method().der)
+    assert np.allclose(np.log10(x).der, x.log(10).der)
+    assert np.allclose(np.abs(- x).der, [1, 2])
+    assert np.allclose(np.square(x).der, (x * x).der)
+
+    # numpy scalars and arrays on the left defer to the AutoDiff object
+    for y in [np.float64(3.) * x, np.float64(3.) - x, np.float64(3.) / x, np.float64(3.) ** x]:
+        assert isinstance(y, AutoDiff)
+    assert np.allclose((np.float64(3.) - x).der, [-1, -2])
+    y = np.array([1., 2.]) * x
+    assert isinstance(y, AutoDiff) and np.allclose(y.der, [[1, 2], [2, 4]])
+    assert np.greater(x, 0.) and np.isfinite(x)
+
+def test_array_ufunc_selections_and_fallback():
+    a, b = AutoDiff(2., 1.), AutoDiff(3., 1.)
+    for ufunc, expected in [(np.maximum, b), (np.minimum, a), (np.fmax, b), (np.fmin, a),
+                            (np.logical_and, b), (np.logical_or, a)]:
+        y = ufunc(a, b)
+        assert isinstance(y, AutoDiff) and y.val == expected.val and y.der == expected.der
+    assert np.logical_not(a) == False
+
+    # The selected operand gives each element its value and derivative
+    x = AutoDiff(np.array([1., 5., np.nan]), np.eye(3))
+    y = np.maximum(x, 2.)
+    assert np.array_equal(y.val, [2., 5., np.nan], equal_nan=True)
+    assert np.array_equal(y.der, np.diag([0., 1., 1.]))
+    y = np.fmin(2., x)
+    assert np.array_equal(y.val, [1., 2., 2.]) and np.array_equal(y.der, np.diag([1., 0., 0.]))
+    y = np.minimum(AutoDiff(np.float32([1., 3.]), np.eye(2, dtype=np.float32)), np.ones(2))
+    assert y.val.dtype == y.der.dtype == np.float32
+
+def test_array_function():
+    x = AutoDiff(np.array([1., 2., 3.]), np.eye(3))
+    assert np.isclose(np.sum(x).val, 6) and np.allclose(np.sum(x).der, [1, 1, 1])
+    assert np.allclose(np.prod(x).der, [6, 3, 2])
+    assert np.allclose(np.mean(x).der, [1 / 3] * 3)
+    assert np.allclose(np.linalg.norm(x).der, x.val / np.sqrt(14))
+    assert np.allclose(np.dot(x, x).der, 2 * x.val)
+    assert np.allclose(np.add.reduce(x).der, [1, 1, 1])
+    assert np.allclose((np.ones((2, 3)) @ x).der, np.ones((2, 3)))
@@ -0,0 +1,97 @@
+import sys
+import numpy as np
+sys.path.append(sys.path[0][:-5])
+
+import pytest
+from autodiff.autodiff import AutoDiff
+from autodiff.advector import ADVector
+from autodiff.cache import CachedFunction, cached_function
+from autodiff.optimization import BFGS, gradient_descent
+from autodiff.root_finding import newton
+
+
+def _counting(fn):
+    calls = []
+
+    def counted(x):
+        calls.append(1)
+        return fn(x)
+    return counted, calls
+
+
+def test_hits_and_misses():
+    fn, calls = _counting(lambda x: x[0] * x[1])
+    f = cached_function(fn)
+    x = ADVector([1., 2.])
+    assert f(x).val == f(x).val == 2.
+    assert len(calls) == 1
+    x.val += 1.
+    assert f(x).val == 6.
+    assert f.cache_info() == (1, 2, 128, 2)
+
+    # Different seeds at the same values are a different input
+    f(ADVector([2., 3.], np.ones((2, 1))))
+    assert f.misses == 3
+    # Equal seeds in another array are the same input
+    f(ADVector([2., 3.], np.ones((2, 1))))
+    assert f.misses == 3
+
+    f.cache_clear()
+    assert f.cache_info() == (0, 0, 128, 0)
+    assert cached_function(f) is f
+
+
+def test_seeds_keyed_by_reference(monkeypatch):
+    fn, calls = _counting(lambda x: x[0] * x[1])
+    f = cached_function(fn)
+    x = ADVector(np.arange(1., 301.))
+    f(x)
+    # Hits w/ the same seed array never compare the n x n seeds
+    monkeypatch.setattr(np, 'array_equal', lambda *args: pytest.fail("seeds compared"))
+    f(ADVector._new(np.arange(1., 301.), x.der))
+    assert len(calls) == 1 and f.hits == 1
+
+def test_lru_eviction():
+    fn, calls = _counting(lambda x: x.exp())
+    f = CachedFunction(fn, maxsize=2)
+    a, b, c = AutoDiff(1.), AutoDiff(2.), AutoDiff(3.)
+    f(a), f(b), f(a), f(c)
+    assert f.cache_info().currsize == 2
+    f(a)
+    assert f.hits == 2
+    f(b)
+    assert len(calls) == 4
+    with pytest.raises(ValueError):
+        CachedFunction(fn, maxsize=0)
+
+
+def test_gradient_cache():
+    f = cached_function(lambda x: x[0] ** 2 + x[1].sin())
+    assert np.allclose(f.gradient([1., 0.]), [2., 1.])
+    f.gradient(np.array([1., 0.]))
+    assert f.cache_info()[:2] == (1, 1)
+
+
+def test_solvers_reuse_points():
+    fn = lambda x: (x[0] - 2) ** 2 + (x[1] + 1) ** 2
+    for mode in ['forward', 'reverse']:
+        f = cached_function(fn)
+        _, converged, iterations = BFGS(f, ADVector([1., 1.]), mode=mode, line_search=None)
+        assert converged
+        assert f.hits + f.misses == iterations + 1
+
+        f = cached_function(fn)
+        _, converged, iterations = gradient_descent(f, ADVector([1., 1.]), mode=mode,
+                                                    line_search=None)
+        assert converged
+        assert f.hits == 1 and f.misses == iterations
+
+        # The gradient at the point accepted by the line search is reused
+        for solver in [BFGS, gradient_descent]:
+            f = cached_function(fn)
+            _, converged, iterations = solver(f, ADVector([1., 1.]), mode=mode)
+            assert converged and f.hits >= iterations
+
+    f = cached_function(lambda x: [x[0] ** 2 - 4, x[1] - 1])
+    _, converged, iterations = newton(f, ADVector([1., 1.]))
+    assert converged and f.misses == iterations + 1
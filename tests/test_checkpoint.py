@@ -0,0 +1,60 @@
+import sys
+import numpy as np
+sys.path.append(sys.path[0][:-5])
+
+import pytest
+from autodiff.checkpoint import checkpointed_gradient, _split, _beta
+from autodiff.reverse import gradient
+
+def step(x, p):
+    return [x[0] + 0.01 * x[1] * p[0], x[1] - 0.01 * x[0].sin()]
+
+def loss(x, p):
+    return x[0] ** 2 + x[1] * p[0]
+
+def full(v, n_steps):
+    x, p = v[:2], v[2:]
+    for _ in range(n_steps):
+        x = step(x, p)
+    return loss(x, p)
+
+def test_matches_full_tape():
+    val, ref = gradient(lambda v: full(v, 150), [1., 0.5, 0.7])
+    for checkpoints in [0, 1, 3, None, 1000]:
+        out = checkpointed_gradient(step, loss, [1., 0.5], 150, params=[0.7],
+                                    checkpoints=checkpoints)
+        assert np.isclose(out[0], val)
+        assert np.allclose(out[1], ref[:2]) and np.allclose(out[2], ref[2:])
+
+def test_without_params_and_memory_budget():
+    fn = lambda x: [x[0] * x[1].cos(), x[1] + 0.1]
+    val, grad = checkpointed_gradient(fn, lambda x: x[0], [2., 0.3], 3, memory=16)
+    ref = gradient(lambda x: x[0] * x[1].cos() * (x[1] + 0.1).cos() * (x[1] + 0.2).cos(),
+                   [2., 0.3])
+    assert np.isclose(val, ref[0]) and np.allclose(grad, ref[1])
+
+def test_recomputation_bound():
+    calls = [0]
+    def counted(x):
+        calls[0] += 1
+        return [x[0] * 1.001]
+    n_steps = 500
+    val, grad = checkpointed_gradient(counted, lambda x: x[0], [1.], n_steps, checkpoints=4)
+    assert np.isclose(grad[0], 1.001 ** n_steps)
+    reps = min(r for r in range(n_steps) if _beta(4, r) >= n_steps)
+    assert calls[0] <= (reps + 2) * n_steps
+
+def test_split():
+    assert _split(10, 20) == 1
+    assert 1 <= _split(1000, 3) < 1000
+
+def test_edge_cases():
+    val, grad, param_grad = checkpointed_gradient(step, loss, [1., 0.5], 0, params=[0.7])
+    assert np.isclose(val, 1.35) and np.allclose(grad, [2., 0.7])
+    assert np.allclose(param_grad, [0.5])
+    val, grad = checkpointed_gradient(lambda x: [x[0] * 2], lambda x: 3., [1.], 5)
+    assert val == 3 and all(grad == [0.])
+    with pytest.raises(ValueError):
+        checkpointed_gradient(step, loss, [1., 0.5], -1, params=[0.7])
+    with pytest.raises(ValueError):
+        checkpointed_gradient(step, loss, [1., 0.5], 2, params=[0.7], checkpoints=-1)
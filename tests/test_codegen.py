@@ -0,0 +1,75 @@
+import sys
+import os
+import numpy as np
+sys.path.append(sys.path[0][:-5])
+
+import pytest
+from autodiff.advector import ADVector
+from autodiff.tracing import trace_function, CompiledFunction
+from autodiff.codegen import generate_source, generate_function, function_key, \
+    GeneratedCode, GeneratedFunction
+import autodiff.optimization as opt
+
+fn = lambda x: (x[0] * x[1] + 2 / x[0] - x[1] ** 2).sin() / (1 + x[0].exp()) \
+    + x[1].logistic() - 3 ** x[0] + x[0].ln() * x[1].sqrt() + x[1].tanh().arctangent() \
+    + x[0].log(2) - x[1].expm(3) + (- x[0]).cosh() * x[1].sinh() + x[1].tan() \
+    + (x[0] / 4).arcsine() - (x[1] / 3).arccosine() + x[0].cos() - 1 - x[1] + x[0] ** x[1] \
+    + ((x[0] * 2 + 1) * 3 - 4) / 2
+
+def test_matches_trace():
+    for optimize in [True, False]:
+        trace = trace_function(fn, 2, optimize=optimize)
+        code = GeneratedCode(generate_source(trace))
+        assert code.scalar_output
+        for values in ([0.3, 0.7], [1.2, 0.4]):
+            val, jac = trace.evaluate(values)
+            gen_val, gen_jac = code.evaluate(values)
+            assert np.allclose(val, gen_val) and np.allclose(jac, gen_jac)
+
+def test_vector_output():
+    trace = trace_function(lambda x: [x[0] * x[1], 3., x[1], x[0].exp() * x[0].exp()], 2)
+    code = GeneratedCode(generate_source(trace))
+    assert not code.scalar_output
+    val, jac = code.evaluate([2., 3.])
+    assert np.allclose(val, [6, 3, 3, np.exp(4)])
+    assert np.allclose(jac, [[3, 2], [0, 0], [0, 1], [2 * np.exp(4), 0]])
+
+def test_disk_cache(tmp_path, monkeypatch):
+    f = generate_function(fn, cache=str(tmp_path))
+    x = ADVector([0.3, 0.7])
+    val, jac = trace_function(fn, 2).evaluate(x.val)
+    out = f(x)
+    assert np.isclose(out.val, val[0]) and np.allclose(out.der, jac[0])
+    assert len(os.listdir(str(tmp_path))) == 1
+
+    # A new wrapper, e.g. in another process, loads the source without tracing
+    def fail(self, key):
+        raise AssertionError("traced")
+    monkeypatch.setattr(CompiledFunction, 'trace_for', fail)
+    g = generate_function(fn, cache=str(tmp_path))
+    out = g(x)
+    assert np.isclose(out.val, val[0]) and np.allclose(out.der, jac[0])
+
+def test_cache_env(tmp_path, monkeypatch):
+    monkeypatch.setenv('AUTODIFF_CACHE_DIR', str(tmp_path / 'cache'))
+    f = generate_function(lambda x: x[0] ** 3)
+    assert f(ADVector([2.])).der[0] == 12
+    assert len(os.listdir(str(tmp_path / 'cache'))) == 1
+    assert generate_function(lambda x: x[0], cache=False).cache is None
+
+def test_function_key():
+    def make(a):
+        return lambda x: (x[0] - a) ** 2
+    assert function_key(make(1.), ('vector', 1)) == function_key(make(1.), ('vector', 1))
+    assert function_key(make(1.), ('vector', 1)) != function_key(make(2.), ('vector', 1))
+    assert function_key(make(1.), ('vector', 1)) != function_key(make(1.), ('vector', 2))
+    assert function_key(make(1.), ('vector', 1)) != function_key(lambda x: x[0], ('vector', 1))
+
+def test_solver_and_fallback():
+    f = generate_function(lambda x: x[0].cos()**2 + x[1].sin()**2, cache=False)
+    output = opt.BFGS(f, ADVector([1., 1.]), tol=1e-10, mode='reverse')
+    assert np.linalg.norm(output[0] - np.array([np.pi/2, 0])) < 10e-10
+
+    g = generate_function(lambda x: x[0] if x[0] > 0 else - x[0], cache=False)
+    assert g(ADVector([-2.])).val == 2
+    assert g.traces[('vector', 1)] is None
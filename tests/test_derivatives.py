@@ -0,0 +1,138 @@
+import sys
+import numpy as np
+sys.path.append(sys.path[0][:-5])
+
+import pytest
+from autodiff.autodiff import AutoDiff
+from autodiff.derivatives import batch_variables, batch_gradient, jacobian, value_and_jacobian, \
+    _default_chunk_size, hessian, value_gradient_hessian, hvp, gradient_and_hvp, \
+    taylor_derivatives
+
+def test_batch_variables():
+    x = batch_variables([[1., 2.], [3., 4.], [5., 6.]])
+    assert len(x) == 2
+    assert all(x[1].val == [2, 4, 6])
+    assert (x[1].der == [[0, 1], [0, 1], [0, 1]]).all()
+    with pytest.raises(ValueError):
+        batch_variables([1., 2.])
+
+def test_batch_gradient_matches_pointwise():
+    points = np.random.RandomState(0).uniform(0.5, 1.5, (20, 3))
+    fn = lambda x: (x[0] * x[1]).sin() / x[2] + 2 ** x[0] - 3 / x[1] + x[2] ** 2 \
+        + x[0].logistic() + (1 - x[1]).exp() - x[2].ln() * x[0].sqrt() + x[1].arctangent()
+    val, grad = batch_gradient(fn, points)
+    assert val.shape == (20,)
+    assert grad.shape == (20, 3)
+    for p, v, g in zip(points, val, grad):
+        ref = fn([AutoDiff(p[j], np.eye(3)[j]) for j in range(3)])
+        assert np.isclose(v, ref.val)
+        assert np.allclose(g, ref.der)
+
+def test_batch_with_unbatched_constants():
+    points = np.array([[1., 2.], [3., 4.]])
+    c = AutoDiff(2., [1., 0.])
+    val, grad = batch_gradient(lambda x: (c + np.array([1., 2.])) * x[1], points)
+    assert all(val == [6, 16])
+    assert (grad == [[2, 3], [4, 4]]).all()
+
+def test_batch_constant_function():
+    val, grad = batch_gradient(lambda x: 3., np.ones((4, 2)))
+    assert all(val == 3)
+    assert (grad == 0).all()
+
+def test_jacobian_chunks():
+    x = np.array([0.5, 1., 1.5, 2., 2.5])
+    fn = lambda x: [x[0] * x[1], (x[2] + x[3]).sin(), x[4] ** 2 / x[0], x[1] - 3]
+    dense = np.array([f.der for f in fn([AutoDiff(v, np.eye(5)[j]) for j, v in enumerate(x)])])
+    for chunk_size in [1, 2, 3, 5, 8, None]:
+        val, jac = value_and_jacobian(fn, x, chunk_size)
+        assert jac.shape == (4, 5)
+        assert np.allclose(jac, dense)
+        assert np.allclose(val, [0.5, np.sin(3.5), 12.5, -2])
+    with pytest.raises(ValueError):
+        jacobian(fn, x, 0)
+
+def test_jacobian_output_types():
+    x = [1., 2., 3.]
+    assert np.allclose(jacobian(lambda x: x[0] * x[1] * x[2], x, 2), [6, 3, 2])
+    assert np.allclose(jacobian(lambda x: x ** 2, x, 2), np.diag([2, 4, 6]))
+    assert np.allclose(jacobian(lambda x: [x[0], 4.], x), [[1, 0, 0], [0, 0, 0]])
+
+def test_default_chunk_size():
+    assert _default_chunk_size(10) == 10
+    assert 1 <= _default_chunk_size(10**5) < 10**5
+    assert _default_chunk_size(10**9) == 1
+
+def test_hessian():
+    x = np.array([0.5, 1.2, -0.3])
+    fn = lambda x: x[0] ** 2 * x[1] + (x[1] * x[2]).sin() + x[0].exp() / x[1] + x[2] ** 3
+    a, b, c = x
+    expected = np.array([
+        [2*b + np.exp(a)/b, 2*a - np.exp(a)/b**2, 0],
+        [2*a - np.exp(a)/b**2, -c**2*np.sin(b*c) + 2*np.exp(a)/b**3,
+         np.cos(b*c) - b*c*np.sin(b*c)],
+        [0, np.cos(b*c) - b*c*np.sin(b*c), -b**2*np.sin(b*c) + 6*c]])
+    grad = [2*a*b + np.exp(a)/b, a**2 + c*np.cos(b*c) - np.exp(a)/b**2, b*np.cos(b*c) + 3*c**2]
+    for vectorized in [True, False]:
+        val, g, hess = value_gradient_hessian(fn, x, vectorized)
+        assert np.isclose(val, a**2*b + np.sin(b*c) + np.exp(a)/b + c**3)
+        assert np.allclose(g, grad)
+        assert np.allclose(hess, expected)
+        assert np.allclose(hessian(fn, x, vectorized), expected)
+
+def test_hessian_constant_and_linear():
+    assert (hessian(lambda x: 4., [1., 2.]) == 0).all()
+    val, grad, hess = value_gradient_hessian(lambda x: 2 * x[0] - x[1], [1., 2.])
+    assert val == 0
+    assert all(grad == [2, -1])
+    assert (hess == 0).all()
+
+def test_hvp_matches_hessian():
+    x = np.array([0.5, 1.2, -0.3])
+    v = np.array([1., -2., 0.5])
+    fn = lambda x: x[0] ** 2 * x[1] + (x[1] * x[2]).sin() + x[0].exp() / x[1] + x[2] ** 3 \
+        + x[0] ** x[1] + x[2].logistic() + x[1].arctangent() + x[2].tanh() - 2 / x[1].sqrt()
+    val, grad, hv = gradient_and_hvp(fn, x, v)
+    ref_val, ref_grad, ref_hess = value_gradient_hessian(fn, x)
+    assert np.isclose(val, ref_val)
+    assert np.allclose(grad, ref_grad)
+    assert np.allclose(hv, ref_hess.dot(v))
+    assert np.allclose(hvp(fn, x, v), ref_hess.dot(v))
+
+def test_hvp_large_quadratic():
+    n = 500
+    x = np.linspace(-1, 1, n)
+    v = np.ones(n)
+    fn = lambda x: sum((x[i + 1] - x[i]) ** 2 for i in range(n - 1))
+    hv = hvp(fn, x, v)
+    assert np.allclose(hv, 0)
+    hv = hvp(fn, x, np.eye(n)[0])
+    assert np.allclose(hv[:2], [2, -2]) and np.allclose(hv[2:], 0)
+
+def test_hvp_edge_cases():
+    val, grad, hv = gradient_and_hvp(lambda x: x[0] + x[1], [1., 2.], [1., 1.])
+    assert val == 3 and all(grad == [1, 1]) and all(hv == 0)
+    val, grad, hv = gradient_and_hvp(lambda x: 3., [1., 2.], [1., 1.])
+    assert val == 3 and all(grad == 0) and all(hv == 0)
+    with pytest.raises(ValueError):
+        hvp(lambda x: x[0], [1., 2.], [1.])
+
+def test_taylor_derivatives():
+    ders = taylor_derivatives(lambda x: x.sin() * x.exp(), 0.3, 6)
+    # d^k/dx^k e^x sin(x) = 2^(k/2) e^x sin(x + k pi / 4)
+    expected = [2**(k/2) * np.exp(0.3) * np.sin(0.3 + k*np.pi/4) for k in range(7)]
+    assert np.allclose(ders, expected)
+
+    ders = taylor_derivatives(lambda x: 5., 0.3, 3)
+    assert all(ders == [5, 0, 0, 0])
+    with pytest.raises(ValueError):
+        taylor_derivatives(lambda x: x, 0.3, -1)
+
+def test_jacobian_dtype():
+    fn = lambda x: [x[0] * x[1], x[1].sin()]
+    for dtype in [np.float32, np.longdouble]:
+        jac = jacobian(fn, [1., 2.], chunk_size=1, dtype=dtype)
+        assert jac.dtype == dtype
+        assert np.allclose(jac, jacobian(fn, [1., 2.]), rtol=1e-6)
+        val, grad = batch_gradient(lambda x: x[0] * x[1], [[1., 2.], [3., 4.]], dtype)
+        assert val.dtype == dtype and grad.dtype == dtype
@@ -0,0 +1,70 @@
+import sys
+import numpy as np
+sys.path.append(sys.path[0][:-5])
+
+import pytest
+from autodiff.autodiff import AutoDiff
+from autodiff.hyperdual import HyperDual
+
+def second_derivative(name, x, *args):
+    out = getattr(HyperDual(x, 1., 1.), name)(*args)
+    return out.val, out.eps1, out.eps12
+
+def test_elementary_functions():
+    x = 0.4
+    checks = {
+        'sin': (np.sin(x), np.cos(x), -np.sin(x)),
+        'cos': (np.cos(x), -np.sin(x), -np.cos(x)),
+        'tan': (np.tan(x), 1/np.cos(x)**2, 2*np.tan(x)/np.cos(x)**2),
+        'arcsine': (np.arcsin(x), 1/np.sqrt(1-x**2), x/(1-x**2)**1.5),
+        'arccosine': (np.arccos(x), -1/np.sqrt(1-x**2), -x/(1-x**2)**1.5),
+        'arctangent': (np.arctan(x), 1/(1+x**2), -2*x/(1+x**2)**2),
+        'sinh': (np.sinh(x), np.cosh(x), np.sinh(x)),
+        'cosh': (np.cosh(x), np.sinh(x), np.cosh(x)),
+        'tanh': (np.tanh(x), 1/np.cosh(x)**2, -2*np.tanh(x)/np.cosh(x)**2),
+        'ln': (np.log(x), 1/x, -1/x**2),
+        'exp': (np.exp(x), np.exp(x), np.exp(x)),
+        'sqrt': (np.sqrt(x), 0.5/np.sqrt(x), -0.25*x**-1.5),
+        'reciprocal': (1/x, -1/x**2, 2/x**3),
+    }
+    for name, expected in checks.items():
+        assert np.allclose(second_derivative(name, x), expected), name
+
+    s = 1/(1+np.exp(-x))
+    assert np.allclose(second_derivative('logistic', x), (s, s*(1-s), s*(1-s)*(1-2*s)))
+    assert np.allclose(second_derivative('log', x, 10),
+                       (np.log(x)/np.log(10), 1/(x*np.log(10)), -1/(x**2*np.log(10))))
+    assert np.allclose(second_derivative('expm', x, 3),
+                       (3**x, 3**x*np.log(3), 3**x*np.log(3)**2))
+
+def test_operators():
+    x = HyperDual(2., 1., 1.)
+    out = x ** 3
+    assert (out.val, out.eps1, out.eps12) == (8, 12, 12)
+    out = 2 ** x
+    assert np.allclose((out.val, out.eps1, out.eps12), (4, 4*np.log(2), 4*np.log(2)**2))
+    out = x ** x
+    assert np.allclose((out.val, out.eps1, out.eps12),
+                       (4, 4*(np.log(2)+1), 4*(np.log(2)+1)**2 + 4/2))
+    out = 3 / x - (1 - x) * x + x / 4
+    assert np.allclose((out.val, out.eps1, out.eps12), (1.5+2+0.5, -0.75+3+0.25, 0.75+2))
+    out = -x
+    assert (out.val, out.eps1, out.eps12) == (-2, -1, 0)
+    out = HyperDual(0., 1., 1.) ** 1
+    assert (out.val, out.eps1, out.eps12) == (0, 1, 0)
+
+def test_mixed_partials():
+    x = HyperDual(1.5, 1., 0.)
+    y = HyperDual(0.5, 0., 1.)
+    out = x.sin() * y.exp() + x / y
+    assert np.isclose(out.eps12, np.cos(1.5)*np.exp(0.5) - 1/0.5**2)
+
+def test_comparisons():
+    x = HyperDual(2.)
+    assert x == 2 and x != 3 and x > 1 and x >= 2 and x < 3 and x <= HyperDual(2.)
+
+def test_string_values():
+    with pytest.raises(TypeError):
+        HyperDual("a")
+    with pytest.raises(TypeError):
+        HyperDual(1., "a")
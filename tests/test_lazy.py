@@ -0,0 +1,76 @@
+import sys
+import numpy as np
+sys.path.append(sys.path[0][:-5])
+
+import pytest
+from autodiff.autodiff import AutoDiff
+from autodiff.advector import ADVector
+from autodiff.lazy import LazyDerivatives, is_deferred
+
+
+def _func(x):
+    total = 0
+    for i in range(len(x) - 1):
+        total += 100 * (x[i + 1] - x[i] ** 2) ** 2 + (1 - x[i]) ** 2
+    return total + x[0].sin().log(10) * x[1].exp() / 2 - 3 ** x[0] + (2. * x).tanh()[1]
+
+
+def test_lazy_results():
+    x0 = np.array([0.7, 1.3, 0.4, 2.])
+    expected = _func(ADVector(x0))
+    with LazyDerivatives() as block:
+        out = _func(ADVector(x0))
+    assert is_deferred(out) and block.evaluated == 0 and block.deferred > 0
+    assert np.array_equal(out.val, expected.val)
+    assert np.array_equal(out.der, expected.der)
+    assert not is_deferred(out) and block.evaluated == block.deferred
+
+
+def test_lazy_vectors_and_dtype():
+    x = ADVector(np.array([1.5, 2.5]), dtype=np.float32)
+    with LazyDerivatives():
+        y = (x.log(2) * np.float64(3.) + x[::-1]).sqrt()
+    assert isinstance(y, ADVector) and is_deferred(y)
+    assert y.val.dtype == np.float32
+    expected = (x.log(2) * np.float64(3.) + x[::-1]).sqrt()
+    assert np.array_equal(y.der, expected.der) and y.der.dtype == np.float32
+
+
+def test_lazy_long_chain():
+    z = AutoDiff(0.1, [1.])
+    with LazyDerivatives():
+        for _ in range(20000):
+            z = z * 1.0001 + 0.00001
+    assert np.allclose(z.der, 1.0001 ** 20000)
+
+
+def test_lazy_inplace_and_exit():
+    x = AutoDiff(2., [1., 0.])
+    with LazyDerivatives():
+        y = x * 1.
+        y *= x
+        y += 1.
+    assert is_deferred(y) and y.val == 5.
+    # Outside the block new operations are eager, deferred ones stay lazy until read
+    z = y * 2.
+    assert not is_deferred(z) and np.array_equal(z.der, [8., 0.])
+    assert np.array_equal(x.der, [1., 0.])
+    with pytest.raises(AttributeError):
+        y.missing
+
+    # The deferring wrappers are only installed inside blocks
+    eager = AutoDiff.__mul__
+    with LazyDerivatives():
+        with LazyDerivatives():
+            assert AutoDiff.__mul__ is not eager
+        assert AutoDiff.__mul__ is not eager
+    assert AutoDiff.__mul__ is eager
+
+    # AutoDiff.__getattr__ computes deferred derivatives, until none is left
+    with LazyDerivatives():
+        y = x * 3.
+        z = x.sin()
+    assert '__getattr__' in AutoDiff.__dict__
+    del z
+    assert np.array_equal(y.der, [3., 0.])
+    assert '__getattr__' not in AutoDiff.__dict__
@@ -0,0 +1,115 @@
+import sys
+import numpy as np
+sys.path.append(sys.path[0][:-5])
+
+import pytest
+from autodiff.autodiff import AutoDiff
+from autodiff.advector import ADVector
+from autodiff.reverse import gradient, Tape
+from autodiff.derivatives import jacobian
+from autodiff.sparsity import jacobian_sparsity
+from autodiff import linalg
+
+
+def _fd(f, x, h=1e-6):
+    x = np.asarray(x, dtype=float)
+    return np.array([(np.asarray(f(x + h * e)) - np.asarray(f(x - h * e))) / (2 * h)
+                     for e in np.eye(len(x))]).T
+
+
+_REDUCTIONS = {'sum': np.sum, 'mean': np.mean, 'prod': np.prod, 'norm': np.linalg.norm,
+               'logsumexp': lambda v: np.log(np.sum(np.exp(v)))}
+
+
+@pytest.mark.parametrize('name', sorted(_REDUCTIONS))
+def test_reductions(name):
+    x = np.array([1.5, -2., 0.5, 3.])
+    f, ref = getattr(linalg, name), _REDUCTIONS[name]
+    expected = _fd(ref, x)
+
+    out = f(ADVector(x))
+    assert np.isclose(out.val, ref(x))
+    assert np.allclose(out.der, expected, atol=1e-6)
+
+    # Lists of scalar AutoDiff objects, as passed to np.prod
+    assert np.allclose(f(list(ADVector(x))).der, expected, atol=1e-6)
+    assert np.allclose(gradient(f, x)[1], expected, atol=1e-6)
+    assert np.isclose(f(x), ref(x))
+
+
+@pytest.mark.parametrize('name', ['sum', 'mean', 'prod', 'norm', 'logsumexp'])
+def test_reductions_axis(name):
+    m = np.arange(1., 7.).reshape(2, 3) / 3
+    f, ref = getattr(linalg, name), _REDUCTIONS[name]
+    expected = _fd(lambda v: np.array([ref(row) for row in v.reshape(2, 3)]), m.ravel())
+
+    out = f(AutoDiff(m, np.eye(6).reshape(2, 3, 6)), axis=1)
+    assert isinstance(out, ADVector)
+    assert np.allclose(out.der, expected, atol=1e-6)
+
+    tape = Tape()
+    v = tape.variable(m)
+    tape.backward(linalg.sum(f(v, axis=1)))
+    assert np.allclose(v.adjoint.ravel(), expected.sum(axis=0), atol=1e-6)
+
+
+def test_prod_zeros():
+    x = np.array([2., 0., 3., 4.])
+    assert np.array_equal(linalg.prod(ADVector(x)).der, [0., 24., 0., 0.])
+    x[2] = 0.
+    assert np.array_equal(linalg.prod(ADVector(x)).der, np.zeros(4))
+
+
+def test_norm_zero_and_logsumexp_overflow():
+    assert np.array_equal(linalg.norm(ADVector(np.zeros(3))).der, np.zeros(3))
+    out = linalg.logsumexp(ADVector(np.array([1000., 1000.])))
+    assert np.isclose(out.val, 1000. + np.log(2.))
+    assert np.allclose(out.der, [0.5, 0.5])
+
+
+_A = np.arange(12.).reshape(3, 4) / 7
+
+_PRODUCTS = [(lambda v: linalg.dot(v, v), lambda v: v @ v),
+             (lambda v: linalg.matmul(_A, v), lambda v: _A @ v),
+             (lambda v: linalg.matmul(v, _A.T), lambda v: v @ _A.T),
+             (lambda v: linalg.dot(linalg.matmul(_A, v), v[:3]), lambda v: (_A @ v) @ v[:3])]
+
+
+@pytest.mark.parametrize('k', range(len(_PRODUCTS)))
+def test_matmul_vectors(k):
+    f, ref = _PRODUCTS[k]
+    x = np.array([1.5, -2., 0.5, 3.])
+    expected = _fd(ref, x)
+    assert np.allclose(f(ADVector(x)).der, expected, atol=1e-6)
+    assert np.allclose(jacobian(f, x), expected, atol=1e-6)
+
+
+def test_matmul_matrices():
+    x = np.array([1.5, -2., 0.5, 3.])
+    expected = _fd(lambda u: np.sum(u.reshape(2, 2) @ u.reshape(2, 2)), x)
+
+    m = AutoDiff(x.reshape(2, 2), np.eye(4).reshape(2, 2, 4))
+    product = linalg.matmul(m, m)
+    assert product.der.shape == (2, 2, 4)
+    assert np.allclose(linalg.sum(product).der, expected, atol=1e-6)
+
+    tape = Tape()
+    v = tape.variable(x.reshape(2, 2))
+    tape.backward(linalg.sum(linalg.matmul(v, v)))
+    assert np.allclose(v.adjoint.ravel(), expected, atol=1e-6)
+
+
+def test_sparsity_and_dtype():
+    x = np.array([1.5, -2., 0.5, 3.])
+    pattern = jacobian_sparsity(lambda v: [linalg.sum(v[:2]), linalg.prod(v[2:]),
+                                           linalg.dot(_A[0, :2], v[1:3])], x)
+    assert np.array_equal(pattern, [[1, 1, 0, 0], [0, 0, 1, 1], [0, 1, 1, 0]])
+
+    out = linalg.prod(ADVector(np.ones(3, dtype=np.float32), dtype=np.float32))
+    assert out.der.dtype == np.float32
+
+    # Constant operands take the floating point type of the differentiable one
+    v = ADVector(np.ones(3, dtype=np.float32), dtype=np.float32)
+    for out in [linalg.dot(np.ones(3), v), linalg.matmul(v, np.ones((3, 2))),
+                linalg.dot([v[0], 2.], np.ones(2))]:
+        assert out.val.dtype == np.float32 and out.der.dtype == np.float32
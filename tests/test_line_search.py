@@ -0,0 +1,46 @@
+import sys
+import numpy as np
+sys.path.append(sys.path[0][:-5])
+
+import pytest
+from autodiff.line_search import backtracking, strong_wolfe
+
+
+# (phi, dphi) pairs along a descent direction from t = 0
+_FUNCTIONS = {'quadratic': (lambda t: (t - 3.) ** 2, lambda t: 2 * (t - 3.)),
+              'narrow': (lambda t: (t - 0.01) ** 2, lambda t: 2 * (t - 0.01)),
+              'quartic': (lambda t: (t - 1.) ** 4 - 2 * t, lambda t: 4 * (t - 1.) ** 3 - 2),
+              'rosenbrock': (lambda t: 100 * (t ** 2 - t) ** 2 + (1 - t) ** 2 + t,
+                             lambda t: 200 * (t ** 2 - t) * (2 * t - 1) - 2 * (1 - t) + 1)}
+
+
+def test_backtracking():
+    phi, dphi = _FUNCTIONS['narrow']
+    step = backtracking(phi, phi(0.), dphi(0.))
+    assert phi(step) <= phi(0.) + 1e-4 * step * dphi(0.)
+    assert step == 0.5 ** 6
+    assert backtracking(phi, phi(0.), dphi(0.), step=0.001) == 0.001
+
+
+@pytest.mark.parametrize('name', sorted(_FUNCTIONS))
+@pytest.mark.parametrize('c2', [0.9, 0.1])
+def test_strong_wolfe(name, c2):
+    phi, dphi = _FUNCTIONS[name]
+    calls = []
+
+    def counted(t):
+        calls.append(t)
+        return phi(t)
+
+    step = strong_wolfe(counted, dphi, phi(0.), dphi(0.), c2=c2)
+    assert step > 0
+    assert phi(step) <= phi(0.) + 1e-4 * step * dphi(0.)
+    assert abs(dphi(step)) <= c2 * abs(dphi(0.))
+    assert len(calls) < 15
+
+
+def test_strong_wolfe_quadratic_exact():
+    # The cubic interpolant of a quadratic is exact, so the minimizer is found at once
+    phi, dphi = _FUNCTIONS['quadratic']
+    step = strong_wolfe(phi, dphi, phi(0.), dphi(0.), step=8., c2=1e-6)
+    assert np.isclose(step, 3.)
@@ -2,8 +2,12 @@ import sys
 sys.path.append(sys.path[0][:-5])
 
 import numpy as np
+import pytest
 import autodiff.optimization as opt
 from autodiff.autodiff import AutoDiff as ad
+from autodiff.advector import ADVector
+from autodiff.derivatives import gradient_and_hvp
+from autodiff.tracing import compile_function
 
 def test_conjugate_gradient():
 
@@ -31,6 +35,23 @@ def test_conjugate_gradient():
     assert np.linalg.norm(output[3][-1]) < 10e-10
 
 
+def test_conjugate_gradient_beta():
+
+    # Checks Rosenbrock function w/ both formulas
+    fn = lambda x: 100*(x[1] - x[0]**2)**2 + (1 - x[0])**2
+    for beta in ['FR', 'PR+']:
+        x = ad(-1.2, [1., 0.,])
+        y = ad(1., [0., 1.,])
+        output = opt.conjugate_gradient(fn, [x, y], tol=1e-12, beta=beta)
+        assert output[1] and output[2] < 200
+        assert np.linalg.norm([n.val - 1. for n in output[0]]) < 10e-6
+
+    x = ad(1., [1., 0.,])
+    y = ad(1., [0., 1.,])
+    with pytest.raises(ValueError):
+        opt.conjugate_gradient(fn, [x, y], beta='outer')
+
+
 def test_gradient_descent():
 
     # Checks easy function
@@ -82,8 +103,184 @@ def test_BFGS():
     assert all(output[3][0] == [x,y])
     assert np.linalg.norm(output[3][-1]) < 10e-10
 
+def test_line_search():
+
+    # Every line search and an initial hessian reach the minimum of the Rosenbrock function
+    fn = lambda x: 100*(x[1] - x[0]**2)**2 + (1 - x[0])**2
+    for kwargs in [dict(line_search='wolfe'), dict(line_search='armijo'),
+                   dict(init_hessian=np.array([[802., -400.], [-400., 200.]]))]:
+        x = ad(-1.2, [1., 0.,])
+        y = ad(1., [0., 1.,])
+        output = opt.BFGS(fn, [x, y], tol=1e-12, **kwargs)
+        assert output[1] and output[2] < 100
+        assert np.linalg.norm([n.val - 1. for n in output[0]]) < 10e-8
+
+    x = ad(1., [1., 0.,])
+    y = ad(1., [0., 1.,])
+    fn = lambda x: x[0]**2 + x[1]**2
+    with pytest.raises(ValueError):
+        opt.gradient_descent(fn, [x, y], line_search='exact')
+
+def test_L_BFGS():
+
+    # Checks complicated function in both modes
+    for mode in ['forward', 'reverse']:
+        x = ad(1., [1., 0.,])
+        y = ad(1., [0., 1.,])
+        fn = lambda x: x[0].cos()**2 + x[1].sin()**2
+        output = opt.L_BFGS(fn, [x, y], tol=1e-10, mode=mode)
+        assert np.linalg.norm(output[0] - np.array([np.pi/2, 0])) < 10e-10
+
+    # Checks Rosenbrock function, w/ a history of 3 steps
+    x = ad(-1.2, [1., 0.,])
+    y = ad(1., [0., 1.,])
+    fn = lambda x: 100*(x[1] - x[0]**2)**2 + (1 - x[0])**2
+    output = opt.L_BFGS(fn, [x, y], m=3, tol=1e-12, return_trace=True)
+    assert output[1] and output[2] < 100
+    assert np.linalg.norm([n.val - 1. for n in output[0]]) < 10e-8
+    assert all(output[3][0] == [x,y])
+
+def test_L_BFGS_reverse_memory():
+
+    # Reverse mode only keeps values, dense seeds for n = 20000 would take 3.2 GB
+    n = 20000
+    fn = lambda x: sum((x[i] - 1.)**2 for i in range(n))
+    output = opt.L_BFGS(fn, ADVector(np.zeros(n), np.zeros((n, 0))), mode='reverse')
+    assert output[1]
+    assert max(abs(v.val - 1.) for v in output[0]) < 10e-10
+    assert all(np.size(v.der) == 0 for v in output[0])
+
+def test_newton_minimize():
+
+    # Rosenbrock function w/ and w/o the line search
+    fn = lambda x: 100*(x[1] - x[0]**2)**2 + (1 - x[0])**2
+    for line_search in ['armijo', None]:
+        x = ad(-1.2, [1., 0.,])
+        y = ad(1., [0., 1.,])
+        output = opt.newton_minimize(fn, [x, y], tol=1e-12, line_search=line_search)
+        assert output[1] and output[2] < 30
+        assert np.linalg.norm([n.val - 1. for n in output[0]]) < 10e-8
+
+    # Indefinite hessian at the starting point
+    x = ad(1., [1., 0.,])
+    y = ad(1., [0., 1.,])
+    fn = lambda x: x[0].cos()**2 + x[1].sin()**2
+    output = opt.newton_minimize(fn, [x, y], return_trace=True)
+    assert output[1] and output[2] < 10
+    assert np.linalg.norm([output[0][0].val - np.pi/2, output[0][1].val]) < 10e-10
+    assert all(output[3][0] == [x,y])
+
+    # A quadratic is solved in one step
+    fn = lambda x: (x[0] + 1)**2 + 3*x[1]**2 + x[0]*x[1]
+    output = opt.newton_minimize(fn, [x, y], vectorized=False)
+    assert output[1] and output[2] == 2
+    assert np.linalg.norm([output[0][0].val + 12/11, output[0][1].val - 2/11]) < 10e-10
+
+    # Steps come from the shifted factor
+    A = np.random.RandomState(0).randn(50, 50)
+    hess = np.dot(A, A.T) - 20 * np.eye(50)
+    factor, shift = opt._shifted_cholesky(hess)
+    assert shift > 0
+    b = np.arange(50.)
+    expected = np.linalg.solve(hess + shift * np.eye(50), b)
+    assert np.allclose(opt._cholesky_solve(factor, b), expected)
+    assert np.allclose(opt._cholesky_solve(factor, b, block=7), expected)
+
+    with pytest.raises(ValueError):
+        opt.newton_minimize(fn, [x, y], line_search='wolfe')
+
+def test_trust_region_newton_cg():
+
+    # Rosenbrock function, w/ an ADVector input
+    fn = lambda x: 100*(x[1] - x[0]**2)**2 + (1 - x[0])**2
+    output = opt.trust_region_newton_cg(fn, ADVector([-1.2, 1.]), tol=1e-12)
+    assert output[1] and output[2] < 50
+    assert np.linalg.norm([n.val - 1. for n in output[0]]) < 10e-8
+
+    # Indefinite hessian at the starting point, handled along negative curvature
+    x = ad(1., [1., 0.,])
+    y = ad(1., [0., 1.,])
+    fn = lambda x: x[0].cos()**2 + x[1].sin()**2
+    output = opt.trust_region_newton_cg(fn, [x, y], return_trace=True)
+    assert output[1] and output[2] < 10
+    assert np.linalg.norm([output[0][0].val - np.pi/2, output[0][1].val]) < 10e-10
+    assert all(output[3][0] == [x,y])
+
+    # Many variables, w/ a small radius limiting every step
+    n = 50
+    fn = lambda x: sum((x[i] - i)**2 * (1 + i) for i in range(n))
+    output = opt.trust_region_newton_cg(fn, ADVector(np.zeros(n)), radius=0.5,
+                                        max_radius=1.)
+    assert output[1]
+    assert np.linalg.norm([v.val for v in output[0]] - np.arange(n)) < 10e-8
+    output = opt.trust_region_newton_cg(fn, ADVector(np.zeros(n)), max_iter=3)
+    assert not output[1] and output[2] == 3
+
+    # Started at the minimum, the gradient is 0 and no step is taken
+    fn = lambda x: (x[0] - 2)**2 + (x[1] + 1)**2
+    output = opt.trust_region_newton_cg(fn, ADVector([2., -1.]))
+    assert output[1] and output[2] == 0
+    assert [n.val for n in output[0]] == [2., -1.]
+
+    # Convergence is declared on the gradient norm at the returned point
+    fn = lambda x: 100*(x[1] - x[0]**2)**2 + (1 - x[0])**2
+    for tol in [1e-4, 1e-10]:
+        output = opt.trust_region_newton_cg(fn, ADVector([-1.2, 1.]), tol=tol)
+        grad = gradient_and_hvp(fn, [n.val for n in output[0]], np.zeros(2))[1]
+        assert output[1] and np.linalg.norm(grad) <= tol
+
+    with pytest.raises(ValueError):
+        opt.trust_region_newton_cg(fn, [x, y], eta=0.5)
+    with pytest.raises(ValueError):
+        opt.trust_region_newton_cg(fn, [x, y], radius=10., max_radius=1.)
+
+def test_reverse_mode():
+    fn = lambda x: x[0].cos()**2 + x[1].sin()**2
+
+    x = ad(1., [1., 0.,])
+    y = ad(1., [0., 1.,])
+    output = opt.gradient_descent(fn, [x, y], tol=1e-10, mode='reverse')
+    assert np.linalg.norm(output[0] - np.array([np.pi/2, 0])) < 10e-10
+
+    x = ad(1., [1., 0.,])
+    y = ad(1., [0., 1.,])
+    output = opt.BFGS(fn, [x, y], tol=1e-10, mode='reverse')
+    assert np.linalg.norm(output[0] - np.array([np.pi/2, 0])) < 10e-10
+
+    x = ad(1., [1., 0.,])
+    y = ad(1., [0., 1.,])
+    output = opt.conjugate_gradient(fn, [x, y], tol=1e-10, mode='reverse')
+    assert np.linalg.norm(output[0] - np.array([np.pi/2, 0])) < 10e-10
+
+    x = ad(1., [1., 0.,])
+    y = ad(1., [0., 1.,])
+    try:
+        _ = opt.BFGS(fn, [x, y], mode='sideways')
+    except ValueError:
+        assert True
+
+def test_compiled_function():
+    fn = compile_function(lambda x: x[0].cos()**2 + x[1].sin()**2)
+
+    for mode in ['forward', 'reverse']:
+        x = ad(1., [1., 0.,])
+        y = ad(1., [0., 1.,])
+        output = opt.BFGS(fn, [x, y], tol=1e-10, mode=mode)
+        assert np.linalg.norm(output[0] - np.array([np.pi/2, 0])) < 10e-10
+
+        x = ad(1., [1., 0.,])
+        y = ad(1., [0., 1.,])
+        output = opt.gradient_descent(fn, [x, y], tol=1e-10, mode=mode)
+        assert np.linalg.norm(output[0] - np.array([np.pi/2, 0])) < 10e-10
+    assert len(fn.traces) == 1
+
 if __name__ == '__main__':
     test_conjugate_gradient()
+    test_conjugate_gradient_beta()
     test_gradient_descent()
     test_BFGS()
+    test_line_search()
+    test_L_BFGS()
+    test_reverse_mode()
+    test_compiled_function()
     
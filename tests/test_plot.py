@@ -19,6 +19,20 @@ def test_plot():
     assert 'trace.png' in os.listdir("./")
     os.remove("./trace.png")
 
+def test_func_grid_points():
+    X, Y = np.mgrid[-1:1:0.5, -1:1:0.5]
+
+    # Batched evaluation
+    func = lambda x: x[0].sin() + x[1]**2
+    grid = plt._func_grid_points(func, X, Y)
+    assert np.allclose(grid, np.sin(X) + Y**2)
+
+    # Value dependent branches fall back to point by point evaluation
+    func = lambda x: x[0] if x[0] > x[1] else x[1]
+    grid = plt._func_grid_points(func, X, Y)
+    assert np.allclose(grid, np.maximum(X, Y))
+
 if __name__ == '__main__':
     test_plot()
+    test_func_grid_points()
     
@@ -0,0 +1,111 @@
+import sys
+import numpy as np
+sys.path.append(sys.path[0][:-5])
+
+import pytest
+from autodiff.autodiff import AutoDiff
+from autodiff.advector import ADVector
+from autodiff.reverse import gradient
+from autodiff.derivatives import batch_gradient, jacobian
+from autodiff.tracing import compile_function, Trace, Tracer
+from autodiff.codegen import generate_function
+from autodiff.primitives import Primitive, register, primitive, get_primitive, _REGISTRY
+
+
+def _newton_sqrt(a):
+    x = np.ones_like(np.asarray(a, dtype=float))
+    for _ in range(60):
+        x = 0.5 * (x + a / x)
+    return x
+
+
+_RULES = {'derivative': dict(derivative=lambda a: 0.5 / np.sqrt(a)),
+          'jvp': dict(jvp=lambda args, t: 0.5 / np.sqrt(args[0]) * t[0]),
+          'vjp': dict(vjp=lambda args, v, c: (0.5 / v * c,))}
+
+
+@pytest.mark.parametrize('rule', sorted(_RULES))
+def test_engines(rule, tmpdir):
+    s = register('test_sqrt_' + rule, _newton_sqrt, **_RULES[rule])
+    assert get_primitive('test_sqrt_' + rule) is s
+    fn = lambda x: s(x[0] * x[1]) + x[1]
+    expected = [0.5 * np.sqrt(1.5), 1 + 0.5 * np.sqrt(2 / 3)]
+
+    assert np.allclose(fn(ADVector([2., 3.])).der, expected)
+    assert np.allclose(gradient(fn, [2., 3.])[1], expected)
+    assert np.allclose(batch_gradient(fn, [[2., 3.], [2., 3.]])[1], [expected, expected])
+    compiled = compile_function(fn)
+    assert np.allclose(compiled(ADVector([2., 3.])).der, expected)
+    assert compiled.traces[('vector', 2)] is not None
+    generated = generate_function(fn, cache=str(tmpdir))
+    assert np.allclose(generated(ADVector([2., 3.])).der, expected)
+
+    x = s(AutoDiff(4., [1., 0.]))
+    assert x.val == 2. and np.allclose(x.der, [0.25, 0.])
+    assert s(4.) == 2.
+
+
+def test_primitive_called_once():
+    calls = []
+
+    def black_box(a):
+        calls.append(1)
+        return _newton_sqrt(a)
+    s = register('test_black_box', black_box, derivative=lambda a: 0.5 / np.sqrt(a))
+    s(ADVector([1., 4., 9.]))
+    gradient(lambda x: s(x[0]), [4.])
+    assert len(calls) == 2
+
+
+def test_two_arguments():
+    h = register('test_hypot_vjp', np.hypot,
+                 vjp=lambda a, v, c: (a[0] / v * c, a[1] / v * c))
+    g = register('test_hypot_jvp', np.hypot,
+                 jvp=lambda a, t: (a[0] * t[0] + a[1] * t[1]) / np.hypot(*a))
+    for p in [h, g]:
+        fn = lambda x: p(x[0], x[1]) * x[0]
+        assert np.allclose(fn(ADVector([3., 4.])).der, [6.8, 2.4])
+        assert np.allclose(gradient(fn, [3., 4.])[1], [6.8, 2.4])
+        assert np.allclose(compile_function(fn)(ADVector([3., 4.])).der, [6.8, 2.4])
+        assert np.allclose(p(AutoDiff(3., [1.]), 4.).der, [0.6])
+
+
+def test_vector_primitive():
+    norm = register('test_norm', lambda v: np.sqrt(np.sum(v ** 2)),
+                    vjp=lambda a, v, c: (a[0] / v * c,))
+    assert np.allclose(jacobian(norm, [3., 4.]), [0.6, 0.8])
+    assert np.allclose(gradient(lambda x: norm(x[0]), [np.array([3., 4.])])[1], [[0.6, 0.8]])
+
+
+def test_decorator_and_errors():
+    @primitive(derivative=lambda x: 1 / (1 + np.exp(- x)))
+    def test_softplus(x):
+        return np.log1p(np.exp(x))
+    assert isinstance(test_softplus, Primitive)
+    assert get_primitive('test_softplus') is test_softplus
+    assert np.allclose(test_softplus(AutoDiff(0., 1.)).der, 0.5)
+
+    with pytest.raises(ValueError):
+        register('sin', np.sin, derivative=np.cos)
+    with pytest.raises(ValueError):
+        register('test_no_rule', np.sin)
+    with pytest.raises(KeyError):
+        get_primitive('test_missing')
+
+    # Traces need the registered primitive, which generated code looks up by name
+    unregistered = Primitive('test_unregistered', np.sin, derivative=np.cos)
+    with pytest.raises(ValueError):
+        unregistered(Tracer(Trace(1), 0))
+    compiled = compile_function(lambda x: unregistered(x[0]))
+    assert np.allclose(compiled(ADVector([1.])).der, [np.cos(1.)])
+    assert compiled.traces[('vector', 1)] is None
+
+
+def test_cached_code_needs_primitives(tmpdir):
+    s = register('test_cached_sqrt', _newton_sqrt, derivative=lambda a: 0.5 / np.sqrt(a))
+    fn = lambda x: s(x[0])
+    generate_function(fn, cache=str(tmpdir))(ADVector([4.]))
+    # A new process loading the cached code w/o registering the primitive
+    del _REGISTRY['test_cached_sqrt']
+    with pytest.raises(ValueError, match='test_cached_sqrt'):
+        generate_function(fn, cache=str(tmpdir))(ADVector([4.]))
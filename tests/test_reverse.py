@@ -0,0 +1,81 @@
+import sys
+import numpy as np
+sys.path.append(sys.path[0][:-5])
+
+import pytest
+from autodiff.autodiff import AutoDiff
+from autodiff.reverse import ReverseAutoDiff, Tape, gradient
+
+def test_arithmetic_gradient():
+    fn = lambda x: x[0] * x[1] + x[0] / x[1] - 3 * x[1] + 2 ** x[0] - x[0] ** 3
+    val, grad = gradient(fn, [2., 4.])
+    assert val == 2*4 + 2/4 - 3*4 + 2**2 - 2**3
+    assert np.allclose(grad, [4 + 1/4 + 4*np.log(2) - 3*4, 2 - 2/16 - 3])
+
+def test_rsub_rdiv_neg():
+    fn = lambda x: 1 - x[0] + 6 / x[0] - (-x[0])
+    val, grad = gradient(fn, [3.])
+    assert val == 1 - 3 + 2 + 3
+    assert np.isclose(grad[0], -1 - 6/9 + 1)
+
+def test_power_objects():
+    val, grad = gradient(lambda x: x[0] ** x[1], [2., 3.])
+    assert val == 8
+    assert np.allclose(grad, [3 * 2**2, 8 * np.log(2)])
+
+def test_elementary_matches_forward():
+    names = ['sin', 'cos', 'tan', 'arcsine', 'arccosine', 'arctangent', 'sinh', 'cosh',
+             'tanh', 'ln', 'exp', 'logistic', 'sqrt']
+    for name in names:
+        val, grad = gradient(lambda x: getattr(x[0], name)(), [0.5])
+        forward = getattr(AutoDiff(0.5, 1.), name)()
+        assert np.isclose(val, forward.val)
+        assert np.isclose(grad[0], forward.der)
+
+    val, grad = gradient(lambda x: x[0].log(5) + x[0].expm(10), [2.])
+    assert np.isclose(val, np.log(2)/np.log(5) + 100)
+    assert np.isclose(grad[0], 1/(2*np.log(5)) + 100*np.log(10))
+
+def test_reused_variable():
+    val, grad = gradient(lambda x: x[0].sin() * x[0].sin() + x[0].cos() ** 2, [0.7])
+    assert np.isclose(val, 1)
+    assert np.isclose(grad[0], 0)
+
+def test_prod_many_inputs():
+    n = 2000
+    values = np.linspace(0.5, 1.5, n)
+    val, grad = gradient(lambda x: np.prod(x), values)
+    assert np.isclose(val, np.prod(values))
+    assert np.allclose(grad, np.prod(values) / values)
+
+def test_constant_function():
+    val, grad = gradient(lambda x: 3., [1., 2.])
+    assert val == 3.
+    assert all(grad == [0., 0.])
+
+def test_array_broadcast():
+    tape = Tape()
+    x = tape.variable(2.)
+    y = x * np.array([1., 2., 3.])
+    out = y.sin() * np.ones(3)
+    total = out * 1.
+    tape.backward(total)
+    assert x.der.shape == ()
+    assert np.isclose(x.der, np.sum(np.array([1., 2., 3.]) * np.cos(2. * np.array([1., 2., 3.]))))
+
+def test_tape_mismatch():
+    a = ReverseAutoDiff(1.)
+    b = ReverseAutoDiff(2.)
+    with pytest.raises(ValueError):
+        a.tape.backward(b)
+
+def test_comparisons():
+    a = ReverseAutoDiff(1.)
+    b = ReverseAutoDiff(2., a.tape)
+    assert a < b and a <= 1 and b > a and b >= 2 and a == 1 and a != b
+
+def test_string_values():
+    with pytest.raises(TypeError):
+        ReverseAutoDiff("a")
+    with pytest.raises(TypeError):
+        ReverseAutoDiff([2, "a"])
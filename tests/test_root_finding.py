@@ -4,6 +4,8 @@ sys.path.append(sys.path[0][:-5])
 import numpy as np
 import autodiff.root_finding as rf
 from autodiff.autodiff import AutoDiff as ad
+from autodiff.advector import ADVector
+from autodiff.tracing import compile_function
 
 
 def test_newton():
@@ -46,5 +48,73 @@ def test_newton():
     assert output[3][-1] == output[0]
 
 
+def test_newton_advector():
+    x = ADVector([1., 2.])
+    fn = lambda x: x ** 3 - np.array([8., 27.])
+    output = rf.newton(fn, x, tol=1e-10)
+    assert output[1]
+    assert np.allclose([o.val for o in output[0]], [2., 3.])
+    assert all(x.val == [1., 2.])
+
+
+def test_newton_chunked_jacobian():
+    fn = lambda x: [x[0] ** 2 - 4, x[0] * x[1] - 6, x[2].exp() - 1]
+    for chunk_size in [1, 2, 'auto']:
+        num = [ad(1., [1., 0., 0.]), ad(1., [0., 1., 0.]), ad(1., [0., 0., 1.])]
+        output = rf.newton(fn, num, chunk_size=chunk_size)
+        assert output[1]
+        assert np.allclose([o.val for o in output[0]], [2., 3., 0.])
+
+    try:
+        _ = rf.newton(lambda x: x[0], [ad(1., [1.])], chunk_size=1)
+    except TypeError:
+        assert True
+
+
+def test_newton_compiled_function():
+    fn = compile_function(lambda x: [x[0] ** 2 - 4, x[0] * x[1] - 6, x[2].exp() - 1])
+    for chunk_size in [None, 2]:
+        output = rf.newton(fn, ADVector([1., 1., 1.]), chunk_size=chunk_size)
+        assert output[1]
+        assert np.allclose([o.val for o in output[0]], [2., 3., 0.])
+    assert fn.traces[('vector', 3)] is not None
+
+
+def test_newton_sparse_jacobian():
+    n = 12
+    fn = lambda x: [2. * x[i] - (x[i - 1] if i > 0 else 0.) -
+                    (x[i + 1] if i < n - 1 else 0.) + x[i] ** 3 - 1. for i in range(n)]
+    output = rf.newton(fn, ADVector(np.zeros(n)), sparse=True)
+    expected = rf.newton(fn, ADVector(np.zeros(n)))
+    assert output[1]
+    assert np.allclose([o.val for o in output[0]], [o.val for o in expected[0]])
+    assert np.allclose([o.val for o in fn(output[0])], 0.)
+
+    try:
+        rf.newton(fn, ADVector(np.zeros(n)), chunk_size=2, sparse=True)
+    except ValueError:
+        assert True
+    else:
+        assert False
+
+    output = rf.newton(compile_function(fn), ADVector(np.zeros(n)), sparse=True)
+    assert output[1]
+
+
+def test_newton_step():
+    jac = np.array([[4., 1.], [1., 3.]])
+    f_val = np.array([1., 2.])
+    assert np.allclose(rf._newton_step(jac, f_val), np.linalg.solve(jac, f_val))
+    # Singular and non-square Jacobians get the pseudo-inverse step
+    for jac in [np.array([[1., 2.], [2., 4.]]), np.array([[1., 2.]])]:
+        f = f_val[:len(jac)]
+        assert np.allclose(rf._newton_step(jac, f), np.dot(np.linalg.pinv(jac), f))
+
+
 if __name__ == '__main__':
     test_newton()
+    test_newton_advector()
+    test_newton_chunked_jacobian()
+    test_newton_compiled_function()
+    test_newton_sparse_jacobian()
+    test_newton_step()
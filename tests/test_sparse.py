@@ -0,0 +1,58 @@
+import sys
+import numpy as np
+sys.path.append(sys.path[0][:-5])
+
+import pytest
+from autodiff.autodiff import AutoDiff
+from autodiff.sparse import SparseDer
+
+def test_unit_and_dense():
+    d = SparseDer.unit(2, 5, 3.)
+    assert d.nnz == 1
+    assert d.shape == (5,)
+    assert all(d.toarray() == [0, 0, 3, 0, 0])
+    assert all(SparseDer.from_dense([0, 1, 0, 2]).indices == [1, 3])
+
+def test_merge():
+    a = SparseDer([0, 3], [1., 2.], 5)
+    b = SparseDer([1, 3], [4., 5.], 5)
+    assert all((a + b).indices == [0, 1, 3])
+    assert all((a + b).toarray() == [1, 4, 0, 7, 0])
+    assert all((a - b).toarray() == [1, -4, 0, -3, 0])
+    assert all((-a).toarray() == [-1, 0, 0, -2, 0])
+    with pytest.raises(ValueError):
+        a + SparseDer([0], [1.], 4)
+
+def test_scalar_factors():
+    a = SparseDer([0, 3], [1., 2.], 5)
+    assert all((np.float64(2.) * a).toarray() == [2, 0, 0, 4, 0])
+    assert all((a / 2).toarray() == [0.5, 0, 0, 1, 0])
+    assert isinstance(np.array(3.) * a, SparseDer)
+
+def test_mixed_dense():
+    a = SparseDer([1], [1.], 3)
+    assert all(a + np.array([1., 1., 1.]) == [1, 2, 1])
+    assert all(np.array([1., 1., 1.]) - a == [1, 0, 1])
+
+def test_autodiff_matches_dense():
+    n = 4
+    values = [0.5, 1.5, 2., 0.3]
+    fn = lambda x: x[0].sin() * x[1] / x[2] + 2 ** x[3] - x[0].logistic().sqrt().tanh() \
+        + x[1].ln() + x[2].log(3) + x[3].exp() - 3 / x[1] + x[2] ** 3 - x[0].arctangent()
+    sparse = fn([AutoDiff(v, SparseDer.unit(i, n)) for i, v in enumerate(values)])
+    dense = fn([AutoDiff(v, np.eye(n)[i]) for i, v in enumerate(values)])
+    assert isinstance(sparse.der, SparseDer)
+    assert sparse.val == dense.val
+    assert np.allclose(sparse.der.toarray(), dense.der)
+
+def test_large_chain():
+    n = 5000
+    x = [AutoDiff(1., SparseDer.unit(i, n)) for i in range(n)]
+    terms = [(x[i + 1] - x[i] ** 2) ** 2 + (1 - x[i]) ** 2 for i in range(n - 1)]
+    assert all(t.der.nnz == 2 for t in terms[:10])
+    f = terms[0]
+    for t in terms[1:]:
+        f = f + t
+    assert f.val == 0
+    assert f.der.nnz == n
+    assert all(f.der.toarray() == 0)
@@ -0,0 +1,75 @@
+import sys
+import numpy as np
+sys.path.append(sys.path[0][:-5])
+
+import pytest
+from autodiff.advector import ADVector
+from autodiff.derivatives import jacobian
+from autodiff.sparse import PatternDer
+from autodiff.sparsity import SparseJacobian, jacobian_sparsity, color_columns, \
+    compressed_jacobian, sparse_jacobian
+
+
+def _tridiagonal(x):
+    inner = 2. * x[1:-1] - x[:-2] - x[2:] + x[1:-1] ** 3
+    return [x[0] - 1.] + [inner[i] for i in range(len(x) - 2)] + [x[len(x) - 1].sin()]
+
+
+def test_pattern_der():
+    p = PatternDer.identity(3)
+    assert p.shape == (3, 3) and p.ndim == 2
+    assert all((p[0] + p[2]).mask == [True, False, True])
+    assert all((p[0] - p[0]).mask == [True, False, False])
+    assert all((0. * p[1]).mask == [False, True, False])
+    assert (np.array([[1.], [2.], [3.]]) * p).shape == (3, 3)
+    assert all((p[0] + np.array([0., 2., 0.])).mask == [True, True, False])
+
+
+def test_jacobian_sparsity():
+    x = np.linspace(0.1, 1., 8)
+    pattern = jacobian_sparsity(_tridiagonal, x)
+    expected = np.zeros((8, 8), dtype=bool)
+    expected[0, 0] = expected[7, 7] = True
+    for i in range(1, 7):
+        expected[i, i - 1:i + 2] = True
+    assert np.array_equal(pattern, expected)
+
+    # Entries that cancel at x are kept
+    pattern = jacobian_sparsity(lambda x: [x[0] - x[0] + x[1] * 0.], [1., 2.])
+    assert np.array_equal(pattern, [[True, True]])
+
+
+def test_color_columns():
+    x = np.linspace(0.1, 1., 20)
+    pattern = jacobian_sparsity(_tridiagonal, x)
+    colors = color_columns(pattern)
+    assert colors.max() + 1 == 3
+    for i in range(pattern.shape[0]):
+        row = colors[pattern[i]]
+        assert len(set(row)) == len(row)
+    assert all(color_columns(np.eye(4, dtype=bool)) == 0)
+
+
+def test_sparse_jacobian():
+    x = np.linspace(0.1, 1., 20)
+    val, jac = sparse_jacobian(_tridiagonal, x)
+    assert isinstance(jac, SparseJacobian)
+    assert jac.shape == (20, 20) and jac.nnz == 56
+    assert np.allclose(jac.toarray(), jacobian(_tridiagonal, x))
+    assert np.allclose(jac.dot(x), jacobian(_tridiagonal, x) @ x)
+    assert np.allclose(jac @ np.eye(20), jacobian(_tridiagonal, x))
+    assert np.allclose(val, [o.val for o in _tridiagonal(ADVector(x))])
+
+    # Vectorized functions returning an ADVector
+    fn = lambda x: x[1:] * x[:-1]
+    pattern = jacobian_sparsity(fn, x)
+    val, jac = compressed_jacobian(fn, x, pattern, color_columns(pattern))
+    assert np.allclose(jac.toarray(), jacobian(fn, x))
+
+
+def test_sparse_jacobian_from_dense():
+    dense = np.array([[1., 0., 2.], [0., 0., 3.]])
+    jac = SparseJacobian.from_dense(dense)
+    assert jac.nnz == 3
+    assert all(jac.indptr == [0, 2, 3])
+    assert np.array_equal(jac.toarray(), dense)
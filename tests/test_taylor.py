@@ -0,0 +1,83 @@
+import sys
+import numpy as np
+sys.path.append(sys.path[0][:-5])
+
+import pytest
+from math import factorial
+from autodiff.taylor import Taylor
+from autodiff.hyperdual import HyperDual
+
+K = 10
+
+def test_variable():
+    x = Taylor.variable(2., 3)
+    assert all(x.coeffs == [2, 1, 0, 0])
+    assert x.val == 2 and x.order == 3
+    assert all(Taylor.variable(2., 0).coeffs == [2])
+
+def test_matches_hyperdual_second_order():
+    names = ['sin', 'cos', 'tan', 'arcsine', 'arccosine', 'arctangent', 'sinh', 'cosh',
+             'tanh', 'ln', 'exp', 'logistic', 'sqrt']
+    for name in names:
+        ders = getattr(Taylor.variable(0.4, 2), name)().derivatives()
+        ref = getattr(HyperDual(0.4, 1., 1.), name)()
+        assert np.allclose(ders, [ref.val, ref.eps1, ref.eps12]), name
+
+    for fn in [lambda x: x.log(3), lambda x: x.expm(2), lambda x: 2 ** x, lambda x: x ** x,
+               lambda x: 3 / x - x * (1 - x) + x / 4 - x ** 2.5]:
+        ders = fn(Taylor.variable(0.4, 2)).derivatives()
+        ref = fn(HyperDual(0.4, 1., 1.))
+        assert np.allclose(ders, [ref.val, ref.eps1, ref.eps12])
+
+def test_high_order_closed_forms():
+    x0 = 0.3
+    x = Taylor.variable(x0, K)
+    k = np.arange(K + 1)
+    fact = np.array([factorial(i) for i in k], dtype=float)
+
+    assert np.allclose(x.exp().derivatives(), np.exp(x0))
+    assert np.allclose(x.sin().derivatives(), np.sin(x0 + k * np.pi / 2))
+    assert np.allclose(x.cos().derivatives(), np.cos(x0 + k * np.pi / 2))
+    assert np.allclose(x.sinh().derivatives(),
+                       np.where(k % 2 == 0, np.sinh(x0), np.cosh(x0)))
+    assert np.allclose(x.cosh().derivatives(),
+                       np.where(k % 2 == 0, np.cosh(x0), np.sinh(x0)))
+    assert np.allclose((1 / x).derivatives(), (-1.) ** k * fact / x0 ** (k + 1))
+    assert np.allclose(x.ln().derivatives()[1:], (-1.) ** (k[1:] - 1) * fact[:-1] / x0 ** k[1:])
+    assert np.allclose((x ** 3).derivatives()[:4], [x0**3, 3*x0**2, 6*x0, 6])
+    assert np.allclose((x ** 3).derivatives()[4:], 0)
+
+def test_series_at_zero():
+    x = Taylor.variable(0., 7)
+    assert np.allclose(x.arctangent().coeffs, [0, 1, 0, -1/3, 0, 1/5, 0, -1/7])
+    assert np.allclose(x.arcsine().coeffs, [0, 1, 0, 1/6, 0, 3/40, 0, 5/112])
+    assert np.allclose(x.tan().coeffs, [0, 1, 0, 1/3, 0, 2/15, 0, 17/315])
+    assert np.allclose(x.tanh().coeffs, [0, 1, 0, -1/3, 0, 2/15, 0, -17/315])
+    assert np.allclose((1 + x).sqrt().coeffs[:4], [1, 1/2, -1/8, 1/16])
+
+def test_power_at_zero_base():
+    x = Taylor.variable(0., 4)
+    assert np.array_equal((x ** 2).derivatives(), [0, 0, 2, 0, 0])
+    assert np.array_equal((x ** 3 + 1).derivatives(), [1, 0, 0, 6, 0])
+    assert np.array_equal(((x + 1 - 1) ** 0).derivatives(), [1, 0, 0, 0, 0])
+    assert np.array_equal(((Taylor.variable(1., 4) - 1) ** 2).derivatives(), [0, 0, 2, 0, 0])
+    # Other exponents, through the lowest non-zero coefficient of the base
+    assert np.allclose(((x * x) ** 1.5).derivatives(), [0, 0, 0, 6, 0])
+    assert np.allclose(((x ** 2 + x ** 3) ** 0.5).coeffs, [0, 1, 1/2, -1/8, 1/16])
+    assert np.all(np.isinf(((x + x ** 2) ** -1).coeffs))
+    assert np.array_equal((x ** 0.5).coeffs, [0, np.inf, np.inf, np.inf, np.inf])
+    # Integer exponents away from zero still match the closed form
+    y = Taylor.variable(-2., 4)
+    assert np.allclose((y ** 5).derivatives(), [-32, 80, -160, 240, -240])
+
+def test_order_mismatch():
+    with pytest.raises(ValueError):
+        Taylor.variable(1., 2) + Taylor.variable(1., 3)
+
+def test_comparisons_and_strings():
+    x = Taylor.variable(2., 3)
+    assert x == 2 and x != 3 and x > 1 and x >= 2 and x < 3 and x <= Taylor.variable(2., 3)
+    with pytest.raises(TypeError):
+        Taylor("a")
+    with pytest.raises(TypeError):
+        Taylor([1, "a"])
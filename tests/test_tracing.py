@@ -0,0 +1,106 @@
+import sys
+import numpy as np
+sys.path.append(sys.path[0][:-5])
+
+import pytest
+from autodiff.autodiff import AutoDiff
+from autodiff.advector import ADVector
+from autodiff.tracing import compile_function, trace_function, Tracer, TracingError
+
+def test_matches_eager():
+    fn = lambda x: (x[0] * x[1] + 2 / x[0] - x[1] ** 2).sin() / (1 + x[0].exp()) \
+        + x[1].logistic() - 3 ** x[0] + x[0].ln() * x[1].sqrt() + x[1].tanh().arctangent() \
+        + x[0].log(2) - x[1].expm(3) + (- x[0]).cosh() * x[1].sinh() + x[1].tan() \
+        + (x[0] / 4).arcsine() - (x[1] / 3).arccosine() + x[0].cos() - 1 - x[1]
+    f = compile_function(fn)
+    for values in ([0.3, 0.7], [1.2, 0.4]):
+        x = ADVector(values)
+        ref, out = fn(x), f(x)
+        assert isinstance(out, AutoDiff)
+        assert np.isclose(out.val, ref.val)
+        assert np.allclose(out.der, ref.der)
+    assert len(f.traces) == 1
+
+def test_seeds_and_inputs():
+    f = compile_function(lambda x: x[0] * x[1])
+    out = f([AutoDiff(2., [1., 1.]), AutoDiff(3., [0., 2.])])
+    assert out.val == 6 and all(out.der == [3, 7])
+    g = compile_function(lambda x: x.sin() * x)
+    out = g(AutoDiff(2., [3.]))
+    assert np.isclose(out.der[0], 3 * (np.cos(2) * 2 + np.sin(2)))
+    assert ('scalar', 1) in g.traces
+
+def test_vector_output():
+    f = compile_function(lambda x: [x[0] ** 2, 5., x[0] * x[1]])
+    out = f(ADVector([2., 3.]))
+    assert isinstance(out, ADVector)
+    assert all(out.val == [4, 5, 6])
+    assert (out.der == [[4, 0], [0, 0], [3, 2]]).all()
+
+def test_grouped_replay():
+    # Nodes of one depth and operation replay together, w/ repeated adjoint targets
+    n = 6
+    fn = lambda x: [(x[0] * x[i]).sin() * 2 + x[i].exp() * x[(i + 1) % n] for i in range(n)]
+    trace = trace_function(fn, n)
+    assert len(trace._forward_program) < len(trace._forward)
+    x = ADVector(np.linspace(0.1, 0.9, n))
+    val, jac = trace.evaluate(x.val)
+    ref = fn(x)
+    assert np.allclose(val, [r.val for r in ref])
+    assert np.allclose(jac, [r.der for r in ref])
+
+def test_eager_fallback():
+    f = compile_function(lambda x: x[0] if x[0] > 0 else - x[0])
+    out = f(ADVector([-2.]))
+    assert out.val == 2 and out.der[0] == -1
+    assert f.traces[('vector', 1)] is None
+
+    g = compile_function(lambda x: x ** 2)
+    out = g(ADVector([1., 2.]))
+    assert isinstance(out, ADVector) and all(out.val == [1, 4])
+    assert g.traces[('vector', 2)] is None
+
+    with pytest.raises(TracingError):
+        trace_function(lambda x: x[0] < 1, 1)
+
+def test_gradient():
+    fn = lambda x: x[0] ** 2 * x[1].exp()
+    f = compile_function(fn)
+    assert np.allclose(f.gradient([1., 0.]), [2., 1.])
+    assert np.allclose(compile_function(lambda x: x[0] if x[0] > 0 else -x[0]).gradient([-1.]),
+                       [-1.])
+
+def test_unused_branch_does_not_leak():
+    def fn(x):
+        _ = (x[0] * 0).sqrt()
+        return x[0] * 2
+    assert np.allclose(compile_function(fn).gradient([1.]), [2.])
+
+def test_tracer_strings():
+    trace = trace_function(lambda x: x[0] + 1, 1)
+    assert str(Tracer(trace, 0)) == "Tracer(0)"
+    assert trace.outputs == [2]
+
+def test_optimize_passes():
+    fn = lambda x: x[0].cos()**2 + x[1].sin()**2 + x[0].cos()**2 \
+        + ((x[0] * 2 + 1) * 3 - 4) / 2 + 2 ** 3 + x[1] * 1 - 0
+    plain = trace_function(fn, 2, optimize=False)
+    optimized = trace_function(fn, 2)
+    assert len(optimized._forward) < len(plain._forward)
+    ops = [op for op, _, _ in optimized.nodes]
+    assert ops.count('cos') == 1 and ops.count('affine') == 1 and 'pow' not in ops
+    for values in ([0.3, 0.7], [-1.1, 2.]):
+        val, jac = plain.evaluate(values)
+        opt_val, opt_jac = optimized.evaluate(values)
+        assert np.allclose(val, opt_val) and np.allclose(jac, opt_jac)
+
+def test_optimize_keeps_shared_intermediates():
+    trace = trace_function(lambda x: [x[0] * 2 + 1, (x[0] * 2).exp()], 1)
+    assert [op for op, _, _ in trace.nodes].count('affine') == 0
+    val, jac = trace.evaluate([0.5])
+    assert np.allclose(val, [2, np.exp(1)]) and np.allclose(jac, [[2], [2 * np.exp(1)]])
+
+    trace = trace_function(lambda x: [x[0] + 0, 3.], 1)
+    assert trace.outputs == [0, 1]
+    val, jac = trace.evaluate([0.5])
+    assert all(val == [0.5, 3]) and all(jac[:, 0] == [1, 0])
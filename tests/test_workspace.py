@@ -0,0 +1,93 @@
+import sys
+import numpy as np
+sys.path.append(sys.path[0][:-5])
+
+import pytest
+from autodiff.autodiff import AutoDiff
+from autodiff.advector import ADVector
+from autodiff.workspace import Workspace
+
+
+def _func(x):
+    y = (x - 1.) * (x - 1.)
+    y = y + 0.5 * x.sin()
+    return y / (1. + x * x) + x.exp() ** 2
+
+
+def test_workspace_results():
+    x = ADVector(np.linspace(0.1, 1., 20))
+    expected = _func(x)
+    with Workspace() as ws:
+        for _ in range(3):
+            out = _func(x)
+    assert np.array_equal(out.val, expected.val)
+    assert np.array_equal(out.der, expected.der)
+    assert ws.reuses > 0
+
+
+def test_workspace_reuses_buffers():
+    x = ADVector(np.linspace(0.1, 1., 20))
+    with Workspace() as ws:
+        _func(x)
+        allocations = ws.allocations
+        for _ in range(5):
+            _func(x)
+    assert ws.allocations == allocations
+
+
+def test_workspace_keeps_referenced_buffers():
+    x = ADVector(np.linspace(0.1, 1., 20))
+    with Workspace() as ws:
+        y = x * 2.
+        kept = y.der
+        expected = kept.copy()
+        del y
+        for _ in range(5):
+            _func(x)
+    assert np.array_equal(kept, expected)
+    ws.clear()
+
+
+def test_workspace_inactive():
+    ws = Workspace()
+    x = AutoDiff(np.array([1., 2.]), np.eye(2))
+    x * x
+    assert ws.allocations == 0 and ws.reuses == 0
+    # Recycling is only installed while a workspace is active
+    assert not hasattr(AutoDiff, '__del__')
+    with ws:
+        with Workspace():
+            assert hasattr(AutoDiff, '__del__')
+        assert hasattr(AutoDiff, '__del__')
+    assert not hasattr(AutoDiff, '__del__')
+
+
+def test_inplace_operators():
+    for other in [2., AutoDiff(3., 2.), np.array([1., 3.])]:
+        for op in ['__add__', '__sub__', '__mul__', '__truediv__', '__pow__']:
+            x = AutoDiff(np.array([1.5, 2.]), np.eye(2))
+            expected = getattr(x, op)(other)
+            y = x
+            x = getattr(x, op.replace('__', '__i', 1))(other)
+            assert x is y
+            assert np.array_equal(x.val, expected.val)
+            assert np.array_equal(x.der, expected.der)
+
+
+def test_inplace_self():
+    x = AutoDiff(np.array([1.5, 2.]), np.eye(2))
+    expected = x * x
+    x *= x
+    assert np.array_equal(x.val, expected.val)
+    assert np.array_equal(x.der, expected.der)
+
+
+def test_inplace_does_not_alias():
+    x = AutoDiff(2., 1.)
+    y = x + 0.
+    y += 1.
+    assert x.val == 2. and y.val == 3.
+    val = np.array([1., 2.])
+    z = AutoDiff(val, np.eye(2))
+    z += 1.
+    assert np.array_equal(val, [1., 2.])